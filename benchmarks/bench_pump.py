@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_pump.py - Hashcat 輸出讀取的每行 Python 開銷：原本的逐行文字讀取 vs engine/pump.py
+
+先以 Hashcat 模擬器 (engine/fake_hashcat.py) 錄下一段真實格式的輸出 (狀態 JSON + 啟動訊息)，
+再由子程序重複播放到 pipe，分別以兩種方式讀取並解析，量測讀取端的 CPU 時間 / 行：
+    逐行 (舊)  : text=True, bufsize=1，每行 strip、加上 [Hashcat] 前綴印出、parse_status_line
+    pump (新)  : bytes 區塊讀取，只解碼並解析狀態行，其他行放進 ring buffer
+「含雜訊」的情境在每個狀態行之後插入 Hashcat 常見的訊息行，「僅非狀態行」只有這些訊息行
+(單獨量測非狀態行的開銷；狀態行的成本主要是 json.loads，兩種讀法相同)。
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+EXAM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, EXAM_DIR)
+
+from engine.pump import OutputPump  # noqa: E402
+from engine.runner import parse_status_line  # noqa: E402
+
+FAKE_HASHCAT = os.path.join(EXAM_DIR, "engine", "fake_hashcat.py")
+
+# 模擬器以 1 秒 status-timer、時間加速 100000 倍輸出大量狀態行
+FAKE_ENV = {
+    "FAKE_HASHCAT_SPEED": "1e6",
+    "FAKE_HASHCAT_TIME_SCALE": "100000",
+    "FAKE_HASHCAT_STARTUP": "0",
+}
+TARGET_LINES = 300000
+ROUNDS = 3  # 每種讀法量測的次數，取最小值
+
+NOISE = [
+    "Speed.#1.........: 18828.5 MH/s (54.35ms) @ Accel:64 Loops:1024 Thr:512 Vec:1",
+    "Hardware.Mon.#1..: Temp: 67c Fan: 45% Util:100% Core:2805MHz Mem:13801MHz Bus:16",
+    "Candidates.#1....: s$arier12 -> &(xqxc98",
+    "Restore.Sub.#1...: Salt:0 Amplifier:0-1024 Iteration:0-1024",
+    "",
+]
+
+# 讀取端要跑的播放程序：重複輸出錄下的內容 REPEAT 次
+PLAYER = (
+    "import sys\n"
+    "data = open(sys.argv[1], 'rb').read()\n"
+    "out = sys.stdout.buffer\n"
+    "for _ in range(int(sys.argv[2])):\n"
+    "    out.write(data)\n"
+    "out.flush()\n"
+)
+
+
+def record_fake_output(work_dir):
+    """以模擬器錄下一段輸出 (不會被破解的 hash，跑到 mask 結束)"""
+    hash_file = os.path.join(work_dir, "hash.txt")
+    with open(hash_file, "w", encoding="utf-8") as f:
+        f.write("f94465bb230a5419d5176bad18eecfea2f50d2b2\n")
+    cmd = [sys.executable, FAKE_HASHCAT, "-m", "100", "-a", "3", hash_file, "?l?l?l?l?l?l",
+           "--status", "--status-json", "--status-timer=1", "--potfile-disable", "--restore-disable"]
+    result = subprocess.run(cmd, capture_output=True, env=dict(os.environ, **FAKE_ENV), cwd=work_dir)
+    return result.stdout.splitlines()
+
+
+def write_capture(work_dir, name, lines, noise):
+    noise_lines = [n.encode("utf-8") for n in NOISE]
+    out = []
+    for line in lines:
+        if noise != "only":
+            out.append(line)
+        if noise and line.startswith(b"{"):
+            out.extend(noise_lines)
+    path = os.path.join(work_dir, f"{name}.txt")
+    with open(path, "wb") as f:
+        f.write(b"\n".join(out) + b"\n")
+    return path, len(out)
+
+
+def legacy_consume(process):
+    """原本 runner 的讀取迴圈 (只保留與輸出相關的部分)"""
+    frames = 0
+    for line in process.stdout:
+        line = line.strip()
+        if line:
+            print(f"[Hashcat] {line}")
+        if parse_status_line(line) is not None:
+            frames += 1
+    return frames
+
+
+def pump_consume(process):
+    frames = 0
+    for line in OutputPump(process.stdout, verbose=False):
+        if parse_status_line(line) is not None:
+            frames += 1
+    return frames
+
+
+def measure(capture_path, repeat, legacy):
+    cmd = [sys.executable, "-c", PLAYER, capture_path, str(repeat)]
+    if legacy:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, bufsize=1,
+                                   encoding="utf-8", errors="replace")
+    else:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    # 印出的內容導向記憶體 (終端機輸出本身的開銷不計入)
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = legacy_consume(process) if legacy else pump_consume(process)
+    process.wait()
+    return frames, time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+
+def main():
+    with tempfile.TemporaryDirectory(prefix="bench_pump_") as work_dir:
+        lines = record_fake_output(work_dir)
+        print(f"[INFO] 模擬器輸出 {len(lines)} 行 (狀態行 {sum(1 for l in lines if l.startswith(b'{'))} 行)")
+
+        for name, noise in (("僅模擬器輸出", None), ("含雜訊", "mixed"), ("僅非狀態行", "only")):
+            capture_path, capture_lines = write_capture(work_dir, name, lines, noise)
+            repeat = max(1, TARGET_LINES // capture_lines)
+            total = capture_lines * repeat
+            print(f"[{name}] {total:,} 行")
+            for legacy in (True, False):
+                frames, cpu, wall = min((measure(capture_path, repeat, legacy) for _ in range(ROUNDS)),
+                                        key=lambda r: r[1])
+                print(f"  {'逐行 (舊)' if legacy else 'pump (新)'}: {cpu / total * 1e6:.2f} µs/行 (CPU)，"
+                      f"牆鐘 {wall:.2f}s，狀態 {frames:,} 筆")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_runner.py - 以 Hashcat 模擬器 (engine/fake_hashcat.py) 量測 runner 的效能
+
+1. 吞吐量：round1 secondtest 的所有 CSV 列，逐列模式 vs 批次模式的 jobs/hour
+2. 狀態解析開銷：parse_status_line 每行的平均耗時
+3. 時間上限處理：max_seconds 到達後實際多跑了多久 (overrun)
+"""
+
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+EXAM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, EXAM_DIR)
+
+from engine.jobs import collect_mask_jobs, execute_job  # noqa: E402
+from engine.runner import parse_status_line, run_hashcat_task  # noqa: E402
+from engine.scheduler import run_jobs_on_devices  # noqa: E402
+
+FAKE_HASHCAT = os.path.join(EXAM_DIR, "engine", "fake_hashcat.py")
+CSV_DIR = os.path.join(EXAM_DIR, "round1", "secondtest", "result", "mask_data")
+
+# 模擬環境：18 GH/s (RTX 5070 的 SHA-1 速度)，時間加速 3600 倍
+FAKE_ENV = {
+    "FAKE_HASHCAT_SPEED": "18e9",
+    "FAKE_HASHCAT_TIME_SCALE": "3600",
+    "FAKE_HASHCAT_STARTUP": "8",
+}
+STATUS_LINES = 200000
+
+
+def quiet():
+    """關閉 runner 的大量輸出，只保留量測結果"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def prepare_plains(work_dir):
+    """把 CSV 中的明文寫成模擬器的 oracle 清單"""
+    import pandas as pd
+
+    plains = []
+    for csv_path in sorted(glob.glob(os.path.join(CSV_DIR, "*.csv"))):
+        plains.extend(pd.read_csv(csv_path, encoding="utf-8-sig")["password"].tolist())
+    plains_path = os.path.join(work_dir, "plains.txt")
+    with open(plains_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(plains) + "\n")
+    return plains_path
+
+
+def bench_throughput(work_dir, batch_mode):
+    json_root = os.path.join(work_dir, "batch" if batch_mode else "single")
+    jobs = []
+    with quiet():
+        for csv_path in sorted(glob.glob(os.path.join(CSV_DIR, "*.csv"))):
+            jobs.extend(collect_mask_jobs(csv_path, json_root, "secondtest", lambda n: (86400, 86400), batch_mode))
+
+    rows = sum(len(job["targets"]) for job in jobs)
+    devices = [{"id": 1, "name": "Fake GPU #1"}]
+    start = time.perf_counter()
+    with quiet():
+        run_jobs_on_devices(jobs, devices, FAKE_HASHCAT, os.path.join(work_dir, "jobs"), execute_job)
+    elapsed = time.perf_counter() - start
+
+    cracked = 0
+    for path in glob.glob(os.path.join(json_root, "1", "*", "*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            cracked += json.load(f).get("Status") == "Cracked"
+
+    mode = "批次" if batch_mode else "逐列"
+    print(f"  {mode}: {len(jobs)} 次 Hashcat / {rows} 列，{elapsed:.2f}s，"
+          f"{rows / elapsed * 3600:,.0f} jobs/hour，破解 {cracked}/{rows}")
+
+
+def bench_status_parsing():
+    frame = json.dumps({
+        "session": "hashcat", "guess": {"guess_base": "?1?l?l?l?l?l?l?1", "guess_mode": 3},
+        "status": 3, "target": "hash.txt", "progress": [437277518729729, 648656151720000],
+        "restore_point": 247726080, "recovered_hashes": [0, 1], "recovered_salts": [0, 1],
+        "rejected": 0, "devices": [{"device_id": 1, "speed": 18828536596, "temp": 67, "util": 100}],
+        "time_start": 1764776374, "estimated_stop": 1764798440,
+    })
+    noise = "Speed.#1.........: 18828.5 MH/s (54.35ms) @ Accel:64 Loops:1024 Thr:512 Vec:1"
+
+    start = time.perf_counter()
+    for _ in range(STATUS_LINES):
+        parse_status_line(frame)
+    per_frame = (time.perf_counter() - start) / STATUS_LINES
+
+    start = time.perf_counter()
+    for _ in range(STATUS_LINES):
+        parse_status_line(noise)
+    per_noise = (time.perf_counter() - start) / STATUS_LINES
+
+    print(f"  狀態 JSON: {per_frame * 1e6:.2f} µs/行，非狀態行: {per_noise * 1e6:.3f} µs/行")
+
+
+def bench_timeout(work_dir):
+    # 1 H/s、不加速：密碼永遠不會在時間上限內被破解
+    os.environ.update({"FAKE_HASHCAT_SPEED": "1", "FAKE_HASHCAT_TIME_SCALE": "1", "FAKE_HASHCAT_STARTUP": "0"})
+    hash_file = os.path.join(work_dir, "timeout_hash.txt")
+    with open(hash_file, "w", encoding="utf-8") as f:
+        f.write("f94465bb230a5419d5176bad18eecfea2f50d2b2\n")
+
+    max_seconds = 3
+    output_json = os.path.join(work_dir, "timeout.json")
+    start = time.perf_counter()
+    with quiet():
+        result = run_hashcat_task(
+            [FAKE_HASHCAT, "-m", "100", hash_file], 3, "?s?l?l?l?l?l?l?d", max_seconds, output_json,
+            test_folder="firsttest", potfile_path=os.path.join(work_dir, "timeout.potfile"),
+            # 中止時寫出的 restore 檔放在暫存目錄 (未指定時會寫到 Hashcat 所在的目錄)
+            session="bench_timeout", restore_file_path=os.path.join(work_dir, "bench_timeout.restore"),
+        )
+    elapsed = time.perf_counter() - start
+    print(f"  max_seconds={max_seconds}s: 實際 {elapsed:.2f}s (overrun {elapsed - max_seconds:+.2f}s)，"
+          f"Status={result['Status']}，Stop_Reason={result['Stop_Reason']}，Exit={result['Process_Exit_Code']}")
+    os.environ.update(FAKE_ENV)
+
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix="bench_runner_")
+    try:
+        plains_path = prepare_plains(work_dir)
+        os.environ.update(FAKE_ENV)
+        os.environ["FAKE_HASHCAT_PLAINS"] = plains_path
+
+        print("[1] 吞吐量 (模擬 18 GH/s，時間加速 3600x)")
+        bench_throughput(work_dir, batch_mode=False)
+        bench_throughput(work_dir, batch_mode=True)
+
+        print(f"[2] 狀態解析開銷 ({STATUS_LINES:,} 行)")
+        bench_status_parsing()
+
+        print("[3] 時間上限處理")
+        bench_timeout(work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
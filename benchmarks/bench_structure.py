@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_structure.py - 大量密碼的 mask 產生：repo 原本的逐字元函式 vs engine/structure.py
+
+以 NumPy 產生一個模擬字典 (預設 1,000 萬行，長度 6-16，小寫為主，含大寫、數字、特殊字元；
+約 2% 的行前後有空白 / tab / \r，另有只含空白的行)，分別以兩種方式處理整個檔案，量測牆鐘時間與每秒行數：
+    genmask 規則  : 逐行 line.strip() + genmask.generate_mask_for_password
+                    vs analyze_corpus(SPECIAL_CHARS, fields=("masks",))
+    convert 規則  : 逐行 line.strip() + round2/convert.py 的 mask()
+                    vs analyze_corpus(None, fields=("masks",))
+    完整結構      : (--structure) 本檔案的逐字元 Python 迴圈 (mask、各類別數量、token run、特殊字元位置)
+                    vs analyze_corpus；repo 中沒有對應的逐字元函式，此比較只供參考
+最後比對兩者的結果是否完全相同 (比對不計入時間)。加速未達 TARGET_SPEEDUP 時明確印出。
+
+用法: python benchmarks/bench_structure.py [行數] [--structure]
+"""
+
+import ast
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+EXAM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, EXAM_DIR)
+
+from engine.genmask import generate_mask_for_password  # noqa: E402
+from engine.structure import CLASS_NAMES, FIELDS, analyze_corpus, char_class  # noqa: E402
+
+LINES = 10_000_000
+SPECIAL_CHARS = "#@!^%$&"
+SEED = 42
+TARGET_SPEEDUP = 20
+
+# 前後加上空白的行比例與使用的空白
+PADDED_RATIO = 0.02
+PADDING = [b" ", b"  ", b"\t", b" \t", b"\r"]
+
+# 模擬字典的字元分佈
+ALPHABET = [
+    (b"abcdefghijklmnopqrstuvwxyz", 0.70),
+    (b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", 0.08),
+    (b"0123456789", 0.18),
+    (b"#@!^%$&*._-", 0.04),
+]
+
+
+def write_corpus(path, lines, chunk=1_000_000):
+    """以 NumPy 產生模擬字典 (每行 6-16 個字元)"""
+    rng = np.random.default_rng(SEED)
+    pools = [np.frombuffer(chars, dtype=np.uint8) for chars, _ in ALPHABET]
+    weights = np.array([w for _, w in ALPHABET])
+    with open(path, "wb") as f:
+        for start in range(0, lines, chunk):
+            n = min(chunk, lines - start)
+            lengths = rng.integers(6, 17, n)
+            kinds = rng.choice(len(pools), size=(n, 17), p=weights)
+            matrix = np.full((n, 17), ord("\n"), dtype=np.uint8)
+            for kind, pool in enumerate(pools):
+                picks = pool[rng.integers(0, len(pool), (n, 17))]
+                matrix = np.where(kinds == kind, picks, matrix)
+            # 每列長度之後補換行，再去掉多餘的換行
+            matrix[np.arange(17) >= lengths[:, None]] = ord("\n")
+            lines_out = [line for line in matrix.tobytes().split(b"\n") if line]
+            # 部分行前後加上空白，部分行只有空白 (line.strip() 後略過)
+            padded = np.flatnonzero(rng.random(len(lines_out)) < PADDED_RATIO)
+            for i, (lead, trail) in zip(padded, rng.integers(0, len(PADDING), (len(padded), 2))):
+                if i % 10 == 0:
+                    lines_out[i] = PADDING[lead]
+                else:
+                    lines_out[i] = PADDING[lead].strip(b"\r") + lines_out[i] + PADDING[trail]
+            f.write(b"\n".join(lines_out) + b"\n")
+
+
+def load_convert_mask():
+    """
+    取出 round2/convert.py 的 mask() (與 check_char_type)
+    convert.py 匯入時會直接轉換 round2 的資料，因此只執行其中的函式定義
+    """
+    path = os.path.join(EXAM_DIR, "round2", "convert.py")
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    tree.body = [node for node in tree.body if isinstance(node, ast.FunctionDef)]
+    namespace = {}
+    exec(compile(tree, path, "exec"), namespace)
+    return namespace["mask"]
+
+
+def legacy_masks(path, mask_func):
+    """逐行 line.strip() 後以 repo 原本的函式產生 mask"""
+    masks = []
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            pwd = line.strip()
+            if pwd:
+                masks.append(mask_func(pwd))
+    return masks
+
+
+def legacy_structure(path):
+    """逐字元判斷 (本檔案撰寫的參考實作)：每列的 mask、各類別數量、token run 與特殊字元位置"""
+    rows = []
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            pwd = line.strip()
+            if not pwd:
+                continue
+            mask, counts, runs, specials = [], dict.fromkeys(CLASS_NAMES, 0), [], []
+            for i, char in enumerate(pwd):
+                name = char_class(char, SPECIAL_CHARS)
+                mask.append("?" + name)
+                counts[name] += 1
+                if runs and runs[-1][1] == name:
+                    runs[-1][2] += 1
+                else:
+                    runs.append([i, name, 1])
+                if name == "s":
+                    specials.append(i)
+            rows.append(("".join(mask), [counts[c] for c in CLASS_NAMES], runs, specials))
+    return rows
+
+
+def vectorized(path, fields, special_chars=SPECIAL_CHARS):
+    return list(analyze_corpus(path, special_chars, fields=fields))
+
+
+def vectorized_rows(chunks):
+    """把向量化的結果轉成與 legacy_structure 相同的格式 (比對用)"""
+    rows = []
+    for chunk in chunks:
+        ro, so = chunk["run_offsets"], chunk["special_offsets"]
+        for i, mask in enumerate(chunk["masks"]):
+            runs = [[int(s), CLASS_NAMES[c - 1], int(n)] for s, c, n in zip(
+                chunk["run_starts"][ro[i]:ro[i + 1]], chunk["run_classes"][ro[i]:ro[i + 1]],
+                chunk["run_lengths"][ro[i]:ro[i + 1]])]
+            rows.append((mask.decode("ascii"), chunk["counts"][i].tolist(), runs,
+                         chunk["special_positions"][so[i]:so[i + 1]].tolist()))
+    return rows
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def speedup_note(speedup):
+    if speedup >= TARGET_SPEEDUP:
+        return f"達到 {TARGET_SPEEDUP}× 目標"
+    return f"未達 {TARGET_SPEEDUP}× 目標"
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    lines = int(args[0]) if args else LINES
+    with tempfile.TemporaryDirectory(prefix="bench_structure_") as work_dir:
+        path = os.path.join(work_dir, "corpus.txt")
+        start = time.perf_counter()
+        write_corpus(path, lines)
+        print(f"[INFO] 模擬字典 {lines:,} 行，{os.path.getsize(path) / 1024 / 1024:,.1f} MB "
+              f"(產生 {time.perf_counter() - start:.1f}s)")
+
+        rules = [
+            ("genmask 規則", SPECIAL_CHARS, lambda pwd: generate_mask_for_password(pwd, SPECIAL_CHARS)),
+            ("convert 規則", None, load_convert_mask()),
+        ]
+        for label, special_chars, mask_func in rules:
+            chunks, new_seconds = timed(vectorized, path, ("masks",), special_chars)
+            expected, old_seconds = timed(legacy_masks, path, mask_func)
+            rows = len(expected)
+            same = [m.decode("ascii") for chunk in chunks for m in chunk["masks"]] == expected
+            speedup = old_seconds / new_seconds
+            print(f"  {label} : 逐行 {old_seconds:.2f}s ({rows / old_seconds:,.0f} 行/s)，"
+                  f"向量化 {new_seconds:.2f}s ({rows / new_seconds:,.0f} 行/s)，"
+                  f"加速 {speedup:.1f}× ({speedup_note(speedup)})，{'完全相同' if same else '不一致'} ({rows:,} 個密碼)")
+            del chunks, expected
+
+        if "--structure" not in sys.argv[1:]:
+            return
+        chunks, new_seconds = timed(vectorized, path, FIELDS)
+        expected, old_seconds = timed(legacy_structure, path)
+        runs = sum(len(chunk["run_lengths"]) for chunk in chunks)
+        specials = sum(len(chunk["special_positions"]) for chunk in chunks)
+        same = vectorized_rows(chunks) == expected
+        rows = len(expected)
+        print(f"  完整結構 (參考實作) : 逐字元 {old_seconds:.2f}s ({rows / old_seconds:,.0f} 行/s)，"
+              f"向量化 {new_seconds:.2f}s ({rows / new_seconds:,.0f} 行/s)，"
+              f"加速 {old_seconds / new_seconds:.1f}×，{'完全相同' if same else '不一致'} "
+              f"(token run {runs:,} 段，特殊字元 {specials:,} 個)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,175 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-從 dictionary.txt 隨機抽取密碼，生成約 100MB 的字典檔
+從 dictionary.txt 隨機抽取密碼，生成約 100MB 的字典檔 (也可一次產生多個大小，例如 100MB、1GB、10GB)
+
+以 mmap 讀取來源字典一次：來源大小直接由檔案大小得知 (不需先數行數、估計平均行大小)，
+每一行依序取得一個由 seed 決定的隨機值 u，u < 目標大小 / 來源的輸出大小 的行寫入該目標的檔案
+(每行被抽中的機率相同，輸出大小的期望值即為目標大小；原本以前 10,000 行估計平均行大小，
+字典前段與整體的分佈不同時會偏離目標)。空行與行尾的 \r 不寫出，因此「來源的輸出大小」為
+來源大小 × 目前為止 (含這一塊) 非空行 (含換行) 佔的比例。
+實際大小與目標的差距約為 √行數 行；寫滿目標大小後該目標不再寫入 (不會超過目標)。
+同一個 u 用於所有目標，因此除了寫滿時略過的來源尾端之外，較小的字典是較大字典的子集。
+
+用法: python create_100mb_dict.py [目標大小 ...]   (預設 100MB，例如 100MB 1GB 10GB)
 """
 
-import random
+import mmap
 import os
+import sys
 
-def create_100mb_dictionary(source_file, output_file, target_size_mb=100):
+import numpy as np
+
+SEED = 42
+# 每次處理的位元組數 (以換行對齊)
+CHUNK_BYTES = 16 * 1024 * 1024
+# 每處理多少行印出一次進度
+REPORT_LINES = 10_000_000
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(text):
+    """'100MB' / '1GB' → 位元組數"""
+    text = text.strip().upper()
+    for unit, scale in UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * scale)
+    return int(text)
+
+
+def size_label(size):
+    for unit, scale in reversed(list(UNITS.items())):
+        if size >= scale and size % scale == 0:
+            return f"{size // scale}{unit.lower()}"
+    return f"{size}b"
+
+
+def iter_line_chunks(mm, chunk_bytes=CHUNK_BYTES):
     """
-    從來源字典隨機抽取密碼，生成指定大小的新字典
-    使用串流方式處理，避免記憶體問題
+    逐塊取出以換行對齊的資料
+    Yields: (位元組陣列, 行首, 行尾 (不含換行與行尾的 \\r))
+    """
+    size = len(mm)
+    pos = 0
+    while pos < size:
+        end = min(size, pos + chunk_bytes)
+        if end < size:
+            cut = mm.rfind(b"\n", pos, end)
+            end = cut + 1 if cut >= 0 else (mm.find(b"\n", end) + 1 or size)
+        data = np.frombuffer(mm, dtype=np.uint8, count=end - pos, offset=pos)
+        breaks = np.flatnonzero(data == ord("\n"))
+        starts = np.concatenate([[0], breaks + 1])
+        ends = np.append(breaks, len(data))
+        if starts[-1] == len(data):
+            starts, ends = starts[:-1], ends[:-1]
+        # 行尾的 \r 不屬於密碼
+        cr = (ends > starts) & (data[np.maximum(ends - 1, 0)] == ord("\r"))
+        ends = ends - cr
+        yield data, starts, ends
+        pos = end
+
+
+def create_sampled_dictionaries(source_file, outputs, seed=SEED, chunk_bytes=CHUNK_BYTES):
+    """
+    單次讀取來源字典，產生多個目標大小的字典
+    outputs: dict {目標大小 (位元組): 輸出檔案路徑}
+    Returns: dict {目標大小: (實際大小, 行數)}
     """
     print(f"讀取來源字典: {source_file}")
-    
-    # 計算目標大小（字節）
-    target_size = target_size_mb * 1024 * 1024
-    
-    # 第一步：計算總行數和平均行大小
-    print("計算檔案資訊...")
-    total_lines = 0
-    sample_size = 0
-    sample_lines = 0
-    
-    with open(source_file, 'r', encoding='utf-8', errors='ignore') as f:
-        for i, line in enumerate(f):
-            total_lines += 1
-            if i < 10000:
-                sample_size += len(line.encode('utf-8'))
-                sample_lines += 1
-            if i % 1000000 == 0 and i > 0:
-                print(f"  已處理 {i:,} 行...")
-    
-    avg_line_size = sample_size / sample_lines
-    estimated_lines = int(target_size / avg_line_size)
-    sample_rate = estimated_lines / total_lines
-    
-    print(f"來源字典總行數: {total_lines:,}")
-    print(f"平均行大小: {avg_line_size:.2f} bytes")
-    print(f"目標大小: {target_size_mb} MB")
-    print(f"預估需要行數: {estimated_lines:,}")
-    print(f"抽取比例: {sample_rate*100:.2f}%")
-    
-    # 第二步：使用隨機抽樣寫入新檔案
-    print("正在隨機抽取並寫入...")
-    
-    current_size = 0
-    written_lines = 0
-    
-    with open(source_file, 'r', encoding='utf-8', errors='ignore') as f_in:
-        with open(output_file, 'w', encoding='utf-8') as f_out:
-            for i, line in enumerate(f_in):
-                # 使用隨機決定是否選擇此行
-                if random.random() < sample_rate:
-                    line = line.strip()
-                    if line:
-                        line_size = len(line.encode('utf-8')) + 1
-                        
-                        if current_size + line_size > target_size:
-                            break
-                        
-                        f_out.write(line + '\n')
-                        current_size += line_size
-                        written_lines += 1
-                
-                if i % 1000000 == 0 and i > 0:
-                    print(f"  已處理 {i:,} 行，已寫入 {written_lines:,} 行...")
-    
-    # 顯示結果
-    actual_size = os.path.getsize(output_file)
-    print(f"\n✓ 完成！")
-    print(f"  - 檔案: {output_file}")
-    print(f"  - 大小: {actual_size / 1024 / 1024:.2f} MB")
-    print(f"  - 行數: {written_lines:,}")
-    print(f"  - 實際抽取比例: {written_lines/total_lines*100:.2f}%")
+    source_size = os.path.getsize(source_file)
+    if source_size == 0:
+        print("來源字典是空的")
+        return {}
+    targets = sorted(outputs)
+    for t in targets:
+        note = " (大於來源字典，寫入全部)" if t >= source_size else ""
+        print(f"目標 {size_label(t)}: 約為來源的 {min(1.0, t / source_size) * 100:.2f}%{note}")
+
+    rng = np.random.default_rng(seed)
+    # 先寫到 .tmp，完成後才取代 (中斷時不留下看似完整的字典)
+    tmp_paths = {t: outputs[t] + ".tmp" for t in targets}
+    files = {}
+    written = {t: 0 for t in targets}
+    lines = {t: 0 for t in targets}
+    full = set()
+    processed = 0
+    raw_bytes = line_bytes = 0
+    report_at = REPORT_LINES
+    try:
+        for t in targets:
+            files[t] = open(tmp_paths[t], "wb")
+        with open(source_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunks = iter_line_chunks(mm, chunk_bytes)
+            data = starts = ends = None
+            try:
+                for data, starts, ends in chunks:
+                    u = rng.random(len(starts))
+                    lengths = ends - starts
+                    raw_bytes += len(data)
+                    line_bytes += int((lengths[lengths > 0] + 1).sum())
+                    output_size = source_size * line_bytes / raw_bytes
+                    for t in targets:
+                        if t in full:
+                            continue
+                        selected = np.flatnonzero((u < t / output_size) & (lengths > 0))
+                        # 每行寫出 密碼 + 換行；超過目標大小的部分不寫
+                        sizes = np.cumsum(lengths[selected] + 1)
+                        fits = np.searchsorted(sizes, t - written[t], side="right")
+                        if fits < len(selected):
+                            full.add(t)
+                        selected = selected[:fits]
+                        if not len(selected):
+                            continue
+                        # 選中的行依序排在輸出中 (每行 密碼 + 換行)，以索引一次取出，再把每行的最後一個位元組設為換行
+                        line_sizes = lengths[selected] + 1
+                        out_ends = np.cumsum(line_sizes)
+                        index = np.arange(out_ends[-1]) + np.repeat(
+                            starts[selected] - (out_ends - line_sizes), line_sizes)
+                        out = data[np.minimum(index, len(data) - 1)]
+                        out[out_ends - 1] = ord("\n")
+                        files[t].write(out.tobytes())
+                        written[t] += len(out)
+                        lines[t] += len(selected)
+                    processed += len(starts)
+                    if processed >= report_at:
+                        report_at += REPORT_LINES
+                        print(f"  已處理 {processed:,} 行，" + "，".join(
+                            f"{size_label(t)} 已寫入 {lines[t]:,} 行" for t in targets))
+                    if len(full) == len(targets):
+                        break
+            finally:
+                # mmap 關閉前必須釋放所有指向它的陣列 (發生例外時也是，否則 BufferError 會蓋過原本的錯誤)
+                chunks.close()
+                del data, starts, ends
+    except BaseException:
+        for out in files.values():
+            out.close()
+        for path in tmp_paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        for out in files.values():
+            out.close()
+    for t in targets:
+        os.replace(tmp_paths[t], outputs[t])
+
+    print("\n✓ 完成！")
+    for t in targets:
+        print(f"  - 檔案: {outputs[t]}")
+        print(f"    大小: {written[t] / 1024 / 1024:.2f} MB (目標 {t / 1024 / 1024:.2f} MB)，行數: {lines[t]:,}")
+    return {t: (written[t], lines[t]) for t in targets}
+
+
+def create_100mb_dictionary(source_file, output_file, target_size_mb=100):
+    """從來源字典隨機抽取密碼，生成指定大小的新字典"""
+    target = target_size_mb * 1024 * 1024
+    return create_sampled_dictionaries(source_file, {target: output_file})[target]
+
 
 if __name__ == "__main__":
     script_dir = os.path.dirname(os.path.abspath(__file__))
     source = os.path.join(script_dir, "dictionary.txt")
-    output = os.path.join(script_dir, "dictionary-100mb.txt")
-    
-    create_100mb_dictionary(source, output, target_size_mb=100)
+    sizes = [parse_size(arg) for arg in sys.argv[1:]] or [100 * 1024 * 1024]
+    create_sampled_dictionaries(
+        source, {size: os.path.join(script_dir, f"dictionary-{size_label(size)}.txt") for size in sizes})
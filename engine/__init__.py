@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+engine - round1 / round2 共用的 Hashcat 實驗引擎
+
+各 round 目錄下的腳本 (run_m.py 等) 透過 sys.path 匯入本套件：
+    runner.py     - 單一 Hashcat 任務的指令組裝、狀態解析與執行
+    pump.py       - 以 bytes 區塊讀取 Hashcat 輸出，只取出狀態行，其他行留在 ring buffer
+    watchdog.py   - 時間上限、停滯偵測與取消 (terminate → kill 整個 process group)
+    batch.py      - 以 mask 分組，多個 hash 合併為一次 Hashcat 執行
+    crackwatch.py - tail Hashcat outfile，取得每個 hash 的破解時間
+    jobdir.py     - 每個任務獨立的工作目錄 (hash 檔、potfile、outfile、session)
+    session.py    - 以 --session / --restore 續跑被中斷的任務
+    statuslog.py  - 執行中的狀態記錄 (append-only JSONL) 與結果 JSON 的原子寫入
+    ledger.py     - SQLite 任務帳本：每列的狀態、嘗試次數與破解結果 (取代逐一讀取結果 JSON)
+    resultcache.py - round1 / round2 共用的結果快取 (hash、mask、字符集、裝置相同時不重跑)
+    genmask.py    - 由密碼 txt 產生 mask_data CSV (round*/gen_mask.py)
+    csvstream.py  - CSV 的分塊串流寫入與 manifest (列數、長度 / 特殊字元數量、digest)，有效性檢查為 O(1)
+    structure.py  - 大量密碼的 mask、各類別數量、token run 與特殊字元位置 (NumPy 批次處理)
+    reservoir.py  - 一次讀取外洩密碼清單，依長度 × 特殊字元數 × 位置 × 字元類別數分層抽樣產生 data/ 的 txt
+    hashgen.py    - 以 process pool 分塊產生多種 Hashcat 模式的 hash (MD5、SHA-1/256、NTLM、加鹽) 與 CSV
+    profiles.py   - 各 round 的設定 (時間上限、特殊字元、CSV 矩陣、隨機種子與抽樣數)
+    matrix.py     - 宣告式實驗矩陣的展開、每個 cell 的預估裝置時數與預算
+    adaptive.py   - 依 cell 序列抽樣：中位數信賴區間收斂或預算用完時提前停止
+    experiment.py - 依 round profile 執行實驗矩陣 (round*/run_m.py) 與產生 CSV (genmask.py)
+    devices.py    - 以 hashcat -I 偵測可用的 backend 裝置
+    jobs.py       - 將 CSV 展開為任務並執行單一任務
+    hybrid.py     - Hybrid Attack (-a 6 / -a 7) 任務：依密碼結構拆出字典詞與 mask，字典依詞長過濾並快取
+    scheduler.py  - 每個裝置一個 worker 的平行排程
+    aio.py        - 以 asyncio 事件迴圈監督多個 Hashcat (scheduler.py 的替代)
+    sharding.py   - 以 -s/-l 將單一 mask 的 keyspace 切片，分到多個裝置平行執行
+    calibration.py - 以 hashcat -b 與短 mask 校正裝置速度，並快取結果
+    keyspace.py   - 重現 Hashcat 的 mask 列舉順序，計算密碼的候選位置與預測破解時間
+    fake_hashcat.py - Hashcat 模擬器，可在沒有 GPU 的機器上測試 runner
+"""
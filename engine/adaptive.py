@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+adaptive.py - 依 cell 的序列抽樣提前停止 (scheduler / aio 的任務來源)
+
+原本每個 cell (test_folder/CSV) 的每一列都會執行，即使破解時間的分佈早已確定
+(例如 8 碼的 mask 幾秒就破解且變異很小)。AdaptiveSampler 取代共用佇列，
+每次有裝置空出來時才決定下一個任務：
+    1. 每個 cell 至少先取得 min_samples 筆觀測值 (依 plan_jobs 排好的順序輪流)
+    2. 之後優先執行中位數信賴區間相對最寬的 cell (高變異的 cell 分到剩下的時間)
+    3. 中位數的 95% 信賴區間夠窄、或 cell 的裝置時數預算用完時，該 cell 不再發出新任務
+
+觀測值為結果 JSON 的 Actual_Runtime_Seconds (graph/ 的箱形圖使用的欄位)；
+未破解 (逾時 / 跑完) 的列視為右設限，在排序中當作無限大，
+因此超過一半的列未破解時信賴區間不會收斂，由預算決定何時停止。
+中位數的信賴區間以順序統計量計算 (不假設分佈)：
+    第 floor(n/2 - z·√n/2) 到第 ceil(n/2 + z·√n/2) 筆 (0 起算，z = 1.96)
+收斂條件：區間寬度 ≤ rel_width × 中位數，或 ≤ abs_seconds 秒。
+
+keyspace 切片任務以整組為單位：同組已有切片發出時，其餘切片一定會執行。
+未執行的列在任務帳本中維持 pending，下次執行時仍可補跑。
+"""
+
+import math
+import statistics
+import threading
+
+from engine.matrix import job_cell
+
+Z_95 = 1.96
+
+# 每個 cell 至少的觀測數 (箱形圖的四分位數至少需要數筆資料；n=8 時信賴區間為第 2 到第 7 小的值)
+MIN_SAMPLES = 8
+# 信賴區間寬度 ≤ 中位數 × REL_WIDTH 或 ≤ ABS_SECONDS 秒時停止
+REL_WIDTH = 0.25
+ABS_SECONDS = 5.0
+
+
+def median_ci(values, z=Z_95):
+    """
+    中位數的 distribution-free 信賴區間
+    values: 已排序的觀測值 (未破解為 math.inf)
+    Returns: (low, high)
+    """
+    n = len(values)
+    low = max(0, math.floor(n / 2 - z * math.sqrt(n) / 2))
+    high = min(n - 1, math.ceil(n / 2 + z * math.sqrt(n) / 2) - 1)
+    return values[low], values[high]
+
+
+def observed_seconds(result):
+    """破解時間 (秒)；未破解為 math.inf (右設限)"""
+    if result.get("Cracked_Password", "Na") in ("Na", None, ""):
+        return math.inf
+    return result.get("Actual_Runtime_Seconds", math.inf)
+
+
+class AdaptiveSampler:
+    """
+    scheduler / aio 的任務來源：next_job() 取出下一個任務 (沒有時回傳 None)，
+    任務結束後以 record(job, results) 回報結果
+    budget_hours: 每個 cell 的裝置時數預算，None 表示不限制
+    """
+
+    def __init__(self, jobs, min_samples=MIN_SAMPLES, rel_width=REL_WIDTH, abs_seconds=ABS_SECONDS,
+                 budget_hours=None):
+        self.min_samples = min_samples
+        self.rel_width = rel_width
+        self.abs_seconds = abs_seconds
+        self.budget_seconds = budget_hours * 3600 if budget_hours is not None else None
+        self.lock = threading.Lock()
+        self.pending = {}
+        for job in jobs:
+            self.pending.setdefault(job_cell(job), []).append(job)
+        self.cells = {
+            cell: {"values": [], "running": 0, "spent": 0.0, "skipped": 0, "stopped": None}
+            for cell in self.pending
+        }
+        self._issued_groups = set()
+
+    def _state(self, cell):
+        """Returns: (停止原因或 None, 信賴區間相對寬度)"""
+        entry = self.cells[cell]
+        if self.budget_seconds is not None and entry["spent"] >= self.budget_seconds:
+            return "budget", math.inf
+        values = sorted(entry["values"])
+        if len(values) < self.min_samples:
+            return None, math.inf
+        low, high = median_ci(values)
+        median = statistics.median(values)
+        if math.isinf(high) or math.isinf(median):
+            return None, math.inf
+        width = high - low
+        if width <= self.abs_seconds or width <= self.rel_width * median:
+            return "converged", 0.0
+        return None, width / median if median > 0 else math.inf
+
+    def _stop(self, cell, reason):
+        """cell 停止發出新任務：丟棄尚未開始的任務 (已發出切片的組除外)"""
+        entry = self.cells[cell]
+        entry["stopped"] = reason
+        keep = [job for job in self.pending[cell]
+                if job.get("shard") and id(job["shard"]["group"]) in self._issued_groups]
+        entry["skipped"] += len(self.pending[cell]) - len(keep)
+        if len(self.pending[cell]) > len(keep):
+            print(f"[ADAPTIVE] {cell}: {'中位數信賴區間已收斂' if reason == 'converged' else '預算用完'}，"
+                  f"略過剩下的 {len(self.pending[cell]) - len(keep)} 個任務 (已有 {len(entry['values'])} 筆觀測)")
+        self.pending[cell] = keep
+
+    def _pick(self):
+        """
+        選出下一個 cell：觀測數 (含執行中) 不足 min_samples 的 cell 優先，其次為信賴區間最寬的 cell；
+        已發出 min_samples 個任務但結果還沒回來的 cell 最後 (避免裝置閒置)
+        """
+        best, best_key = None, None
+        for cell, jobs in self.pending.items():
+            if not jobs:
+                continue
+            # 切片組已開始時，剩下的切片直接發出
+            if jobs[0].get("shard") and id(jobs[0]["shard"]["group"]) in self._issued_groups:
+                return cell
+            entry = self.cells[cell]
+            if entry["stopped"]:
+                continue
+            reason, rel = self._state(cell)
+            if reason:
+                self._stop(cell, reason)
+                if self.pending[cell]:
+                    return cell
+                continue
+
+            seen = len(entry["values"]) + entry["running"]
+            if seen < self.min_samples:
+                key = (0, seen)
+            elif len(entry["values"]) < self.min_samples:
+                key = (2, seen)
+            else:
+                key = (1, -rel)
+            if best_key is None or key < best_key:
+                best, best_key = cell, key
+        return best
+
+    def next_job(self):
+        with self.lock:
+            cell = self._pick()
+            if cell is None:
+                return None
+            job = self.pending[cell].pop(0)
+            shard = job.get("shard")
+            if shard:
+                self._issued_groups.add(id(shard["group"]))
+                # 同組的切片只算一筆觀測
+                if shard["index"] == 0:
+                    self.cells[cell]["running"] += 1
+            else:
+                self.cells[cell]["running"] += 1
+            return job
+
+    def record(self, job, results):
+        """任務結束 (失敗時 results 為 None)；切片任務只有最後一段會帶回合併結果"""
+        cell = job_cell(job)
+        with self.lock:
+            entry = self.cells[cell]
+            results = results or {}
+            shard = job.get("shard")
+            if shard and not results:
+                return
+            entry["running"] = max(0, entry["running"] - 1)
+            for _, output_json_path in job["targets"]:
+                result = results.get(output_json_path)
+                if result is None:
+                    continue
+                entry["values"].append(observed_seconds(result))
+                if not result.get("Result_Cache_Hit"):
+                    entry["spent"] += result.get("Actual_Runtime_Seconds") or 0.0
+
+    def report(self):
+        """印出每個 cell 的觀測數、中位數、IQR 與信賴區間"""
+        print(f"\n[ADAPTIVE] {'cell':<36} {'n':>4} {'略過':>4} {'中位數':>10} {'IQR':>10} {'95% CI':>22}")
+        for cell, entry in self.cells.items():
+            values = sorted(entry["values"])
+            if not values:
+                print(f"[ADAPTIVE] {cell:<36} {0:>4} {entry['skipped']:>4}")
+                continue
+            median = statistics.median(values)
+            iqr = "-"
+            if len(values) >= 2:
+                q1, _, q3 = statistics.quantiles(values, n=4)
+                iqr = "inf" if math.isinf(q3) or math.isnan(q3) else f"{q3 - q1:.1f}"
+            low, high = median_ci(values)
+            print(f"[ADAPTIVE] {cell:<36} {len(values):>4} {entry['skipped']:>4} {median:>10.1f} {iqr:>10} "
+                  f"{f'[{low:.1f}, {high:.1f}]':>22}" + (f"  ({entry['stopped']})" if entry["stopped"] else ""))
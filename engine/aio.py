@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+aio.py - 以 asyncio 在單一事件迴圈中監督多個 Hashcat 程序
+
+scheduler.py 為每個裝置開一個執行緒，每個執行緒以阻塞讀取監看一個 Hashcat；
+這裡改以 asyncio.create_subprocess_exec 啟動 Hashcat，同一個事件迴圈負責：
+    - 所有程序的 stdout 非阻塞讀取與狀態解析 (pump.OutputPump.feed)
+    - 每個任務的時間上限、停滯偵測與取消 (watchdog.AsyncWatchdog)
+    - outfile 的破解事件輪詢 (CrackWatcher.poll)
+run_hashcat_task_async 的結果 dict、結果 JSON 與狀態記錄和 run_hashcat_task 完全相同
+(共用 runner.prepare_task / update_task_status / finish_task)，既有的分析腳本不需修改。
+
+批次任務與 keyspace 切片任務仍以原本的同步函式執行 (asyncio.to_thread)。
+事件迴圈中的任務被取消時 (例如 Ctrl+C)，Hashcat 會被終止但不寫出結果 JSON，
+狀態記錄維持 Session_State=running，下次執行時以 --restore 續跑。
+"""
+
+import asyncio
+import os
+import subprocess
+import traceback
+
+from engine.crackwatch import CrackWatcher
+from engine.jobdir import cleanup_job_dir
+from engine.jobs import execute_job, job_attack_args, prepare_job
+from engine.ledger import record_job_results, record_job_start
+from engine.pump import CHUNK_SIZE, OK_EXIT_CODES, OutputPump
+from engine.resultcache import cached_job_results, store_job_results
+from engine.runner import finish_task, parse_status_line, prepare_task, start_task, update_task_status
+from engine.sharding import execute_shard
+from engine.watchdog import STALL_SECONDS, STOP_CANCELLED, STOP_EXIT, AsyncWatchdog
+
+
+async def open_hashcat_async(cmd, cwd):
+    """與 pump.open_hashcat 相同：binary pipe、stderr 合併、獨立的 process group"""
+    if os.name == "posix":
+        group = {"start_new_session": True}
+    else:
+        group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, cwd=cwd, **group
+    )
+
+
+async def poll_outfile(watcher, process):
+    """在事件迴圈中輪詢 outfile (取代 CrackWatcher 的背景執行緒)"""
+    while process.returncode is None:
+        watcher.poll()
+        await asyncio.sleep(watcher.poll_interval)
+
+
+async def run_hashcat_task_async(
+    hashcat_base_cmd,
+    mode,
+    attack_payload,
+    max_seconds,
+    output_json_path,
+    hybrid_mask=None,
+    test_folder=None,
+    hash_file_path=None,
+    potfile_path=None,
+    outfile_path=None,
+    session=None,
+    extra_fields=None,
+    restore_file_path=None,
+    resume=None,
+    cancel_event=None,    # threading.Event 或 asyncio.Event，被設定時終止 Hashcat 並寫出結果
+    stall_seconds=STALL_SECONDS,
+    verbose=None
+):
+    """參數與回傳值同 runner.run_hashcat_task"""
+    task = prepare_task(
+        hashcat_base_cmd, mode, attack_payload, max_seconds, output_json_path, hybrid_mask, test_folder,
+        hash_file_path, potfile_path, outfile_path, session, extra_fields, restore_file_path, resume
+    )
+
+    watcher = CrackWatcher(task["outfile_path"], elapsed_offset=task["elapsed_before"])
+    process = await open_hashcat_async(task["cmd"], task["hashcat_dir"])
+    start_task(task)
+    watchdog = AsyncWatchdog(process, max_seconds - task["elapsed_before"], stall_seconds, cancel_event)
+    watchdog.start()
+    poller = asyncio.ensure_future(poll_outfile(watcher, process))
+
+    def handle(lines):
+        for line in lines:
+            status = parse_status_line(line)
+            if status is None:
+                continue
+            watcher.note_status(status)
+            watchdog.note_status()
+            update_task_status(task, status)
+
+    pump = OutputPump(None, verbose)
+    try:
+        while True:
+            chunk = await process.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            handle(pump.feed(chunk))
+        handle(pump.flush())
+        await process.wait()
+        await watchdog.stop()
+    except asyncio.CancelledError:
+        # 事件迴圈取消此任務：終止 Hashcat (會寫出 restore 檔)，保留 running 狀態以便續跑
+        await watchdog.abort()
+        poller.cancel()
+        task["status_log"].close()
+        raise
+    await poller
+    watcher.stop()
+
+    if process.returncode not in OK_EXIT_CODES and watchdog.stop_reason == STOP_EXIT:
+        pump.dump_tail(f"返回碼 {process.returncode}")
+
+    return finish_task(
+        task, process.returncode, watcher.results(), watchdog.result_fields(),
+        watchdog.stop_reason == STOP_CANCELLED if cancel_event is not None else None
+    )
+
+
+async def execute_job_async(job, hashcat_exe_path, jobs_root, device=None, cancel_event=None):
+    """
+    execute_job 的 asyncio 版本：單列任務在事件迴圈中執行，
+    批次任務與切片任務以 asyncio.to_thread 執行原本的同步函式
+    """
+    if job["batch"] or job.get("shard"):
+        runner = execute_shard if job.get("shard") else execute_job
+        return await asyncio.to_thread(runner, job, hashcat_exe_path, jobs_root, device)
+
+    base_cmd, extra_fields, job_dir, resume = prepare_job(job, hashcat_exe_path, jobs_root, device)
+    _, output_json_path = job["targets"][0]
+    result = await run_hashcat_task_async(
+        base_cmd + [job_dir["hash_file"]],
+        max_seconds=job["max_seconds"],
+        output_json_path=output_json_path,
+        test_folder=job["test_folder"],
+        potfile_path=job_dir["potfile"],
+        outfile_path=job_dir["outfile"],
+        session=job_dir["session"],
+        extra_fields=extra_fields,
+        restore_file_path=job_dir["restore_file"],
+        resume=resume,
+        cancel_event=cancel_event,
+        **job_attack_args(job)
+    )
+    cleanup_job_dir(job_dir)
+    return {output_json_path: result}
+
+
+async def supervise_jobs(jobs, devices, hashcat_exe_path, jobs_root, concurrency=1, cancel_event=None,
+                         sampler=None):
+    """
+    以單一事件迴圈執行所有任務：每個裝置同時執行一個任務 (裝置親和性同 scheduler.py)
+    devices 為空時不指定 -d，同時執行 concurrency 個任務
+    cancel_event: asyncio.Event，被設定時終止所有執行中的任務 (仍寫出結果 JSON)
+    sampler: adaptive.AdaptiveSampler (以 jobs 建立)，None 表示依序執行所有任務
+    Returns: dict {job_id: 結果 dict (output_json_path → result) 或 None (失敗)}
+    """
+    slots = devices or [None] * concurrency
+    queue = list(jobs)
+    results = {}
+
+    def next_job():
+        if sampler is not None:
+            return sampler.next_job()
+        return queue.pop(0) if queue else None
+
+    async def run_one(job, device):
+        try:
+            record_job_start(job)
+            result = cached_job_results(job, device)
+            if result is None:
+                result = await execute_job_async(job, hashcat_exe_path, jobs_root, device, cancel_event)
+                store_job_results(job, device, result)
+            record_job_results(job, result)
+        except Exception:
+            print(f"[ERROR] 裝置 #{device['id'] if device else '預設'} 執行 {job['job_id']} 失敗")
+            traceback.print_exc()
+            result = None
+        if sampler is not None:
+            sampler.record(job, result)
+        results[job["job_id"]] = result
+
+    async def worker(device):
+        # 每個裝置 (或每個並行名額) 一個 coroutine，依 plan_jobs 排好的順序取任務
+        while True:
+            job = next_job()
+            if job is None:
+                return
+            await run_one(job, device)
+
+    print(f"[AIO] {len(jobs)} 個任務，同時執行 {len(slots)} 個"
+          + (f" (裝置: {', '.join('#' + str(d['id']) for d in devices)})" if devices else ""))
+    await asyncio.gather(*(worker(device) for device in slots))
+
+    done = sum(1 for r in results.values() if r is not None)
+    print(f"[AIO] 完成 {done}/{len(jobs)} 個任務")
+    if sampler is not None:
+        sampler.report()
+    return results
+
+
+def run_jobs_async(jobs, devices, hashcat_exe_path, jobs_root, concurrency=1, sampler=None):
+    """scheduler.run_jobs_on_devices 的替代：以 asyncio 事件迴圈執行所有任務"""
+    return asyncio.run(supervise_jobs(jobs, devices, hashcat_exe_path, jobs_root, concurrency, sampler=sampler))
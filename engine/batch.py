@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+batch.py - 多 hash 合併執行
+將 CSV 中 mask (與字符集設定) 相同的列合併為一個 hash 檔，只啟動一次 Hashcat，
+省去每個密碼都要重新啟動、編譯 kernel 與 autotune 的開銷，並仍為每一列輸出獨立的 JSON。
+每個 hash 的破解時間由 CrackWatcher 從 outfile 取得。
+"""
+
+import datetime
+import os
+
+from engine.crackwatch import CrackWatcher
+from engine.pump import OK_EXIT_CODES, OutputPump, open_hashcat
+from engine.session import SESSION_FINISHED, SESSION_RUNNING, restore_command, session_fields
+from engine.statuslog import append_status, open_status_log, write_json_atomic
+from engine.watchdog import STALL_SECONDS, STOP_EXIT, Watchdog
+from engine.runner import (
+    MODE_NAMES,
+    apply_job_files,
+    build_hashcat_command,
+    parse_status_line,
+    read_potfile,
+    clear_potfile,
+    crack_event_fields,
+    select_charset,
+)
+
+
+def group_rows_by_mask(df, test_folder=None):
+    """
+    依 (mask, 字符集設定) 將 CSV 列分組，保持首次出現的順序
+    Returns: dict {(mask, charset_hex): [(row_index, row), ...]}
+    """
+    charset_hex, _ = select_charset(test_folder)
+    groups = {}
+    for row_index, row in df.iterrows():
+        mask = row["mask"]
+        key = (mask, charset_hex if "?s" in mask else "")
+        groups.setdefault(key, []).append((row_index, row))
+    return groups
+
+
+def run_hashcat_batch(
+    hashcat_base_cmd,
+    attack_payload,
+    jobs,
+    max_seconds,
+    hash_file_path,
+    test_folder=None,
+    potfile_path=None,
+    outfile_path=None,
+    session=None,
+    extra_fields=None,
+    restore_file_path=None,
+    resume=None,
+    verbose=None,
+    stall_seconds=STALL_SECONDS
+):
+    """
+    以單一 Hashcat 程序對多個 hash 執行同一個 mask 攻擊
+    jobs: [(hashvalue, output_json_path), ...]
+    hashcat_base_cmd 不含 hash 檔，會自動附加 hash_file_path
+    resume: session.read_resume_state 的回傳值，不為 None 時以 --restore 續跑
+    verbose: True 時即時印出 Hashcat 的非狀態輸出，預設依環境變數 HASHCAT_VERBOSE
+    stall_seconds: 超過此秒數沒有新的狀態時視為停滯並終止
+    Returns: dict {output_json_path: 該列的結果 dict}
+    """
+    hashes = []
+    for hashvalue, _ in jobs:
+        if hashvalue.lower() not in hashes:
+            hashes.append(hashvalue.lower())
+
+    with open(hash_file_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(hashes) + "\n")
+
+    cmd, mask, _ = build_hashcat_command(
+        list(hashcat_base_cmd) + [hash_file_path], 3, attack_payload,
+        test_folder=test_folder
+    )
+    potfile_path, outfile_path, shared_potfile = apply_job_files(
+        cmd, hash_file_path, potfile_path, outfile_path, session, restore_file_path
+    )
+
+    elapsed_before = resume["elapsed"] if resume else 0.0
+    if resume:
+        cmd = restore_command(cmd[0], session, restore_file_path)
+        print(f"[RESUME] {session} 第 {resume['resume_count']} 次續跑，先前已執行 {elapsed_before:.1f}s")
+    session_info = {}
+    if session and restore_file_path:
+        session_info = session_fields(
+            session, restore_file_path, SESSION_RUNNING, elapsed_before, resume["resume_count"] if resume else 0
+        )
+
+    print(f"\n[BATCH] {len(jobs)} 列 / {len(hashes)} 個 hash 合併執行: {mask}")
+    print("[RUN] Hashcat Command:", " ".join(cmd))
+
+    batch_status = {"Status": "Initializing"}
+
+    hashcat_dir = os.path.dirname(cmd[0])
+    watcher = CrackWatcher(outfile_path, elapsed_offset=elapsed_before)
+    process = open_hashcat(cmd, hashcat_dir)  # 在 hashcat 目錄下執行
+
+    run_start_time = datetime.datetime.now()
+    watcher.start()
+    watchdog = Watchdog(process, max_seconds - elapsed_before, stall_seconds)
+    watchdog.start()
+
+    # 每一列各自的狀態記錄 (append-only)，結果 JSON 在結束時一次寫出
+    status_logs = {
+        output_json_path: open_status_log(output_json_path, resume=resume is not None)
+        for _, output_json_path in jobs
+    }
+
+    pump = OutputPump(process.stdout, verbose)
+    for line in pump:
+        status = parse_status_line(line)
+        if status is None:
+            continue
+        watcher.note_status(status)
+        watchdog.note_status()
+
+        current_time = datetime.datetime.now()
+        actual_elapsed = elapsed_before + (current_time - run_start_time).total_seconds()
+
+        batch_status.update({
+            "Status": status["status"],
+            "Guess.Mask": status["guess_mask"],
+            "Progress": status["progress"],
+            "Hashcat_Reported_Time_Seconds": status["time_elapsed"],
+            "Estimated_Left_Seconds": status["time_estimated"],
+            "Last_Update": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+        # 記錄目前狀態 (含 session 狀態，程式中斷後可續跑)
+        snapshot = dict(batch_status, Actual_Runtime_Seconds=round(actual_elapsed, 2), **session_info)
+        for log_file in status_logs.values():
+            append_status(log_file, snapshot)
+
+    process.wait()
+    watchdog.stop()
+    watcher.stop()
+    print(f"\n[INFO] Hashcat 程序已結束，返回碼: {process.returncode}")
+    if process.returncode not in OK_EXIT_CODES and watchdog.stop_reason == STOP_EXIT:
+        pump.dump_tail(f"返回碼 {process.returncode}")
+
+    run_end_time = datetime.datetime.now()
+    actual_runtime = round(elapsed_before + (run_end_time - run_start_time).total_seconds(), 2)
+
+    events = watcher.results()
+    cracked = {h: ev["password"] for h, ev in events.items()}
+    # outfile 沒有記錄到的 hash (例如先前已在 potfile 中)，以程序結束時間記錄
+    remaining = [h for h in hashes if h not in cracked]
+    for h, pwd in read_potfile(potfile_path, remaining).items():
+        cracked[h] = pwd
+
+    results = {}
+    for hashvalue, output_json_path in jobs:
+        h = hashvalue.lower()
+        row_status = {
+            "Attack_Mode": MODE_NAMES[3],
+            "Attack_Payload": mask,
+            "Hybrid_Mask": None,
+            "Status": "Cracked" if h in cracked else batch_status["Status"],
+            "Max_Time_Limit_Seconds": max_seconds,
+            "Guess.Mask": batch_status.get("Guess.Mask", mask),
+            "Progress": batch_status.get("Progress", []),
+            "Hashcat_Reported_Time_Seconds": batch_status.get("Hashcat_Reported_Time_Seconds", 0),
+            "Actual_Runtime_Seconds": events[h]["seconds_from_start"] if h in events else actual_runtime,
+            "Estimated_Left_Seconds": batch_status.get("Estimated_Left_Seconds", 0),
+            "Last_Update": batch_status.get("Last_Update", run_end_time.strftime("%Y-%m-%d %H:%M:%S")),
+            "Started": run_start_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "Finished": run_end_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "Command": " ".join(cmd),
+            "Process_Exit_Code": process.returncode,
+            "Batch_Size": len(hashes),
+            "Batch_Runtime_Seconds": actual_runtime,
+            "Stop_Reason": watchdog.stop_reason,
+            "Killed": watchdog.killed,
+            "Cracked_Password": cracked.get(h, "Na"),
+        }
+        if h in events:
+            row_status.update(crack_event_fields(events[h]))
+        if session_info:
+            row_status.update(session_info, Session_State=SESSION_FINISHED)
+        row_status.update(extra_fields or {})
+        calibrated_speed = row_status.get("Calibrated_Speed")
+        progress = events[h]["crack_pos"] if h in events else (row_status["Progress"] or [0])[0]
+        if calibrated_speed and progress:
+            row_status["Expected_Seconds_From_Progress"] = round(int(progress) / calibrated_speed, 2)
+        append_status(status_logs[output_json_path], row_status)
+        status_logs[output_json_path].close()
+        write_json_atomic(output_json_path, row_status)
+        results[output_json_path] = row_status
+
+    print("\n" + "="*50)
+    print(f" BATCH SUMMARY")
+    print(f" Payload       : {mask}")
+    print(f" Cracked       : {len(cracked)}/{len(hashes)}")
+    print(f" Batch Time    : {actual_runtime}s")
+    print(f" Exit Code     : {process.returncode}")
+    print("="*50 + "\n")
+
+    # ======= 清空共用 potfile (任務專屬 potfile 隨工作目錄刪除) =======
+    if shared_potfile:
+        clear_potfile(potfile_path)
+
+    return results
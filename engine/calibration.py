@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+calibration.py - 裝置速度校正與快取
+
+每個 (裝置, 驅動版本, Hashcat 版本) 只量測一次：
+1. hashcat -b -m <mode> 的 benchmark 速度
+2. 以自定義 -1 字符集 (?s → ?1) 實際跑一段短 mask attack 的速度
+   (-O 的 mask attack 速度會受字符集大小影響，與 benchmark 不完全相同)
+
+結果存在 speed_cache.json，之後由 jobs.py / 分析腳本讀取，
+用來把 keyspace 換算成預期時間、把 progress 換算成預期經過時間。
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import statistics
+import subprocess
+import tempfile
+
+from engine.hashgen import md4_hex
+from engine.keyspace import enumerator_for_mask
+from engine.runner import build_hashcat_command, parse_status_line, select_charset
+from engine.statuslog import write_json_atomic
+
+SPEED_CACHE_NAME = "speed_cache.json"
+
+# mask 校正使用的 mask (?s 會依 test_folder 換成 -1 字符集) 與執行秒數
+CALIBRATION_MASK = "?s?l?l?l?l?l?l?d?d"
+CALIBRATION_SECONDS = 30
+
+# mask 校正用的目標 hash (不可能被破解的明文)
+CALIBRATION_HASHES = {
+    "0": lambda p: hashlib.md5(p).hexdigest(),
+    "100": lambda p: hashlib.sha1(p).hexdigest(),
+    "1400": lambda p: hashlib.sha256(p).hexdigest(),
+    "1000": lambda p: md4_hex(p.decode("utf-8").encode("utf-16-le")),
+}
+CALIBRATION_PLAIN = b"calibration-target-not-in-keyspace"
+
+SPEED_LINE_RE = re.compile(r"^Speed\.#0*(\d+)\.*:\s*([\d.]+)\s*([kMGTP]?)H/s")
+UNIT_SCALE = {"": 1, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15}
+
+
+def default_cache_path(exam_dir):
+    return os.path.join(exam_dir, SPEED_CACHE_NAME)
+
+
+def load_speed_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] 讀取速度快取失敗: {e}，將重新校正")
+        return {}
+
+
+def save_speed_cache(cache, cache_path):
+    write_json_atomic(cache_path, cache)
+
+
+def hashcat_version(hashcat_exe_path):
+    """hashcat --version，失敗時回傳 "unknown" """
+    try:
+        result = subprocess.run(
+            [hashcat_exe_path, "--version"],
+            capture_output=True, text=True, encoding="utf-8", errors="replace",
+            cwd=os.path.dirname(hashcat_exe_path), timeout=60
+        )
+        return result.stdout.strip().splitlines()[0] if result.stdout.strip() else "unknown"
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+
+
+def device_fingerprint(device):
+    """裝置指紋：型號 + 驅動 (不含編號，同型號的卡共用校正結果)"""
+    return "|".join([device.get("type", ""), device.get("vendor", ""),
+                     device.get("name", ""), device.get("driver", "")])
+
+
+def cache_key(device, version):
+    return f"{version}|{device_fingerprint(device)}"
+
+
+def parse_benchmark_output(text):
+    """
+    解析 hashcat -b 的 Speed.#N 行
+    Returns: dict {裝置編號: H/s}
+    """
+    speeds = {}
+    for line in text.splitlines():
+        match = SPEED_LINE_RE.match(line.strip())
+        if match:
+            speeds[int(match.group(1))] = float(match.group(2)) * UNIT_SCALE[match.group(3)]
+    return speeds
+
+
+def run_benchmark(hashcat_exe_path, device, hash_mode):
+    """hashcat -b -m <mode> -d <id>，回傳 H/s 或 None"""
+    cmd = [hashcat_exe_path, "-b", "-m", str(hash_mode), "-d", str(device["id"]), "-O", "--force"]
+    print(f"[CALIBRATE] benchmark: {' '.join(cmd)}")
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, encoding="utf-8", errors="replace",
+            cwd=os.path.dirname(hashcat_exe_path), timeout=600
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[WARN] benchmark 失敗: {e}")
+        return None
+    return parse_benchmark_output(result.stdout).get(device["id"])
+
+
+def run_mask_calibration(hashcat_exe_path, device, hash_mode, test_folder, seconds=CALIBRATION_SECONDS):
+    """
+    以 test_folder 的 -1 字符集實際跑 seconds 秒的 mask attack
+    回傳 Running 狀態的速度中位數 (H/s) 或 None
+    """
+    hash_func = CALIBRATION_HASHES.get(str(hash_mode))
+    if hash_func is None:
+        print(f"[WARN] 不支援 -m {hash_mode} 的 mask 校正，改用 benchmark 速度")
+        return None
+
+    with tempfile.TemporaryDirectory(prefix="calibrate_") as work_dir:
+        hash_file = os.path.join(work_dir, "hash.txt")
+        with open(hash_file, "w", encoding="utf-8") as f:
+            f.write(hash_func(CALIBRATION_PLAIN) + "\n")
+
+        cmd, _, _ = build_hashcat_command(
+            [hashcat_exe_path, "-m", str(hash_mode), "-d", str(device["id"]), hash_file],
+            3, CALIBRATION_MASK, test_folder=test_folder, status_timer=1
+        )
+        # restore 檔放在暫存目錄 (未指定時會留在 Hashcat 所在的目錄)
+        cmd.extend([f"--runtime={seconds}", "--potfile-disable", "--session", f"calibrate_{device['id']}",
+                    "--restore-file-path", os.path.join(work_dir, "calibrate.restore")])
+        print(f"[CALIBRATE] mask: {' '.join(cmd)}")
+        try:
+            result = subprocess.run(
+                cmd, capture_output=True, text=True, encoding="utf-8", errors="replace",
+                cwd=os.path.dirname(hashcat_exe_path), timeout=seconds + 600
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"[WARN] mask 校正失敗: {e}")
+            return None
+
+    speeds = []
+    for line in result.stdout.splitlines():
+        status = parse_status_line(line.strip())
+        if status and status["status_code"] == 3 and status["speed"] > 0:
+            speeds.append(status["speed"])
+    # 第一個 Running 狀態可能仍在暖機，有兩筆以上時捨棄
+    if len(speeds) > 1:
+        speeds = speeds[1:]
+    return statistics.median(speeds) if speeds else None
+
+
+def calibrate_devices(hashcat_exe_path, devices, cache_path, hash_modes=("100",),
+                      test_folders=("firsttest", "secondtest"), force=False):
+    """
+    校正所有裝置 (已在快取中的項目略過，force=True 時重新量測)
+    並將速度表附加到 device["speeds"]
+    Returns: 更新後的快取 dict
+    """
+    cache = load_speed_cache(cache_path)
+    version = hashcat_version(hashcat_exe_path)
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    for device in devices:
+        key = cache_key(device, version)
+        entry = cache.setdefault(key, {
+            "hashcat_version": version,
+            "device": {k: device.get(k, "") for k in ("type", "vendor", "name", "driver")},
+            "benchmark": {},
+            "mask": {},
+        })
+
+        for mode in map(str, hash_modes):
+            if force or mode not in entry["benchmark"]:
+                speed = run_benchmark(hashcat_exe_path, device, mode)
+                if speed:
+                    entry["benchmark"][mode] = {"speed": speed, "measured_at": now}
+
+            mode_masks = entry["mask"].setdefault(mode, {})
+            for test_folder in test_folders:
+                charset_hex, _ = select_charset(test_folder)
+                if force or charset_hex not in mode_masks:
+                    speed = run_mask_calibration(hashcat_exe_path, device, mode, test_folder)
+                    if speed:
+                        mode_masks[charset_hex] = {"speed": speed, "mask": CALIBRATION_MASK, "measured_at": now}
+
+            save_speed_cache(cache, cache_path)
+
+        device["speeds"] = entry
+        for mode in map(str, hash_modes):
+            bench = entry["benchmark"].get(mode, {}).get("speed")
+            print(f"[CALIBRATE] #{device['id']} {device.get('name', '')} -m {mode}: "
+                  f"benchmark {bench or 0:,.0f} H/s, mask "
+                  + ", ".join(f"{v['speed']:,.0f}" for v in entry["mask"].get(mode, {}).values()))
+
+    return cache
+
+
+def lookup_speed(entry, hash_mode, charset_hex=None):
+    """
+    從快取項目取得速度：有對應字符集的 mask 校正時優先使用，否則用 benchmark
+    Returns: H/s 或 None
+    """
+    if not entry:
+        return None
+    mask_speed = entry.get("mask", {}).get(str(hash_mode), {}).get(charset_hex or "", {}).get("speed")
+    if mask_speed:
+        return mask_speed
+    return entry.get("benchmark", {}).get(str(hash_mode), {}).get("speed")
+
+
+def device_speed(device, hash_mode, mask, test_folder=None):
+    """取得裝置對某個 mask 的校正速度 (需先執行 calibrate_devices)"""
+    if not device:
+        return None
+    charset_hex = select_charset(test_folder)[0] if "?s" in mask else None
+    return lookup_speed(device.get("speeds"), hash_mode, charset_hex)
+
+
+def exhaust_seconds(mask, test_folder, speed):
+    """以 keyspace / 速度估計跑完整個 mask 所需秒數"""
+    if not speed:
+        return None
+    return enumerator_for_mask(mask, test_folder).keyspace() / speed
+
+
+def progress_seconds(progress, speed):
+    """將 Hashcat progress ([done, total]) 換算為以校正速度計算的預期經過秒數"""
+    if not speed or not progress:
+        return None
+    return progress[0] / speed
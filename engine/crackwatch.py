@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+crackwatch.py - 透過 tail Hashcat 的 --outfile 取得每個 hash 的破解時間
+
+Hashcat 以 --outfile-format 1,2,4,5 輸出：hash:password:crack_pos:timestamp
+背景執行緒持續讀取新增的行，記錄每個 hash 出現在 outfile 的時間點，
+精度取決於輪詢間隔 (預設 50ms)，不依賴 --status-timer。
+
+時間基準為 autotune 結束的時間點：第一個 Running 狀態行出現時，
+以 (已處理數 / 速度) 往回推算實際開始執行的時間；若在第一個狀態行之前
+就已破解，則以程序啟動時間為基準。
+"""
+
+import os
+import re
+import threading
+import time
+
+# hash:plain:crack_pos:timestamp
+OUTFILE_FORMAT = "1,2,4,5"
+
+HEX_PLAIN_RE = re.compile(r"^\$HEX\[([0-9a-fA-F]*)\]$")
+
+
+def outfile_args(outfile_path):
+    """回傳加入 Hashcat 指令的 outfile 參數"""
+    return ["--outfile", outfile_path, "--outfile-format", OUTFILE_FORMAT]
+
+
+def decode_plain(plain):
+    """還原 Hashcat 自動轉成 $HEX[...] 的密碼"""
+    m = HEX_PLAIN_RE.match(plain)
+    if m:
+        return bytes.fromhex(m.group(1)).decode("utf-8", errors="replace")
+    return plain
+
+
+def parse_outfile_line(line):
+    """
+    解析一行 outfile (格式 1,2,4,5)
+    Returns: (hash, password, crack_pos, timestamp) 或 None
+    """
+    line = line.rstrip("\r\n")
+    parts = line.rsplit(":", 2)
+    if len(parts) != 3:
+        return None
+    head, crack_pos, timestamp = parts
+    if ":" not in head:
+        return None
+    hashvalue, plain = head.split(":", 1)
+    try:
+        return hashvalue.lower(), decode_plain(plain), int(crack_pos), int(timestamp)
+    except ValueError:
+        return None
+
+
+class CrackWatcher(threading.Thread):
+    """背景 tail outfile 的執行緒，記錄每個 hash 的破解時間"""
+
+    def __init__(self, outfile_path, poll_interval=0.05, elapsed_offset=0.0):
+        super().__init__(daemon=True)
+        self.outfile_path = outfile_path
+        self.poll_interval = poll_interval
+        self.elapsed_offset = elapsed_offset  # 續跑時先前各次執行累計的秒數
+        self.start_time = time.monotonic()
+        self.autotune_end = None
+        self.events = {}  # hash -> dict
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._offset = 0
+        self._partial = b""
+
+        # 清除上一次留下的 outfile，避免誤判
+        if os.path.exists(outfile_path):
+            os.remove(outfile_path)
+
+    def note_status(self, status):
+        """
+        由狀態行推算 autotune 結束時間 (只採用第一個 Running 狀態)
+        status: parse_status_line 的回傳值
+        """
+        if self.autotune_end is not None or status.get("status") != "Running":
+            return
+        now = time.monotonic()
+        progress = status.get("progress", [])
+        speed = status.get("speed", 0)
+        done = progress[0] if len(progress) >= 2 else 0
+        running_for = done / speed if speed > 0 else 0.0
+        self.autotune_end = max(self.start_time, now - running_for)
+
+    def poll(self, final=False):
+        """讀取 outfile 新增的行 (背景執行緒或 aio.py 的事件迴圈定期呼叫)"""
+        try:
+            with open(self.outfile_path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+                self._offset = f.tell()
+        except FileNotFoundError:
+            return
+
+        if not data and not (final and self._partial):
+            return
+
+        seen_at = time.monotonic()
+        lines = (self._partial + data).split(b"\n")
+        # 最後一段可能尚未寫完，結束時才一併處理
+        self._partial = b"" if final else lines.pop()
+
+        with self._lock:
+            for line in lines:
+                parsed = parse_outfile_line(line.decode("utf-8", errors="replace"))
+                if parsed is None:
+                    continue
+                hashvalue, password, crack_pos, timestamp = parsed
+                if hashvalue in self.events:
+                    continue
+                self.events[hashvalue] = {
+                    "password": password,
+                    "crack_pos": crack_pos,
+                    "hashcat_timestamp": timestamp,
+                    "seen_at": seen_at,
+                }
+                print(f"[CRACKED] {hashvalue} → {password} ({seen_at - self.start_time:.3f}s)")
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.poll()
+            self._stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        """停止輪詢並讀取最後的內容"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        self.poll(final=True)
+
+    def results(self):
+        """
+        Returns: dict {hash: {...}}，包含：
+            password / crack_pos / hashcat_timestamp
+            seconds_from_start     - 從程序啟動起算
+            seconds_after_autotune - 從 autotune 結束起算
+            reference              - 時間基準 ("autotune_end" 或 "process_start")
+        """
+        if self.autotune_end is not None:
+            reference, ref_time = "autotune_end", self.autotune_end
+        else:
+            reference, ref_time = "process_start", self.start_time
+
+        out = {}
+        with self._lock:
+            for hashvalue, ev in self.events.items():
+                out[hashvalue] = {
+                    "password": ev["password"],
+                    "crack_pos": ev["crack_pos"],
+                    "hashcat_timestamp": ev["hashcat_timestamp"],
+                    "seconds_from_start": round(self.elapsed_offset + ev["seen_at"] - self.start_time, 3),
+                    "seconds_after_autotune": round(self.elapsed_offset + max(0.0, ev["seen_at"] - ref_time), 3),
+                    "reference": reference,
+                }
+        return out
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+csvstream.py - mask_data CSV 的串流寫入與 manifest (有效性檢查不必重新讀取整個 CSV)
+
+原本 genmask 先把所有列組成 DataFrame 才寫出，檢查既有 CSV 時又以 pandas 讀回整個檔案逐列判斷。
+ChunkedCsvWriter 每 CHUNK_ROWS 列寫出一次 (記憶體用量與列數無關)，寫入的同時累計：
+    rows            - 列數
+    lengths         - 密碼長度 → 列數
+    special_counts  - 特殊字元數量 → 列數 (依 special_chars)
+    sha256          - 整個檔案 (含 BOM) 的 digest
+關閉時以 <csv>.manifest.json 保存，另記錄 CSV 的大小與修改時間。
+
+check_manifest 只比對 manifest 與 CSV 的 stat (O(1))；CSV 沒有 manifest (舊版產生的檔案)、
+或大小 / 修改時間已改變時，以 build_manifest 串流讀取 CSV 重建一次 manifest。
+輸出格式與 pandas.DataFrame.to_csv(index=False, encoding="utf-8-sig") 相同。
+"""
+
+import codecs
+import csv
+import hashlib
+import io
+import json
+import os
+
+from engine.statuslog import write_json_atomic
+
+CHUNK_ROWS = 10_000
+MANIFEST_SUFFIX = ".manifest.json"
+PASSWORD_COLUMN = "password"
+
+
+def manifest_path(csv_path):
+    return csv_path + MANIFEST_SUFFIX
+
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class CsvStats:
+    """累計 manifest 的列數、密碼長度與特殊字元數量"""
+
+    def __init__(self, columns, special_chars=None):
+        self.columns = list(columns)
+        self.special_chars = special_chars
+        self.password_index = self.columns.index(PASSWORD_COLUMN) if PASSWORD_COLUMN in self.columns else None
+        self.rows = 0
+        self.lengths = {}
+        self.special_counts = {}
+
+    def add(self, rows):
+        self.rows += len(rows)
+        if self.password_index is None:
+            return
+        for row in rows:
+            password = str(row[self.password_index])
+            self.lengths[len(password)] = self.lengths.get(len(password), 0) + 1
+            if self.special_chars is not None:
+                special = sum(1 for c in password if c in self.special_chars)
+                self.special_counts[special] = self.special_counts.get(special, 0) + 1
+
+    def manifest(self, sha256, csv_path):
+        return {
+            "columns": self.columns,
+            "rows": self.rows,
+            "lengths": {str(k): v for k, v in sorted(self.lengths.items())},
+            "special_chars": self.special_chars,
+            "special_counts": {str(k): v for k, v in sorted(self.special_counts.items())},
+            "sha256": sha256,
+            **_file_stat(csv_path),
+        }
+
+
+class ChunkedCsvWriter:
+    """
+    以固定大小的區塊寫出 CSV (先寫到 .tmp，close 時取代並寫出 manifest)
+    special_chars: 計算 special_counts 的特殊字元 (None 表示不計算)
+    """
+
+    def __init__(self, path, columns, special_chars=None, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.stats = CsvStats(columns, special_chars)
+        self.digest = hashlib.sha256()
+        self.pending = []
+        self.file = open(path + ".tmp", "wb")
+        self._write_bytes(codecs.BOM_UTF8)
+        self._write_rows([self.stats.columns])
+
+    def _write_bytes(self, data):
+        self.digest.update(data)
+        self.file.write(data)
+
+    def _write_rows(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator=os.linesep).writerows(rows)
+        self._write_bytes(buffer.getvalue().encode("utf-8"))
+
+    def flush(self):
+        if self.pending:
+            self.stats.add(self.pending)
+            self._write_rows(self.pending)
+            self.pending = []
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.pending.append(row)
+            if len(self.pending) >= self.chunk_rows:
+                self.flush()
+
+    def close(self):
+        """完成寫入；Returns: manifest"""
+        self.flush()
+        self.file.close()
+        os.replace(self.path + ".tmp", self.path)
+        manifest = self.stats.manifest(self.digest.hexdigest(), self.path)
+        write_json_atomic(manifest_path(self.path), manifest)
+        return manifest
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.path + ".tmp"):
+            os.remove(self.path + ".tmp")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_manifest(csv_path):
+    """Returns: manifest (與 CSV 的大小、修改時間一致時)，否則 None"""
+    path = manifest_path(csv_path)
+    if not os.path.exists(csv_path) or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"  [WARNING] 讀取 {os.path.basename(path)} 失敗: {e}")
+        return None
+    stat = _file_stat(csv_path)
+    if any(manifest.get(k) != v for k, v in stat.items()):
+        return None
+    return manifest
+
+
+def build_manifest(csv_path, special_chars=None, chunk_rows=CHUNK_ROWS):
+    """串流讀取既有的 CSV，建立並寫出 manifest；Returns: manifest"""
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        stats = CsvStats(next(reader, []), special_chars)
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                stats.add(chunk)
+                chunk = []
+        stats.add(chunk)
+
+    manifest = stats.manifest(digest.hexdigest(), csv_path)
+    write_json_atomic(manifest_path(csv_path), manifest)
+    return manifest
+
+
+def check_manifest(manifest, expected_length, special_chars, expected_special_count=None):
+    """manifest 是否符合條件 (非空、每列長度為 expected_length、特殊字元數量為 expected_special_count)"""
+    if not manifest or not manifest["rows"] or PASSWORD_COLUMN not in manifest["columns"]:
+        return False
+    if set(manifest["lengths"]) != {str(expected_length)}:
+        return False
+    if expected_special_count is not None:
+        if manifest["special_chars"] != special_chars:
+            return False
+        if set(manifest["special_counts"]) != {str(expected_special_count)}:
+            return False
+    return True
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+devices.py - 偵測 Hashcat 可用的 backend 裝置 (hashcat -I)
+"""
+
+import os
+import re
+import subprocess
+
+# 預設只使用 GPU，避免 CPU/內顯的破解時間混入實驗數據
+DEFAULT_DEVICE_TYPES = ("GPU",)
+
+DEVICE_HEADER_RE = re.compile(r"Backend Device ID #0*(\d+)(?:\s*\(Alias: #0*(\d+)\))?")
+FIELD_RE = re.compile(r"^\s+([\w.]+?)\.*:\s*(.*)$")
+
+
+def parse_backend_info(text):
+    """
+    解析 hashcat -I 的輸出
+    Returns: [{"id", "type", "name", "vendor", "driver", "alias"}, ...]
+    """
+    devices = []
+    current = None
+    for line in text.splitlines():
+        header = DEVICE_HEADER_RE.search(line)
+        if header:
+            current = {
+                "id": int(header.group(1)),
+                "alias": int(header.group(2)) if header.group(2) else None,
+                "type": "",
+                "name": "",
+                "vendor": "",
+                "driver": "",
+            }
+            devices.append(current)
+            continue
+
+        field = FIELD_RE.match(line)
+        if current is None or not field:
+            continue
+        key, value = field.group(1), field.group(2).strip()
+        if key == "Type":
+            current["type"] = value
+        elif key == "Name":
+            current["name"] = value
+        elif key == "Vendor":
+            current["vendor"] = value
+        elif key == "Driver.Version":
+            current["driver"] = value
+
+    # 同一張卡可能同時出現在 CUDA 與 OpenCL (互為 Alias)，只保留編號較小者
+    return [d for d in devices if d["alias"] is None or d["id"] < d["alias"]]
+
+
+def discover_devices(hashcat_exe_path, device_types=DEFAULT_DEVICE_TYPES):
+    """
+    執行 hashcat -I 取得可用裝置，依 device_types 篩選
+    失敗時回傳空列表
+    """
+    try:
+        result = subprocess.run(
+            [hashcat_exe_path, "-I", "--force"],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            cwd=os.path.dirname(hashcat_exe_path),
+            timeout=120
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[WARN] 無法執行 hashcat -I: {e}")
+        return []
+
+    devices = parse_backend_info(result.stdout)
+    if device_types:
+        wanted = {t.upper() for t in device_types}
+        devices = [d for d in devices if d["type"].upper() in wanted]
+
+    for d in devices:
+        print(f"[DEVICE] #{d['id']} {d['type']} {d['name']} (driver {d['driver'] or 'N/A'})")
+    return devices
+
+
+def select_devices(hashcat_exe_path, device_ids=None, device_types=DEFAULT_DEVICE_TYPES):
+    """
+    device_ids 為 None 時自動偵測；否則只使用指定編號的裝置
+    偵測不到任何裝置時退回 #1 (原本寫死的 -d 1)
+    """
+    devices = discover_devices(hashcat_exe_path, device_types if device_ids is None else None)
+    if device_ids is not None:
+        by_id = {d["id"]: d for d in devices}
+        devices = [
+            by_id.get(i, {"id": i, "alias": None, "type": "", "name": "", "vendor": "", "driver": ""})
+            for i in device_ids
+        ]
+    if not devices:
+        print("[WARN] 未偵測到可用裝置，使用預設裝置 #1")
+        devices = [{"id": 1, "alias": None, "type": "", "name": "", "vendor": "", "driver": ""}]
+    return devices
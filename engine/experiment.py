@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+experiment.py - 依 round profile (profiles.py) 執行 Mask / Hybrid Attack 實驗矩陣
+(原本位於 round1/run_m.py 與 round2/run_m.py 的主程式)
+
+各 round 的 run_m.py / gen_mask.py 只呼叫 run_round / generate_round；
+也可以直接執行：
+    python -m engine.experiment run round2
+    python -m engine.experiment hybrid round2     (只執行 Hybrid 階段: -a 6 / -a 7，使用相同的 mask_data CSV)
+    python -m engine.experiment generate round2
+    python -m engine.experiment sample round2 <密碼清單> [數量]  (由外洩密碼清單分層抽樣產生 data/ 的 txt)
+    python -m engine.experiment estimate round2   (只印出每個 cell 的預估裝置時數)
+"""
+
+import os
+import sys
+
+from engine.adaptive import AdaptiveSampler
+from engine.aio import run_jobs_async
+from engine.calibration import calibrate_devices, default_cache_path, hashcat_version
+from engine.devices import select_devices
+from engine.genmask import generate_mask_csvs
+from engine.hybrid import HYBRID_MODES, collect_hybrid_jobs, hybrid_word_lengths, length_wordlists
+from engine.jobdir import JOB_ROOT_NAME
+from engine.jobs import collect_mask_jobs, plan_jobs
+from engine.ledger import ensure_ledger
+from engine.matrix import apply_budget, estimate_cells, expand_matrix, mask_csvs, print_cost_report, profile_cells
+from engine.profiles import get_profile, timeouts_for
+from engine.reservoir import PER_FILE, write_round_inputs
+from engine.resultcache import default_cache_dir
+from engine.scheduler import run_jobs_on_devices
+from engine.sharding import shard_jobs
+
+EXAM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Hybrid Attack 的來源字典 (相對於 exam 目錄，profile 的 "wordlist" 可覆寫)
+DEFAULT_WORDLIST = os.path.join("dictionary", "dictionary.txt")
+
+# run_round 的執行設定 (與 round 無關；各 round 的 run_m.py 可覆寫)
+RUN_DEFAULTS = {
+    # 批次模式：同一個 CSV 中 mask 相同的列合併為一次 Hashcat 執行
+    # (預設關閉，維持每列各自啟動一次 Hashcat 的量測方式)
+    "batch_mode": False,
+    # 使用的裝置編號，None 表示以 hashcat -I 自動偵測所有 GPU，每個裝置一個 worker
+    "devices": None,
+    # 執行前以 hashcat -b 與短時間 mask attack 校正每個裝置的速度 (結果快取在 exam/speed_cache.json)
+    "calibrate": True,
+    # 依 keyspace / 校正速度 設定時間上限：預期窮舉時間的倍數 (不超過 profile 的上限)
+    "timeout_multiple": 3.0,
+    "min_timeout": 60,
+    # 預期時間超過此秒數的 mask 以 -s/-l 切成「裝置數量」段，分到各裝置平行執行 (只有一個裝置時不切片)
+    "shard_min_seconds": 3600,
+    # 以 asyncio 事件迴圈 (engine/aio.py) 監督所有 Hashcat，取代每個裝置一個執行緒的 scheduler
+    "async_engine": False,
+    # 需要重複量測時設為 True (仍會執行 Hashcat，並以新的結果更新結果快取)
+    "repeat_measurements": False,
+    # 每個 cell (test_folder/CSV) 的裝置時數預算，None 表示不限制；超過時依 budget_action 處理
+    # (trim: 刪去預期時間長的任務，skip: 略過整個 cell，abort: 不啟動任何任務)
+    "cell_budget_hours": None,
+    "budget_action": "trim",
+    # 依 cell 序列抽樣 (engine/adaptive.py)：中位數信賴區間夠窄或 cell 預算用完時不再發出新任務，
+    # 剩下的時間優先給高變異的 cell (此時 cell_budget_hours 由 sampler 在執行中檢查，不預先刪去任務)
+    "adaptive": False,
+    # 覆寫實驗矩陣的攻擊模式，例如 [6, 7] 只執行 Hybrid 階段；None 表示依 profile 的 attack_modes
+    "attack_modes": None,
+    # 只印出每個 cell 的預估裝置時數，不執行
+    "dry_run": False,
+}
+
+
+def round_dir(round_name, exam_dir=EXAM_DIR):
+    return os.path.join(exam_dir, round_name)
+
+
+def default_hashcat_exe(exam_dir=EXAM_DIR):
+    """hashcat 執行檔路徑 (假設在 exam 的上一層)"""
+    return os.path.join(os.path.dirname(exam_dir), "hashcat.exe")
+
+
+def collect_round_jobs(round_name, profile, exam_dir, batch_mode, result_cache, attack_modes=None):
+    """依 profile 的實驗矩陣 (matrix.expand_matrix) 收集所有尚未破解的任務"""
+    base_dir = round_dir(round_name, exam_dir)
+    get_timeouts = timeouts_for(profile)
+    # 任務帳本 (exam/ledger.sqlite3)：已破解的列直接略過，被中斷的列才檢查續跑狀態
+    ledger_path = ensure_ledger(exam_dir)
+
+    all_jobs = []
+    hybrid_cells = []
+    current_folder = None
+    for cell in expand_matrix(profile, attack_modes):
+        test_folder = cell["test_folder"]
+        if test_folder != current_folder:
+            current_folder = test_folder
+            print(f"\n========== Now Processing: {round_name}/{test_folder} ==========\n")
+
+        # 使用絕對路徑來避免找不到檔案的問題 (Mask 與 Hybrid 攻擊都使用 mask_data)
+        csv_path = os.path.join(base_dir, test_folder, "result", "mask_data", cell["csv"])
+        json_root_path = os.path.join(base_dir, test_folder, "result_json")
+
+        if not os.path.exists(csv_path):
+            print(f"[SKIP] 找不到：{csv_path}")
+            continue
+
+        print(f"[LOAD] {csv_path}")
+        if 3 in cell["attack_modes"]:
+            all_jobs.extend(collect_mask_jobs(
+                csv_path, json_root_path, test_folder, get_timeouts, batch_mode,
+                ledger_path=ledger_path, round_name=round_name, result_cache=result_cache
+            ))
+        modes = [m for m in cell["attack_modes"] if m in HYBRID_MODES]
+        if modes:
+            hybrid_cells.append((csv_path, json_root_path, test_folder, modes))
+
+    if hybrid_cells:
+        all_jobs.extend(collect_round_hybrid_jobs(round_name, profile, exam_dir, hybrid_cells, get_timeouts,
+                                                  ledger_path, result_cache))
+    return all_jobs
+
+
+def collect_round_hybrid_jobs(round_name, profile, exam_dir, hybrid_cells, get_timeouts, ledger_path,
+                              result_cache):
+    """Hybrid 階段：先一次產生所有需要長度的過濾字典，再依 CSV 收集任務"""
+    wordlist_path = os.path.join(exam_dir, profile.get("wordlist", DEFAULT_WORDLIST))
+    if not os.path.exists(wordlist_path):
+        print(f"[SKIP] 找不到 Hybrid Attack 的字典：{wordlist_path}")
+        return []
+
+    lengths = set()
+    for csv_path, _, _, modes in hybrid_cells:
+        lengths.update(hybrid_word_lengths([csv_path], modes))
+    wordlists = length_wordlists(wordlist_path, sorted(lengths))
+
+    jobs = []
+    for csv_path, json_root_path, test_folder, modes in hybrid_cells:
+        print(f"[LOAD] {csv_path} (Hybrid: {', '.join(f'-a {m}' for m in modes)})")
+        jobs.extend(collect_hybrid_jobs(
+            csv_path, json_root_path, test_folder, get_timeouts, wordlists, modes,
+            ledger_path=ledger_path, round_name=round_name, result_cache=result_cache
+        ))
+    return jobs
+
+
+def run_round(round_name, exam_dir=EXAM_DIR, hashcat_exe_path=None, profile=None, **settings):
+    """
+    執行一個 round 的實驗矩陣 (Mask Attack，以及 attack_modes 含 6 / 7 時的 Hybrid Attack)
+    profile: 預設為 PROFILES[round_name]
+    settings: 覆寫 RUN_DEFAULTS 的項目
+    Returns: dict {job_id: 結果 dict 或 None}
+    """
+    unknown = set(settings) - set(RUN_DEFAULTS)
+    if unknown:
+        raise TypeError(f"未知的執行設定: {', '.join(sorted(unknown))}")
+    options = dict(RUN_DEFAULTS, **settings)
+    profile = profile or get_profile(round_name)
+    hashcat_exe_path = hashcat_exe_path or default_hashcat_exe(exam_dir)
+
+    # 每個任務的 hash 檔、potfile、outfile 放在各自的工作目錄
+    jobs_root = os.path.join(round_dir(round_name, exam_dir), JOB_ROOT_NAME)
+    # round1 / round2 共用的結果快取 (exam/result_cache)：相同 hash、mask、字符集、裝置與 Hashcat 版本的結果直接沿用
+    result_cache = {"dir": default_cache_dir(exam_dir), "reuse": not options["repeat_measurements"],
+                    "hashcat_version": hashcat_version(hashcat_exe_path)}
+
+    all_jobs = collect_round_jobs(round_name, profile, exam_dir, options["batch_mode"], result_cache,
+                                  options["attack_modes"])
+
+    # 1. 執行任務 (每個裝置一個 worker，從共用佇列取任務)
+    devices = select_devices(hashcat_exe_path, options["devices"])
+    if options["calibrate"]:
+        calibrate_devices(hashcat_exe_path, devices, default_cache_path(exam_dir), hash_modes=("100",),
+                          test_folders=list(mask_csvs(profile)))
+    # 預期時間短的任務先執行，長尾任務不會卡住整個實驗矩陣
+    all_jobs = plan_jobs(all_jobs, devices, options["timeout_multiple"], options["min_timeout"])
+
+    # 啟動前估計每個 cell 的裝置時數，超過預算的 cell 在這裡處理
+    print_cost_report(estimate_cells(all_jobs, profile_cells(profile, options["attack_modes"])), len(devices),
+                      options["cell_budget_hours"])
+    if not options["adaptive"]:
+        all_jobs = apply_budget(all_jobs, options["cell_budget_hours"], options["budget_action"])
+    if options["dry_run"]:
+        print(f"[MATRIX] dry run：不執行 {len(all_jobs)} 個任務")
+        return {}
+    all_jobs = shard_jobs(all_jobs, len(devices), options["shard_min_seconds"])
+    sampler = AdaptiveSampler(all_jobs, budget_hours=options["cell_budget_hours"]) if options["adaptive"] else None
+    if options["async_engine"]:
+        return run_jobs_async(all_jobs, devices, hashcat_exe_path, jobs_root, sampler=sampler)
+    return run_jobs_on_devices(all_jobs, devices, hashcat_exe_path, jobs_root, sampler=sampler)
+
+
+def generate_round(round_name, exam_dir=EXAM_DIR, profile=None):
+    """產生一個 round 的 mask_data CSV"""
+    generate_mask_csvs(profile or get_profile(round_name), round_dir(round_name, exam_dir))
+
+
+def sample_round(round_name, wordlist_path, exam_dir=EXAM_DIR, profile=None, per_file=PER_FILE):
+    """由外洩密碼清單分層抽樣，產生一個 round 的 data/ txt (reservoir.py)"""
+    return write_round_inputs(profile or get_profile(round_name), round_dir(round_name, exam_dir),
+                              wordlist_path, per_file)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "sample":
+        sample_round(sys.argv[2], sys.argv[3], per_file=int(sys.argv[4]) if len(sys.argv) > 4 else PER_FILE)
+        sys.exit(0)
+    if len(sys.argv) != 3 or sys.argv[1] not in ("run", "hybrid", "estimate", "generate"):
+        print("用法: python -m engine.experiment run|hybrid|estimate|generate <round>")
+        print("      python -m engine.experiment sample <round> <密碼清單> [每個 txt 的密碼數]")
+        sys.exit(1)
+    if sys.argv[1] == "hybrid":
+        run_round(sys.argv[2], attack_modes=list(HYBRID_MODES))
+    elif sys.argv[1] in ("run", "estimate"):
+        run_round(sys.argv[2], dry_run=sys.argv[1] == "estimate")
+    else:
+        generate_round(sys.argv[2])
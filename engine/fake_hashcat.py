@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fake_hashcat.py - Hashcat 模擬器 (runner 的吞吐量與正確性測試用)
+
+接受 run_m.py / final_test.py 傳入的參數 (-m, -a 3/0/6/7, --hex-charset -1,
+--status-json, --status-timer, --potfile-path, --outfile, --runtime ...)，以設定的模擬速度
+輸出格式與 Hashcat 相同的狀態 JSON，並在密碼實際的候選位置被「破解」，
+同時寫入 potfile / outfile。也支援 -b (benchmark)、-I、--version、--keyspace、
+-s/-l (以 base words 為單位) 與 --session / --restore (restore 檔為模擬器自己的 JSON 格式)。
+不需要 GPU，可在任何 Linux 機器上執行。
+
+模擬器無法真的反推 hash，因此需要一份明文清單 (oracle)：
+    FAKE_HASHCAT_PLAINS      明文清單檔案 (每行一個密碼)，用來對應 hash → 密碼
+    FAKE_HASHCAT_SPEED       模擬速度 H/s (預設 1e9)
+    FAKE_HASHCAT_TIME_SCALE  模擬時間倍率 (預設 1；600 表示 1 秒真實時間 = 10 分鐘模擬時間)
+    FAKE_HASHCAT_STARTUP     初始化 + autotune 的模擬秒數 (預設 2)
+    FAKE_HASHCAT_DEVICES     -I / -b 回報的裝置數量 (預設 1)
+    FAKE_HASHCAT_DEVICE_TYPE -I 回報的裝置類型 (預設 GPU)
+
+用法：把 runner 的 hashcat 路徑指向本檔 (需有執行權限)，例如
+    ln -s exam/engine/fake_hashcat.py hashcat.exe
+"""
+
+import hashlib
+import json
+import os
+import signal
+import sys
+import time
+
+# 以 realpath 解析 symlink (hashcat.exe → fake_hashcat.py)，才能找到 engine 套件
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from engine.hashgen import md4_hex  # noqa: E402
+from engine.keyspace import (  # noqa: E402
+    MaskEnumerator, default_hcstat2_path, expand_charset, load_hcstat2, mask_charsets,
+)
+
+VERSION = "v7.1.2-fake"
+
+HASH_NAMES = {"0": "MD5", "100": "SHA1", "1400": "SHA2-256", "1000": "NTLM"}
+
+HASH_FUNCS = {
+    "0": lambda p: hashlib.md5(p).hexdigest(),
+    "100": lambda p: hashlib.sha1(p).hexdigest(),
+    "1400": lambda p: hashlib.sha256(p).hexdigest(),
+    "1000": lambda p: md4_hex(p.decode("utf-8").encode("utf-16-le")),
+}
+
+# 需要值的參數
+VALUE_OPTS = {
+    "-m", "--hash-type", "-a", "--attack-mode", "-d", "--backend-devices", "-w", "--workload-profile",
+    "-1", "-2", "-3", "-4", "--custom-charset1", "--custom-charset2", "--custom-charset3", "--custom-charset4",
+    "--session", "--potfile-path", "-o", "--outfile", "--outfile-format", "--status-timer",
+    "-s", "--skip", "-l", "--limit", "--restore-file-path", "--markov-hcstat2", "--runtime",
+    "-t", "--markov-threshold",
+}
+ALIASES = {
+    "--hash-type": "-m", "--attack-mode": "-a", "--backend-devices": "-d", "--workload-profile": "-w",
+    "--custom-charset1": "-1", "--custom-charset2": "-2", "--custom-charset3": "-3", "--custom-charset4": "-4",
+    "-o": "--outfile", "--skip": "-s", "--limit": "-l", "--backend-info": "-I", "--benchmark": "-b",
+    "--optimized-kernel-enable": "-O", "--version": "-V", "--markov-threshold": "-t",
+}
+
+STATUS_AUTOTUNE, STATUS_RUNNING, STATUS_EXHAUSTED, STATUS_CRACKED, STATUS_ABORTED = 1, 3, 5, 6, 7
+STATUS_ABORTED_RUNTIME = 11
+
+
+def parse_args(argv):
+    """解析 Hashcat 風格的參數，回傳 (opts, positionals)"""
+    opts, positionals = {}, []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith("--") and "=" in arg:
+            key, value = arg.split("=", 1)
+            opts[ALIASES.get(key, key)] = value
+        elif arg in VALUE_OPTS and i + 1 < len(argv):
+            opts[ALIASES.get(arg, arg)] = argv[i + 1]
+            i += 1
+        elif arg.startswith("-") and len(arg) > 1 and not arg.startswith("?"):
+            opts[ALIASES.get(arg, arg)] = True
+        else:
+            positionals.append(arg)
+        i += 1
+    return opts, positionals
+
+
+def read_lines(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return [line.rstrip("\r\n") for line in f]
+
+
+class Attack:
+    """依攻擊模式計算 keyspace 與每個明文的候選位置 (mask 順序由 engine/keyspace.py 計算)"""
+
+    def __init__(self, mode, payloads, custom, tables=None, markov_threshold=0):
+        self.mode = mode
+        self.words = []
+        self.mask = None
+        if mode == 3:
+            self.mask = MaskEnumerator(mask_charsets(payloads[0], custom), tables, markov_threshold)
+        elif mode == 0:
+            self.words = read_lines(payloads[0])
+        elif mode == 6:
+            self.words = read_lines(payloads[0])
+            self.mask = MaskEnumerator(mask_charsets(payloads[1], custom), tables, markov_threshold, split=False)
+        elif mode == 7:
+            self.mask = MaskEnumerator(mask_charsets(payloads[0], custom), tables, markov_threshold, split=False)
+            self.words = read_lines(payloads[1])
+        self.word_index = {}
+        for i, w in enumerate(self.words):
+            self.word_index.setdefault(w, i)
+        self.mask_ks = self.mask.keyspace() if self.mask else 1
+
+    def keyspace(self):
+        if self.mode == 3:
+            return self.mask_ks
+        return len(self.words) * self.mask_ks
+
+    def base_keyspace(self):
+        """--keyspace 回報的值 (mask attack 為 base words 數量)"""
+        if self.mode == 3:
+            return self.mask.base_keyspace()
+        return len(self.words)
+
+    def index_of(self, plain):
+        if self.mode == 3:
+            return self.mask.index_of(plain)
+        if self.mode == 0:
+            return self.word_index.get(plain)
+        n = len(self.mask.charsets)
+        if len(plain) < n:
+            return None
+        # 基底為字典，mask 為內層迴圈
+        if self.mode == 6:
+            word, tail = plain[:len(plain) - n], plain[len(plain) - n:]
+        else:
+            tail, word = plain[:n], plain[n:]
+        w = self.word_index.get(word)
+        m = self.mask.index_of(tail)
+        if w is None or m is None:
+            return None
+        return w * self.mask_ks + m
+
+
+def print_backend_info(count, device_type):
+    print(f"hashcat ({VERSION}) starting in backend information mode\n")
+    print("OpenCL Info:")
+    print("============\n")
+    for i in range(1, count + 1):
+        print(f"Backend Device ID #{i}")
+        print(f"  Type...........: {device_type}")
+        print(f"  Vendor.ID......: 0")
+        print(f"  Vendor.........: Fake Vendor")
+        print(f"  Name...........: Fake {device_type} #{i}")
+        print(f"  Driver.Version.: 1.0-fake")
+        print()
+
+
+def format_speed(speed):
+    for unit, scale in (("GH/s", 1e9), ("MH/s", 1e6), ("kH/s", 1e3)):
+        if speed >= scale:
+            return f"{speed / scale:.1f} {unit}"
+    return f"{speed:.0f} H/s"
+
+
+def print_benchmark(hash_modes, device_ids, speed):
+    print(f"hashcat ({VERSION}) starting in benchmark mode\n")
+    for i in device_ids:
+        print(f"* Device #{i}: Fake GPU #{i}")
+    print()
+    for mode in hash_modes:
+        print("-" * 19)
+        print(f"* Hash-Mode {mode} ({HASH_NAMES[mode]})")
+        print("-" * 19)
+        print()
+        for i in device_ids:
+            print(f"Speed.#{i}.........: {format_speed(speed)} (54.35ms) @ Accel:64 Loops:1024 Thr:512 Vec:1")
+        if len(device_ids) > 1:
+            print(f"Speed.#*.........: {format_speed(speed * len(device_ids))}")
+        print()
+    print(f"Started: {time.ctime()}")
+    print(f"Stopped: {time.ctime()}")
+
+
+def main():
+    argv = sys.argv[1:]
+    opts, positionals = parse_args(argv)
+
+    # --restore：由 restore 檔還原原始參數與進度 (模擬器的 restore 檔為 JSON)
+    restore_point = 0
+    if opts.get("--restore"):
+        restore_path = opts.get("--restore-file-path") or f"{opts.get('--session', 'hashcat')}.restore"
+        if not os.path.exists(restore_path):
+            print(f"{restore_path}: No such file or directory")
+            return 255
+        with open(restore_path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        argv, restore_point = saved["argv"], saved["restore_point"]
+        opts, positionals = parse_args(argv)
+
+    if opts.get("-V"):
+        print(VERSION)
+        return 0
+
+    if opts.get("-I"):
+        print_backend_info(int(os.environ.get("FAKE_HASHCAT_DEVICES", "1")),
+                           os.environ.get("FAKE_HASHCAT_DEVICE_TYPE", "GPU"))
+        return 0
+
+    if opts.get("-b"):
+        modes = [str(opts["-m"])] if "-m" in opts else list(HASH_FUNCS)
+        if any(m not in HASH_FUNCS for m in modes):
+            print(f"Hash-mode {modes[0]} is not supported by the emulator.")
+            return 255
+        if "-d" in opts:
+            device_ids = [int(x) for x in str(opts["-d"]).split(",")]
+        else:
+            device_ids = list(range(1, int(os.environ.get("FAKE_HASHCAT_DEVICES", "1")) + 1))
+        print_benchmark(modes, device_ids, float(os.environ.get("FAKE_HASHCAT_SPEED", "1e9")))
+        return 0
+
+    hash_mode = str(opts.get("-m", "0"))
+    attack_mode = int(opts.get("-a", "0"))
+    hash_func = HASH_FUNCS.get(hash_mode)
+    if hash_func is None:
+        print(f"Hash-mode {hash_mode} is not supported by the emulator.")
+        return 255
+    if not positionals:
+        print("Usage: hashcat [options]... hash|hashfile [dictionary|mask|directory]...")
+        return 255
+
+    hex_charset = bool(opts.get("--hex-charset"))
+    custom = {}
+    for n in "1234":
+        if f"-{n}" in opts:
+            custom[n] = expand_charset(opts[f"-{n}"], custom, hex_charset)
+
+    # 字元順序：--markov-disable 為 byte 值順序，否則使用 hcstat2 統計表 (找不到時同 --markov-disable)
+    tables = None
+    if not opts.get("--markov-disable"):
+        hcstat2_path = opts.get("--markov-hcstat2") or default_hcstat2_path(os.path.abspath(sys.argv[0]))
+        if os.path.exists(hcstat2_path):
+            tables = load_hcstat2(hcstat2_path)
+
+    hash_arg, payloads = positionals[0], positionals[1:]
+    attack = Attack(attack_mode, payloads, custom, tables, int(opts.get("-t", 0)))
+
+    if opts.get("--keyspace"):
+        print(attack.base_keyspace())
+        return 0
+
+    if os.path.isfile(hash_arg):
+        targets = [line.strip().lower() for line in read_lines(hash_arg) if line.strip()]
+    else:
+        targets = [hash_arg.lower()]
+    targets = list(dict.fromkeys(targets))
+
+    potfile = opts.get("--potfile-path") or "hashcat.potfile"
+    outfile = opts.get("--outfile")
+    out_format = [int(x) for x in str(opts.get("--outfile-format", "1,2")).split(",") if x.strip()]
+    session = opts.get("--session", "hashcat")
+    restore_path = opts.get("--restore-file-path") or f"{session}.restore"
+    device_id = int(str(opts.get("-d", "1")).split(",")[0])
+
+    speed = float(os.environ.get("FAKE_HASHCAT_SPEED", "1e9"))
+    scale = float(os.environ.get("FAKE_HASHCAT_TIME_SCALE", "1"))
+    startup = float(os.environ.get("FAKE_HASHCAT_STARTUP", "2"))
+    status_timer = float(opts.get("--status-timer", 10))
+    runtime = float(opts.get("--runtime", 0))
+    show_status = bool(opts.get("--status"))
+    status_json = bool(opts.get("--status-json"))
+
+    # 已在 potfile 中的 hash 直接視為已破解
+    already = set()
+    if not opts.get("--potfile-disable") and os.path.exists(potfile):
+        for line in read_lines(potfile):
+            already.add(line.split(":", 1)[0].lower())
+    remaining = [h for h in targets if h not in already]
+
+    # 以明文清單對應 hash → 密碼，並計算每個密碼的候選位置
+    oracle = {}
+    plains_path = os.environ.get("FAKE_HASHCAT_PLAINS")
+    if plains_path and os.path.exists(plains_path):
+        wanted = set(remaining)
+        for plain in read_lines(plains_path):
+            h = hash_func(plain.encode("utf-8"))
+            if h in wanted:
+                oracle[h] = plain
+    # -s/--skip、-l/--limit 以 base words 為單位，只處理 [lo, hi) 的候選密碼；進度以此範圍計算
+    keyspace = attack.keyspace()
+    unit = keyspace // max(1, attack.base_keyspace())
+    lo = int(opts.get("-s", 0)) * unit
+    hi = min(keyspace, lo + int(opts["-l"]) * unit) if "-l" in opts else keyspace
+    span = max(0, hi - lo)
+    crack_at = {}  # hash -> 候選位置 (整個 keyspace 中的位置)
+    for h, plain in oracle.items():
+        idx = attack.index_of(plain)
+        if idx is not None and lo <= idx < hi:
+            crack_at[h] = idx
+
+    print(f"hashcat ({VERSION}) starting\n")
+    print(f"Hashes: {len(targets)} digests; {len(targets)} unique digests, 1 unique salts")
+    print(f"Session..........: {session}")
+    sys.stdout.flush()
+
+    if not remaining:
+        print("INFO: All hashes found as potfile and/or empty entries! Use --show to display them.")
+        return 0
+
+    aborted = {"flag": False}
+
+    def on_signal(signum, frame):
+        aborted["flag"] = True
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    real_start = time.monotonic()
+    time_start = int(time.time())
+    cracked = {}
+
+    def sim_now():
+        return (time.monotonic() - real_start) * scale
+
+    def progress_at(t):
+        return int(min(span, restore_point + max(0.0, t - startup) * speed))
+
+    def crack_time(idx):
+        return startup + (idx - lo + 1 - restore_point) / speed
+
+    def write_restore(done):
+        if opts.get("--restore-disable"):
+            return
+        with open(restore_path, "w", encoding="utf-8") as f:
+            json.dump({"argv": argv, "restore_point": done}, f)
+
+    def emit_status(status_code, t):
+        done = progress_at(t)
+        if status_code == STATUS_EXHAUSTED:
+            done = span
+        left = (span - done) / speed if speed > 0 else 0
+        frame = {
+            "session": session,
+            "guess": {
+                "guess_base": payloads[0] if payloads else "",
+                "guess_base_count": 1,
+                "guess_base_offset": 0,
+                "guess_base_percent": round(100.0 * done / span, 2) if span else 100.0,
+                "guess_mod_count": 1,
+                "guess_mod_offset": 0,
+                "guess_mod_percent": 100.0,
+                "guess_mode": attack_mode,
+            },
+            "status": status_code,
+            "target": hash_arg,
+            "progress": [done, span],
+            "restore_point": done,
+            "recovered_hashes": [len(cracked) + len(already), len(targets)],
+            "recovered_salts": [0, 1],
+            "rejected": 0,
+            "devices": [{
+                "device_id": device_id,
+                "device_name": f"Fake GPU #{device_id}",
+                "device_type": "GPU",
+                "speed": int(speed) if status_code == STATUS_RUNNING else 0,
+                "temp": 60,
+                "util": 100,
+            }],
+            "time_start": time_start,
+            "estimated_stop": int(time.time() + left / scale),
+        }
+        if status_code in (STATUS_RUNNING, STATUS_ABORTED, STATUS_ABORTED_RUNTIME):
+            write_restore(done)
+        if status_json:
+            print(json.dumps(frame, separators=(",", ":")))
+        else:
+            print(f"Status...........: {status_code}")
+            print(f"Progress.........: {done}/{span}")
+        sys.stdout.flush()
+
+    def record_crack(h):
+        plain = oracle[h]
+        cracked[h] = plain
+        if not opts.get("--potfile-disable"):
+            with open(potfile, "a", encoding="utf-8") as f:
+                f.write(f"{h}:{plain}\n")
+        fields = {
+            1: h,
+            2: plain,
+            3: plain.encode("utf-8").hex(),
+            4: str(crack_at[h] + 1),
+            5: str(int(time.time())),
+            6: str(int(time.time()) - time_start),
+        }
+        line = ":".join(fields[i] for i in out_format if i in fields)
+        if outfile:
+            with open(outfile, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        else:
+            print(line)
+        sys.stdout.flush()
+
+    # 續跑時，restore_point 之前的候選密碼已在上一次執行處理過
+    pending = sorted([kv for kv in crack_at.items() if kv[1] - lo >= restore_point], key=lambda kv: kv[1])
+    exhaust_time = startup + (span - restore_point) / speed if speed > 0 else float("inf")
+    next_status = status_timer
+
+    final_status, exit_code = STATUS_EXHAUSTED, 1
+    while True:
+        events = [exhaust_time]
+        if runtime:
+            events.append(runtime)
+        if pending:
+            events.append(crack_time(pending[0][1]))
+        if show_status:
+            events.append(next_status)
+        target_time = min(events)
+
+        while not aborted["flag"]:
+            delay = (target_time - sim_now()) / scale
+            if delay <= 0:
+                break
+            time.sleep(min(delay, 0.05))
+
+        if aborted["flag"]:
+            final_status, exit_code = STATUS_ABORTED, 2
+            break
+
+        now = sim_now()
+        while pending and crack_time(pending[0][1]) <= now:
+            record_crack(pending.pop(0)[0])
+
+        if len(cracked) == len(remaining):
+            final_status, exit_code = STATUS_CRACKED, 0
+            break
+        if now >= exhaust_time:
+            break
+        if runtime and now >= runtime:
+            final_status, exit_code = STATUS_ABORTED_RUNTIME, 4
+            break
+        if show_status and now >= next_status:
+            emit_status(STATUS_RUNNING if now >= startup else STATUS_AUTOTUNE, now)
+            while next_status <= now:
+                next_status += status_timer
+
+    if show_status:
+        emit_status(final_status, sim_now())
+    if final_status in (STATUS_ABORTED, STATUS_ABORTED_RUNTIME):
+        write_restore(progress_at(sim_now()))
+    elif os.path.exists(restore_path):
+        # 正常結束 (破解或窮舉) 時 Hashcat 會刪除 restore 檔
+        os.remove(restore_path)
+    print()
+    print(f"Started: {time.ctime(time_start)}")
+    print(f"Stopped: {time.ctime()}")
+    sys.stdout.flush()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+genmask.py - 從 data 目錄的 txt 檔案讀取密碼，轉換成 SHA-1 hash 和 mask，輸出為 CSV
+(原本位於 round1/gen_mask.py 與 round2/gen_mask.py 的重複程式碼，
+round 之間的差異 — 特殊字元、隨機種子、抽樣數 — 由 profiles.py 提供)
+"""
+
+import hashlib
+import os
+import random
+
+from engine.csvstream import CHUNK_ROWS, ChunkedCsvWriter, build_manifest, check_manifest, read_manifest
+from engine.matrix import mask_sources
+from engine.structure import password_masks
+
+
+def generate_sha1(password):
+    """生成密碼的 SHA-1 hash (hashcat mode 100)"""
+    return hashlib.sha1(password.encode('utf-8')).hexdigest()
+
+
+def generate_mask_for_password(password, special_chars):
+    """根據密碼生成對應的 mask (單一密碼；整個檔案使用 structure.password_masks)"""
+    mask = ""
+    for char in password:
+        if char.isupper():
+            mask += "?u"
+        elif char.islower():
+            mask += "?l"
+        elif char.isdigit():
+            mask += "?d"
+        elif char in special_chars:
+            mask += "?s"  # 使用標準特殊字符，由 runner.build_hashcat_command 負責替換為 ?1
+        else:
+            mask += "?a"  # 其他字元
+    return mask
+
+
+def read_passwords_from_txt(txt_file):
+    """從 txt 檔案讀取密碼"""
+    passwords = []
+    with open(txt_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            pwd = line.strip()
+            if pwd:
+                passwords.append(pwd)
+    return passwords
+
+
+def check_csv_valid(csv_file, expected_length, special_chars, expected_special_count=None):
+    """
+    檢查 CSV 是否存在且內容符合條件：比對 csvstream 的 manifest (不重新讀取 CSV)；
+    沒有 manifest 或 CSV 已改變時，串流讀取一次重建 manifest
+    """
+    if not os.path.exists(csv_file):
+        return False
+
+    try:
+        manifest = read_manifest(csv_file)
+        if manifest is None or (expected_special_count is not None and manifest["special_chars"] != special_chars):
+            manifest = build_manifest(csv_file, special_chars)
+        return check_manifest(manifest, expected_length, special_chars, expected_special_count)
+    except Exception as e:
+        print(f"  [WARNING] 檢查 {os.path.basename(csv_file)} 時出錯: {e}")
+        return False
+
+
+def generate_mask_csvs(profile, round_dir):
+    """
+    依 profile 的實驗矩陣 (matrix.mask_sources) 產生 <round>/<test_folder>/result/mask_data/*.csv
+    已存在且內容有效的 CSV 不覆寫 (抽樣仍會執行，確保後續檔案的隨機結果一致)
+    """
+    special_chars = profile["special_chars"]
+    print(f"[工作目錄] {round_dir}")
+    print("="*60)
+    print("開始處理密碼轉換")
+    print("="*60)
+
+    # 設定固定隨機種子，確保每次執行結果一致
+    random.seed(profile["seed"])
+    print(f"\n[資料一致性保護] 已設定固定隨機種子 (seed={profile['seed']})")
+
+    sources_by_folder = mask_sources(profile)
+    for test_folder, sources in sources_by_folder.items():
+        print(f"\n[{test_folder}] 處理密碼...")
+        data_dir = os.path.join(round_dir, test_folder, "data")
+        mask_dir = os.path.join(round_dir, test_folder, "result", "mask_data")
+        os.makedirs(mask_dir, exist_ok=True)
+
+        for txt_name, csv_name, length, special_count, sample in sources:
+            txt_file = os.path.join(data_dir, txt_name)
+            if not os.path.exists(txt_file):
+                print(f"  ⚠ 找不到: {txt_name}")
+                continue
+
+            passwords = read_passwords_from_txt(txt_file)
+            total = len(passwords)
+            if sample is not None and total > sample:
+                passwords = random.sample(passwords, sample)
+                print(f"\n  處理: {txt_name} (隨機抽取 {len(passwords)}/{total} 個密碼)")
+            else:
+                print(f"\n  處理: {txt_name} ({len(passwords)} 個密碼)")
+
+            # 寫入 CSV（智慧跳過；逐塊產生 hash 與 mask 並寫出，同時記錄 manifest）
+            csv_file = os.path.join(mask_dir, csv_name)
+            if check_csv_valid(csv_file, length, special_chars, special_count):
+                print(f"  [SKIP] {csv_name} 已存在且有效，跳過生成")
+            else:
+                with ChunkedCsvWriter(csv_file, ["password", "hashvalue", "mask"], special_chars) as writer:
+                    for start in range(0, len(passwords), CHUNK_ROWS):
+                        chunk = passwords[start:start + CHUNK_ROWS]
+                        writer.write_rows(zip(chunk, map(generate_sha1, chunk), password_masks(chunk, special_chars)))
+                print(f"  ✓ 生成: {csv_name} ({len(passwords)} 行)")
+            # 顯示前3個樣本
+            for i, (pwd, mask) in enumerate(zip(passwords[:3], password_masks(passwords[:3], special_chars)), 1):
+                print(f"     {i}. {pwd} → {mask}")
+
+    print("\n" + "="*60)
+    print("✓ 完成！所有密碼已轉換為 CSV")
+    print(f"\n輸出位置:")
+    for i, test_folder in enumerate(sources_by_folder, 1):
+        print(f"  {i}. {os.path.join(round_dir, test_folder, 'result', 'mask_data')}")
+    print("="*60)
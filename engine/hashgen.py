@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+hashgen.py - 大量密碼的多種 hash 產生 (process pool 分塊平行處理)
+
+genmask.generate_sha1 / round2/convert.py 的 converthash 一次一個密碼、只有 SHA-1 (-m 100)；
+本模組逐塊讀取密碼來源 (每行一個密碼，同 genmask.read_passwords_from_txt 略過空行)，
+每塊交給一個 worker process 計算所有指定模式的 hash，主程序依原本順序直接寫出：
+    <output_dir>/<來源名稱>.m<mode>.csv   password, hashvalue[, salt][, mask]
+    <output_dir>/<來源名稱>.m<mode>.hash  Hashcat 的 hash 檔 (加鹽模式為 hash:salt)
+CSV 的格式與 mask_data 相同 (utf-8-sig)，指定 special_chars 時多一欄 mask (structure.password_masks)。
+
+加鹽模式的 salt 每列不同，由 seed 與列號決定 (與分塊方式、worker 數無關，重跑結果相同)，
+同一列的各加鹽模式使用同一個 salt。
+
+NTLM (-m 1000) 為 MD4(UTF-16LE)；OpenSSL 3 預設不提供 MD4 時改用本模組的實作
+(整塊以 NumPy 陣列計算，超過一個 block 的長密碼逐一以純 Python 計算)。
+"""
+
+import csv
+import hashlib
+import io
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from engine.structure import password_masks
+
+# 每塊的密碼數
+CHUNK_LINES = 100_000
+# 加鹽模式的 salt 長度 (hex 字元)
+SALT_LENGTH = 8
+SALT_SEED = 42
+
+
+def _md4_python(data):
+    """MD4 (RFC 1320)"""
+    def rotl(x, n):
+        return ((x << n) | (x >> (32 - n))) & 0xFFFFFFFF
+
+    message = data + b"\x80" + b"\0" * ((55 - len(data)) % 64) + struct.pack("<Q", len(data) * 8)
+    h = [0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476]
+    for offset in range(0, len(message), 64):
+        x = struct.unpack("<16I", message[offset:offset + 64])
+        a, b, c, d = h
+        for k in range(16):
+            s = (3, 7, 11, 19)[k % 4]
+            a, b, c, d = d, rotl((a + ((b & c) | (~b & d)) + x[k]) & 0xFFFFFFFF, s), b, c
+        for i, k in enumerate((0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15)):
+            s = (3, 5, 9, 13)[i % 4]
+            a, b, c, d = d, rotl((a + ((b & c) | (b & d) | (c & d)) + x[k] + 0x5A827999) & 0xFFFFFFFF, s), b, c
+        for i, k in enumerate((0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15)):
+            s = (3, 9, 11, 15)[i % 4]
+            a, b, c, d = d, rotl((a + (b ^ c ^ d) + x[k] + 0x6ED9EBA1) & 0xFFFFFFFF, s), b, c
+        h = [(v + w) & 0xFFFFFFFF for v, w in zip(h, (a, b, c, d))]
+    return struct.pack("<4I", *h).hex()
+
+
+def _md4_openssl(data):
+    return hashlib.new("md4", data).hexdigest()
+
+
+try:
+    hashlib.new("md4", b"")
+    md4_hex = _md4_openssl
+except ValueError:
+    md4_hex = _md4_python
+
+
+def _rotl(x, n):
+    return (x << np.uint32(n)) | (x >> np.uint32(32 - n))
+
+
+def md4_batch(messages):
+    """
+    一次計算多個 MD4 (沒有 OpenSSL MD4 時使用)：不超過 55 位元組 (只有一個 block) 的訊息
+    組成 (n, 16) 的 uint32 陣列，48 個步驟對整欄計算；較長的訊息逐一以 _md4_python 計算
+    Returns: hex 列表
+    """
+    if md4_hex is _md4_openssl:
+        return [md4_hex(m) for m in messages]
+    single = [i for i, m in enumerate(messages) if len(m) <= 55]
+    result = [None] * len(messages)
+    if single:
+        blocks = b"".join(messages[i] + b"\x80" + bytes(55 - len(messages[i])) + struct.pack("<Q", 8 * len(messages[i]))
+                          for i in single)
+        x = np.frombuffer(blocks, dtype="<u4").reshape(len(single), 16).T.astype(np.uint32)
+        h = [np.full(len(single), v, dtype=np.uint32) for v in (0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476)]
+        a, b, c, d = h
+        with np.errstate(over="ignore"):
+            for k in range(16):
+                a, b, c, d = d, _rotl(a + ((b & c) | (~b & d)) + x[k], (3, 7, 11, 19)[k % 4]), b, c
+            for i, k in enumerate((0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15)):
+                a, b, c, d = d, _rotl(a + ((b & c) | (b & d) | (c & d)) + x[k] + np.uint32(0x5A827999),
+                                      (3, 5, 9, 13)[i % 4]), b, c
+            for i, k in enumerate((0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15)):
+                a, b, c, d = d, _rotl(a + (b ^ c ^ d) + x[k] + np.uint32(0x6ED9EBA1), (3, 9, 11, 15)[i % 4]), b, c
+            digest = np.stack([v + w for v, w in zip(h, (a, b, c, d))], axis=1).astype("<u4").tobytes().hex()
+        for j, i in enumerate(single):
+            result[i] = digest[32 * j:32 * (j + 1)]
+    for i, m in enumerate(messages):
+        if result[i] is None:
+            result[i] = _md4_python(m)
+    return result
+
+
+def ntlm(password):
+    """NTLM (-m 1000)：MD4(UTF-16LE)"""
+    return md4_hex(password.encode("utf-16-le"))
+
+
+def ntlm_batch(passwords):
+    return md4_batch([p.encode("utf-16-le") for p in passwords])
+
+
+# Hashcat 模式 → (名稱, 是否加鹽, hash 函式 (password, salt) → hex)
+HASH_MODES = {
+    "0": ("MD5", False, lambda p, s: hashlib.md5(p.encode("utf-8")).hexdigest()),
+    "100": ("SHA1", False, lambda p, s: hashlib.sha1(p.encode("utf-8")).hexdigest()),
+    "1400": ("SHA2-256", False, lambda p, s: hashlib.sha256(p.encode("utf-8")).hexdigest()),
+    "1000": ("NTLM", False, lambda p, s: ntlm(p)),
+    "10": ("md5($pass.$salt)", True, lambda p, s: hashlib.md5((p + s).encode("utf-8")).hexdigest()),
+    "20": ("md5($salt.$pass)", True, lambda p, s: hashlib.md5((s + p).encode("utf-8")).hexdigest()),
+    "110": ("sha1($pass.$salt)", True, lambda p, s: hashlib.sha1((p + s).encode("utf-8")).hexdigest()),
+    "120": ("sha1($salt.$pass)", True, lambda p, s: hashlib.sha1((s + p).encode("utf-8")).hexdigest()),
+    "1410": ("sha256($pass.$salt)", True, lambda p, s: hashlib.sha256((p + s).encode("utf-8")).hexdigest()),
+    "1420": ("sha256($salt.$pass)", True, lambda p, s: hashlib.sha256((s + p).encode("utf-8")).hexdigest()),
+}
+
+
+def row_salt(seed, row, length=SALT_LENGTH):
+    """第 row 列 (0 起算) 的 salt (hex)"""
+    return hashlib.sha256(f"{seed}:{row}".encode("ascii")).hexdigest()[:length]
+
+
+def hash_chunk(passwords, row_offset, modes, salt_length=SALT_LENGTH, seed=SALT_SEED, special_chars=None):
+    """
+    worker：計算一塊密碼的所有模式
+    Returns: dict {模式: (CSV 文字, hash 檔文字)}
+    """
+    modes = [str(m) for m in modes]
+    salts = None
+    if any(HASH_MODES[m][1] for m in modes):
+        salts = [row_salt(seed, row_offset + i, salt_length) for i in range(len(passwords))]
+    masks = password_masks(passwords, special_chars) if special_chars is not None else None
+
+    output = {}
+    for mode in modes:
+        _, salted, func = HASH_MODES[mode]
+        if mode == "1000":
+            hashes = ntlm_batch(passwords)
+        elif salted:
+            hashes = [func(p, s) for p, s in zip(passwords, salts)]
+        else:
+            hashes = [func(p, None) for p in passwords]
+        if salted:
+            lines = [f"{h}:{s}\n" for h, s in zip(hashes, salts)]
+        else:
+            lines = [h + "\n" for h in hashes]
+        columns = [passwords, hashes] + ([salts] if salted else []) + ([masks] if masks is not None else [])
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(zip(*columns))
+        output[mode] = (buffer.getvalue(), "".join(lines))
+    return output
+
+
+def read_password_chunks(source_path, chunk_lines=CHUNK_LINES):
+    """逐塊讀取密碼來源 (strip、略過空行)；Yields: (第一列的列號, 密碼列表)"""
+    row = 0
+    chunk = []
+    with open(source_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            pwd = line.strip()
+            if pwd:
+                chunk.append(pwd)
+                if len(chunk) >= chunk_lines:
+                    yield row, chunk
+                    row += len(chunk)
+                    chunk = []
+    if chunk:
+        yield row, chunk
+
+
+def output_paths(source_path, output_dir, mode):
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    base = os.path.join(output_dir, f"{stem}.m{mode}")
+    return base + ".csv", base + ".hash"
+
+
+def generate_hash_files(source_path, output_dir, modes=("100",), workers=None, chunk_lines=CHUNK_LINES,
+                        salt_length=SALT_LENGTH, seed=SALT_SEED, special_chars=None):
+    """
+    將密碼來源轉為各模式的 CSV 與 hash 檔 (先寫到 .tmp，完成後才取代)
+    workers: process 數，None 為 CPU 數；1 表示不使用 process pool
+    Returns: dict {模式: (CSV 路徑, hash 檔路徑)}
+    """
+    modes = [str(m) for m in modes]
+    unknown = [m for m in modes if m not in HASH_MODES]
+    if unknown:
+        raise ValueError(f"不支援的 hash 模式: {', '.join(unknown)} (支援: {', '.join(HASH_MODES)})")
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = {m: output_paths(source_path, output_dir, m) for m in modes}
+    csv_files, hash_files = {}, {}
+    rows = 0
+    try:
+        for mode in modes:
+            header = ["password", "hashvalue"] + (["salt"] if HASH_MODES[mode][1] else []) + \
+                     (["mask"] if special_chars is not None else [])
+            csv_files[mode] = open(paths[mode][0] + ".tmp", "w", encoding="utf-8-sig", newline="")
+            csv.writer(csv_files[mode], lineterminator="\n").writerow(header)
+            hash_files[mode] = open(paths[mode][1] + ".tmp", "w", encoding="utf-8", newline="")
+
+        def write(output):
+            for mode, (csv_text, hash_text) in output.items():
+                csv_files[mode].write(csv_text)
+                hash_files[mode].write(hash_text)
+
+        args = (modes, salt_length, seed, special_chars)
+        chunks = read_password_chunks(source_path, chunk_lines)
+        if workers == 1:
+            for row_offset, passwords in chunks:
+                write(hash_chunk(passwords, row_offset, *args))
+                rows += len(passwords)
+        else:
+            # 同時最多 2 × workers 塊在處理中，依送出順序寫出 (輸出順序與來源相同)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = []
+                for row_offset, passwords in chunks:
+                    pending.append((len(passwords), pool.submit(hash_chunk, passwords, row_offset, *args)))
+                    if len(pending) >= 2 * workers:
+                        count, future = pending.pop(0)
+                        write(future.result())
+                        rows += count
+                for count, future in pending:
+                    write(future.result())
+                    rows += count
+    except BaseException:
+        # 失敗時不留下未完成的 .tmp (與 ChunkedCsvWriter.abort 相同)
+        for f in list(csv_files.values()) + list(hash_files.values()):
+            f.close()
+        for mode in modes:
+            for path in paths[mode]:
+                if os.path.exists(path + ".tmp"):
+                    os.remove(path + ".tmp")
+        raise
+    finally:
+        for f in list(csv_files.values()) + list(hash_files.values()):
+            f.close()
+
+    for mode in modes:
+        for path in paths[mode]:
+            os.replace(path + ".tmp", path)
+        print(f"[HASHGEN] -m {mode} ({HASH_MODES[mode][0]}): {rows:,} 列 → {paths[mode][0]}")
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("用法: python -m engine.hashgen <密碼 txt> <輸出目錄> [模式,...] [workers]")
+        print(f"      模式: {', '.join(f'{m} ({name})' for m, (name, _, _) in HASH_MODES.items())}")
+        sys.exit(1)
+    generate_hash_files(
+        sys.argv[1], sys.argv[2],
+        modes=sys.argv[3].split(",") if len(sys.argv) > 3 else ("100",),
+        workers=int(sys.argv[4]) if len(sys.argv) > 4 else None,
+    )
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+hybrid.py - Hybrid Attack (-a 6 / -a 7)：依密碼結構拆成字典詞與 mask，字典依詞長預先過濾
+
+以 CSV 的 mask 欄 (genmask.generate_mask_for_password) 拆出字母段 (?l / ?u) 與其餘部分：
+    開頭的字母段 → -a 6 (字典 + mask)，例: dragon86 → 6 碼的詞 + ?d?d
+    結尾的字母段 → -a 7 (mask + 字典)，例: 86dragon → ?d?d + 6 碼的詞
+兩端都是字母時取較長的一段 (相同時為 -a 6)；字母段短於 MIN_WORD_LENGTH、
+整個密碼都是字母 (屬於 Dictionary Attack) 或兩端都不是字母的列不產生任務。
+
+Hybrid Attack 只會用到長度等於字母段的詞，因此字典先依長度過濾
+(長度以位元組計，與 Hashcat 相同)，快取在字典旁的 by_length/<字典名稱>.len<L>.txt；
+來源字典的大小或修改時間改變時重建。缺少的長度一次掃描來源字典全部產生。
+任務的 keyspace = 該長度的詞數 × mask 的 keyspace (而非整個字典 × mask)。
+
+結果 JSON 放在 result_json/3_hybrid/<csv>/<csv>-<row>.json，任務帳本的 attack_mode 為 6 或 7。
+Hybrid 任務不使用批次模式與 keyspace 切片；校正速度是 Mask Attack 的速度，
+不適用於 Hybrid Attack，因此時間上限維持 profile 的 dict_timeout。
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from engine.keyspace import enumerator_for_mask
+from engine.ledger import STATE_CRACKED, STATE_RUNNING, load_states, sync_rows
+from engine.runner import is_cracked_result
+from engine.session import read_resume_state
+from engine.statuslog import write_json_atomic
+
+HYBRID_MODES = (6, 7)
+HYBRID_SUBDIR = "3_hybrid"
+LENGTH_CACHE_DIR = "by_length"
+
+# 字母段至少的長度 (1、2 個字母不是字典詞)
+MIN_WORD_LENGTH = 3
+
+LETTER_TOKENS = ("?l", "?u")
+
+
+def mask_tokens(mask):
+    return [mask[i:i + 2] for i in range(0, len(mask), 2)]
+
+
+def split_hybrid_mask(mask, attack_modes=HYBRID_MODES):
+    """
+    將密碼的 mask 拆成字典詞與 hybrid mask
+    attack_modes: 允許的模式 (6 / 7)
+    Returns: (攻擊模式, 詞長, hybrid mask) 或 None (不適用 Hybrid Attack)
+    """
+    tokens = mask_tokens(mask)
+    lead = 0
+    while lead < len(tokens) and tokens[lead] in LETTER_TOKENS:
+        lead += 1
+    if lead == len(tokens):
+        return None
+    trail = 0
+    while tokens[len(tokens) - 1 - trail] in LETTER_TOKENS:
+        trail += 1
+
+    candidates = []
+    if 6 in attack_modes and lead >= MIN_WORD_LENGTH:
+        candidates.append((lead, 6, "".join(tokens[lead:])))
+    if 7 in attack_modes and trail >= MIN_WORD_LENGTH:
+        candidates.append((trail, 7, "".join(tokens[:len(tokens) - trail])))
+    if not candidates:
+        return None
+    word_length, mode, hybrid_mask = max(candidates, key=lambda c: (c[0], -c[1]))
+    return mode, word_length, hybrid_mask
+
+
+def length_cache_dir(wordlist_path):
+    return os.path.join(os.path.dirname(os.path.abspath(wordlist_path)), LENGTH_CACHE_DIR)
+
+
+def _source_stat(wordlist_path):
+    stat = os.stat(wordlist_path)
+    return {"source": os.path.abspath(wordlist_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def length_wordlists(wordlist_path, lengths, cache_dir=None):
+    """
+    取得依長度過濾的字典 (不存在或來源字典已改變時建立)
+    Returns: dict {長度: {"path", "count", "sha256"}}
+    """
+    cache_dir = cache_dir or length_cache_dir(wordlist_path)
+    stem = os.path.splitext(os.path.basename(wordlist_path))[0]
+    manifest_path = os.path.join(cache_dir, f"{stem}.lengths.json")
+
+    manifest = None
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] 讀取字典長度快取失敗: {manifest_path} ({e})")
+    source = _source_stat(wordlist_path)
+    if manifest is None or any(manifest.get(k) != v for k, v in source.items()):
+        manifest = dict(source, lengths={})
+
+    entries = manifest["lengths"]
+    missing = sorted({int(n) for n in lengths} - {int(n) for n in entries
+                                                  if os.path.exists(os.path.join(cache_dir, entries[n]["path"]))})
+    if missing:
+        os.makedirs(cache_dir, exist_ok=True)
+        print(f"[HYBRID] 過濾字典 {wordlist_path} (長度 {', '.join(map(str, missing))})")
+        names = {n: f"{stem}.len{n}.txt" for n in missing}
+        tmp_paths = {n: os.path.join(cache_dir, names[n] + ".tmp") for n in missing}
+        outputs = {}
+        digests = {n: hashlib.sha256() for n in missing}
+        counts = dict.fromkeys(missing, 0)
+        try:
+            for n in missing:
+                outputs[n] = open(tmp_paths[n], "wb")
+            with open(wordlist_path, "rb") as f:
+                for line in f:
+                    word = line.rstrip(b"\r\n")
+                    n = len(word)
+                    if n in outputs:
+                        outputs[n].write(word + b"\n")
+                        digests[n].update(word + b"\n")
+                        counts[n] += 1
+        except BaseException:
+            # 失敗時不留下未完成的 .tmp
+            for out in outputs.values():
+                out.close()
+            for path in tmp_paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        finally:
+            for out in outputs.values():
+                out.close()
+        for n in missing:
+            os.replace(tmp_paths[n], os.path.join(cache_dir, names[n]))
+            entries[str(n)] = {"path": names[n], "count": counts[n], "sha256": digests[n].hexdigest()}
+            print(f"[HYBRID]   長度 {n}: {counts[n]:,} 個詞")
+        write_json_atomic(manifest_path, manifest)
+
+    return {
+        int(n): dict(entries[str(n)], path=os.path.join(cache_dir, entries[str(n)]["path"]))
+        for n in lengths
+    }
+
+
+def hybrid_word_lengths(csv_paths, attack_modes=HYBRID_MODES):
+    """CSV 中適用 Hybrid Attack 的列需要的詞長"""
+    lengths = set()
+    for csv_path in csv_paths:
+        for mask in pd.read_csv(csv_path, encoding="utf-8-sig")["mask"]:
+            split = split_hybrid_mask(mask, attack_modes)
+            if split:
+                lengths.add(split[1])
+    return sorted(lengths)
+
+
+def collect_hybrid_jobs(csv_path, json_root_path, test_folder, get_timeouts, wordlists,
+                        attack_modes=HYBRID_MODES, ledger_path=None, round_name=None, result_cache=None):
+    """
+    讀取一個 mask_data CSV，回傳尚未破解的 Hybrid Attack 任務 (每列一個)
+    wordlists: length_wordlists 的回傳值 (需涵蓋 hybrid_word_lengths 的所有長度)
+    其餘參數同 jobs.collect_mask_jobs
+    """
+    df = pd.read_csv(csv_path, encoding="utf-8-sig")
+    csv_basename = os.path.basename(csv_path).replace(".csv", "")
+
+    hybrid_subdir = os.path.join(json_root_path, HYBRID_SUBDIR, csv_basename)
+    os.makedirs(hybrid_subdir, exist_ok=True)
+
+    rows = []
+    for row_index, row in df.iterrows():
+        split = split_hybrid_mask(row["mask"], attack_modes)
+        if split is None:
+            continue
+        output_json_path = os.path.join(hybrid_subdir, f"{csv_basename}-{row_index+1}.json")
+        rows.append((row_index + 1, row, split, output_json_path))
+
+    states = {}
+    if ledger_path:
+        sync_rows(ledger_path, [
+            (round_name, test_folder, csv_basename, row_number, mode, row["hashvalue"], hybrid_mask, path)
+            for row_number, row, (mode, _, hybrid_mask), path in rows
+        ])
+        for mode in attack_modes:
+            states[mode] = load_states(ledger_path, round_name, test_folder, csv_basename, mode)
+
+    jobs = []
+    for row_number, row, (mode, word_length, hybrid_mask), output_json_path in rows:
+        entry = states[mode].get(row_number, {}) if ledger_path else {}
+        if ledger_path:
+            cracked_password = entry.get("cracked_password") if entry.get("state") == STATE_CRACKED else None
+        else:
+            cracked_password = is_cracked_result(output_json_path)
+        if cracked_password:
+            print(f"[SKIP] {csv_basename}, row {row_number} (-a {mode}) - 已破解 (密碼: {cracked_password})")
+            continue
+
+        wordlist = wordlists[word_length]
+        if not wordlist["count"]:
+            print(f"[SKIP] {csv_basename}, row {row_number} - 字典沒有長度 {word_length} 的詞")
+            continue
+
+        resume = None
+        if not ledger_path or entry.get("state") == STATE_RUNNING:
+            resume = read_resume_state(output_json_path)
+            if resume:
+                print(f"[RESUME] {csv_basename}, {row_number} (-a {mode}) - 從 session {resume['session']} 續跑 "
+                      f"(已執行 {resume['elapsed']:.0f}s)")
+
+        _, dict_timeout = get_timeouts(len(row["password"]))
+        key = (round_name, test_folder, csv_basename, row_number, mode)
+        jobs.append({
+            "job_id": f"{test_folder}_{csv_basename}_a{mode}_{row_number}",
+            "test_folder": test_folder,
+            "csv_basename": csv_basename,
+            "attack_mode": mode,
+            "mask": hybrid_mask,
+            "wordlist": wordlist["path"],
+            "wordlist_sha256": wordlist["sha256"],
+            "word_length": word_length,
+            "word_count": wordlist["count"],
+            "targets": [(row["hashvalue"], output_json_path)],
+            "max_seconds": dict_timeout,
+            "batch": False,
+            "keyspace": wordlist["count"] * enumerator_for_mask(hybrid_mask, test_folder).keyspace(),
+            "expected_seconds": None,
+            "resume": resume,
+            "ledger": {"path": ledger_path, "keys": {output_json_path: key}} if ledger_path else None,
+            "result_cache": result_cache,
+        })
+
+    return jobs
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+jobdir.py - 每個 Hashcat 任務獨立的工作目錄
+
+每個任務擁有自己的 hash 檔、potfile (--potfile-path)、outfile 與 session 名稱，
+多個任務可以同時執行而不會互相覆寫 hash.txt 或共用的 hashcat.potfile；
+破解結果也只需讀取這個只含本任務 hash 的小 potfile。
+"""
+
+import os
+import re
+import shutil
+
+# 工作目錄位於各 round 目錄下的 jobs/
+JOB_ROOT_NAME = "jobs"
+
+
+def sanitize_job_id(job_id):
+    """session 名稱與目錄名稱只保留英數字、- 和 _"""
+    return re.sub(r"[^0-9A-Za-z_-]", "_", job_id)
+
+
+def prepare_job_dir(root_dir, job_id, hashes, resume=False):
+    """
+    建立任務工作目錄並寫入 hash 檔
+    resume=True 時保留上一次的 potfile 與 restore 檔 (以 --restore 續跑)
+    Returns: dict {"dir", "hash_file", "potfile", "outfile", "session", "restore_file"}
+    """
+    session = sanitize_job_id(job_id)
+    job_dir = os.path.join(root_dir, session)
+    os.makedirs(job_dir, exist_ok=True)
+
+    job = {
+        "dir": job_dir,
+        "hash_file": os.path.join(job_dir, "hash.txt"),
+        "potfile": os.path.join(job_dir, "job.potfile"),
+        "outfile": os.path.join(job_dir, "outfile.txt"),
+        "session": session,
+        "restore_file": os.path.join(job_dir, f"{session}.restore"),
+    }
+
+    with open(job["hash_file"], "w", encoding="utf-8") as f:
+        f.write("\n".join(hashes) + "\n")
+
+    if resume:
+        return job
+
+    # 上一次留下的 potfile 會讓 hashcat 直接略過已破解的 hash，restore 檔會被誤用於續跑
+    for path in (job["potfile"], job["restore_file"]):
+        if os.path.exists(path):
+            os.remove(path)
+
+    return job
+
+
+def cleanup_job_dir(job):
+    """任務完成後刪除工作目錄"""
+    shutil.rmtree(job["dir"], ignore_errors=True)
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+jobs.py - 將 convert_basic*.csv 展開為 Hashcat 任務並執行
+
+任務以 dict 表示：
+    job_id       - 唯一名稱 (同時作為工作目錄與 session 名稱)
+    test_folder  - firsttest / secondtest
+    csv_basename - 來源 CSV (不含 .csv)
+    mask         - 原始 mask (?s 尚未轉換)；Hybrid 任務為字典詞之外的 mask 部分
+    attack_mode  - 攻擊模式 (沒有此欄位為 Mask Attack: 3；hybrid.py 的任務為 6 / 7，
+                   另有 wordlist、wordlist_sha256、word_length、word_count)
+    targets      - [(hashvalue, output_json_path), ...]
+    max_seconds  - 時間上限
+    batch        - 是否以批次模式執行 (多個 hash 合併)
+    keyspace     - 候選密碼總數 (?s 依 test_folder 換成 -1 字符集後計算；Hybrid 任務為詞數 × mask)
+    expected_seconds - 以校正速度估計的窮舉時間 (plan_jobs 設定，未校正時為 None)
+    resume       - 被中斷的 session 狀態 (session.read_resume_state)，None 表示從頭執行
+    shard        - keyspace 切片資訊 (sharding.shard_jobs 設定，只有切片任務才有)
+    ledger       - 任務帳本 {"path", "keys": {output_json_path: 帳本的主鍵}} (未使用帳本時為 None)
+    result_cache - 結果快取 {"dir", "reuse", "hashcat_version"} (resultcache.py，未使用快取時為 None)
+"""
+
+import os
+import pandas as pd
+
+from engine.batch import group_rows_by_mask, run_hashcat_batch
+from engine.calibration import device_speed, exhaust_seconds
+from engine.jobdir import prepare_job_dir, cleanup_job_dir
+from engine.keyspace import enumerator_for_mask
+from engine.ledger import STATE_CRACKED, STATE_RUNNING, load_states, sync_rows
+from engine.runner import run_hashcat_task, is_cracked_result
+from engine.session import read_resume_state
+
+
+def collect_mask_jobs(csv_path, json_root_path, test_folder, get_timeouts, batch_mode=False,
+                      ledger_path=None, round_name=None, result_cache=None):
+    """
+    讀取一個 CSV，回傳尚未破解的 Mask Attack 任務
+    get_timeouts: 函式，password_length → (mask_timeout, dict_timeout)
+    ledger_path: 任務帳本 (ledger.py)，指定時以帳本判斷已破解 / 被中斷的列，不讀取結果 JSON
+    result_cache: {"dir": 快取目錄, "reuse": 是否沿用快取結果, "hashcat_version": hashcat --version}
+                  (resultcache.py)，None 表示不使用
+    """
+    df = pd.read_csv(csv_path, encoding="utf-8-sig")
+    csv_basename = os.path.basename(csv_path).replace(".csv", "")
+
+    mask_subdir = os.path.join(json_root_path, "1", csv_basename)
+    os.makedirs(mask_subdir, exist_ok=True)
+
+    ledger_keys = {}
+    states = None
+    if ledger_path:
+        rows = []
+        for row_index, row in df.iterrows():
+            key = (round_name, test_folder, csv_basename, row_index + 1, 3)
+            output_json_path = os.path.join(mask_subdir, f"{csv_basename}-{row_index+1}.json")
+            ledger_keys[output_json_path] = key
+            rows.append(key + (row["hashvalue"], row["mask"], output_json_path))
+        sync_rows(ledger_path, rows)
+        states = load_states(ledger_path, round_name, test_folder, csv_basename, 3)
+
+    if batch_mode:
+        # mask 相同的列合併為一次執行
+        groups = [
+            (f"batch{i}", mask, rows)
+            for i, ((mask, _), rows) in enumerate(group_rows_by_mask(df, test_folder).items(), 1)
+        ]
+    else:
+        groups = [(str(row_index + 1), row["mask"], [(row_index, row)]) for row_index, row in df.iterrows()]
+
+    jobs = []
+    for suffix, mask, rows in groups:
+        targets = []
+        for row_index, row in rows:
+            output_json_mask = os.path.join(mask_subdir, f"{csv_basename}-{row_index+1}.json")
+
+            # 檢查是否已成功破解 (有帳本時查帳本，否則讀取結果 JSON)
+            if states is not None:
+                entry = states.get(row_index + 1, {})
+                cracked_password = entry.get("cracked_password") if entry.get("state") == STATE_CRACKED else None
+            else:
+                cracked_password = is_cracked_result(output_json_mask)
+            if cracked_password:
+                print(f"[SKIP] {csv_basename}, row {row_index+1} - 已破解 (密碼: {cracked_password})")
+                continue
+            targets.append((row["hashvalue"], output_json_mask))
+
+        if not targets:
+            continue
+
+        # 上次被中斷 (Session_State 仍為 running) 的任務以 --restore 續跑
+        resume = None
+        for _, output_json_path in targets:
+            # 有帳本時只有 state=running 的列需要檢查狀態記錄
+            if states is not None and states.get(ledger_keys[output_json_path][3], {}).get("state") != STATE_RUNNING:
+                continue
+            resume = read_resume_state(output_json_path)
+            if resume:
+                print(f"[RESUME] {csv_basename}, {suffix} - 從 session {resume['session']} 續跑 "
+                      f"(已執行 {resume['elapsed']:.0f}s)")
+                break
+
+        mask_timeout, _ = get_timeouts(len(rows[0][1]["password"]))
+        jobs.append({
+            "job_id": f"{test_folder}_{csv_basename}_{suffix}",
+            "test_folder": test_folder,
+            "csv_basename": csv_basename,
+            "mask": mask,
+            "targets": targets,
+            "max_seconds": mask_timeout,
+            "batch": batch_mode,
+            "keyspace": enumerator_for_mask(mask, test_folder).keyspace(),
+            "expected_seconds": None,
+            "resume": resume,
+            "ledger": {"path": ledger_path, "keys": {path: ledger_keys[path] for _, path in targets}} if ledger_path else None,
+            "result_cache": result_cache,
+        })
+
+    return jobs
+
+
+def job_attack_args(job):
+    """run_hashcat_task 的攻擊參數 (mode, attack_payload, hybrid_mask)"""
+    mode = job.get("attack_mode", 3)
+    if mode in (6, 7):
+        return {"mode": mode, "attack_payload": job["wordlist"], "hybrid_mask": job["mask"]}
+    return {"mode": 3, "attack_payload": job["mask"]}
+
+
+def plan_jobs(jobs, devices, timeout_multiple=3.0, min_timeout=60):
+    """
+    依 keyspace / 校正速度 設定每個任務的時間上限，並排成預期時間短的先執行
+    max_seconds = min(原本依長度的上限, max(min_timeout, 預期窮舉時間 × timeout_multiple))
+    任務可能分到任一裝置，因此以最慢裝置的速度估計；沒有校正速度時維持原本的上限
+    (校正速度只適用於 Mask Attack，Hybrid 任務維持原本的上限，排在校正過的任務之後)
+    Returns: 排序後的 jobs
+    """
+    for job in jobs:
+        if job.get("attack_mode", 3) != 3:
+            continue
+        speeds = [device_speed(d, "100", job["mask"], job["test_folder"]) for d in devices]
+        if not speeds or not all(speeds):
+            continue
+        expected = job["keyspace"] / min(speeds)
+        job["expected_seconds"] = round(expected, 2)
+        job["max_seconds"] = min(job["max_seconds"], max(min_timeout, round(expected * timeout_multiple)))
+
+    planned = sorted(jobs, key=lambda j: (
+        j["expected_seconds"] if j["expected_seconds"] is not None else float("inf"), j["keyspace"]
+    ))
+    known = [j for j in planned if j["expected_seconds"] is not None]
+    print(f"[PLAN] {len(jobs)} 個任務，{len(known)} 個依校正速度設定時間上限 (×{timeout_multiple}，"
+          f"最少 {min_timeout}s)，預期總時間 {sum(j['expected_seconds'] for j in known):,.0f}s")
+    return planned
+
+
+def job_extra_fields(job, device):
+    """結果 JSON 中與裝置相關的欄位 (裝置、校正速度、預期窮舉時間)"""
+    extra_fields = {}
+    if device is not None:
+        extra_fields = {"Device_ID": device["id"], "Device_Name": device.get("name", "")}
+
+    if job.get("attack_mode", 3) != 3:
+        extra_fields.update({"Wordlist": job["wordlist"], "Word_Length": job["word_length"],
+                             "Word_Count": job["word_count"], "Hybrid_Keyspace": job["keyspace"]})
+        return extra_fields
+
+    # 裝置已校正時 (calibration.py)，記錄速度與 keyspace / 速度 的預期窮舉時間
+    speed = device_speed(device, "100", job["mask"], job["test_folder"])
+    if speed:
+        extra_fields["Calibrated_Speed"] = speed
+        extra_fields["Expected_Exhaust_Seconds"] = round(exhaust_seconds(job["mask"], job["test_folder"], speed), 2)
+    return extra_fields
+
+
+def prepare_job(job, hashcat_exe_path, jobs_root, device=None):
+    """
+    建立任務的工作目錄與基本指令 (execute_job 與 aio.py 共用)
+    Returns: (base_cmd, extra_fields, job_dir, resume)
+    """
+    base_cmd = [hashcat_exe_path, "-m", "100"]
+    if device is not None:
+        base_cmd.extend(["-d", str(device["id"])])
+    extra_fields = job_extra_fields(job, device)
+
+    hashes = [hashvalue for hashvalue, _ in job["targets"]]
+    job_dir = prepare_job_dir(jobs_root, job["job_id"], hashes, resume=job.get("resume") is not None)
+    resume = job.get("resume")
+    if resume and os.path.abspath(resume["restore_file"]) != os.path.abspath(job_dir["restore_file"]):
+        resume = None
+
+    if job.get("attack_mode", 3) != 3:
+        print(f"[HYBRID ATTACK] {job['job_id']} (-a {job['attack_mode']}, {job['word_count']:,} 個 "
+              f"{job['word_length']} 碼的詞, mask: {job['mask']}, 時間: {job['max_seconds']}s, "
+              f"裝置: {device['id'] if device else '預設'})")
+    else:
+        print(f"[MASK ATTACK] {job['job_id']} ({len(hashes)} 個 hash, mask: {job['mask']}, "
+              f"Mask時間: {job['max_seconds']}s, 裝置: {device['id'] if device else '預設'})")
+    return base_cmd, extra_fields, job_dir, resume
+
+
+def execute_job(job, hashcat_exe_path, jobs_root, device=None):
+    """
+    在指定裝置上執行一個任務 (使用獨立工作目錄)
+    device: devices.py 的裝置 dict，None 表示不指定 -d
+    """
+    base_cmd, extra_fields, job_dir, resume = prepare_job(job, hashcat_exe_path, jobs_root, device)
+
+    if job["batch"]:
+        results = run_hashcat_batch(
+            base_cmd,
+            attack_payload=job["mask"],
+            jobs=job["targets"],
+            max_seconds=job["max_seconds"],
+            hash_file_path=job_dir["hash_file"],
+            test_folder=job["test_folder"],
+            potfile_path=job_dir["potfile"],
+            outfile_path=job_dir["outfile"],
+            session=job_dir["session"],
+            extra_fields=extra_fields,
+            restore_file_path=job_dir["restore_file"],
+            resume=resume
+        )
+    else:
+        _, output_json_path = job["targets"][0]
+        result = run_hashcat_task(
+            base_cmd + [job_dir["hash_file"]],
+            max_seconds=job["max_seconds"],
+            output_json_path=output_json_path,
+            test_folder=job["test_folder"],  # 傳遞測試類型
+            potfile_path=job_dir["potfile"],
+            outfile_path=job_dir["outfile"],
+            session=job_dir["session"],
+            extra_fields=extra_fields,
+            restore_file_path=job_dir["restore_file"],
+            resume=resume,
+            **job_attack_args(job)
+        )
+        results = {output_json_path: result}
+
+    cleanup_job_dir(job_dir)
+    return results
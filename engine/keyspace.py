@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+keyspace.py - 計算密碼在 Hashcat mask attack 列舉順序中的確切位置
+
+Mask attack 的破解時間 ≈ 密碼的候選位置 / 速度。本模組依 Hashcat 的實作
+(mpsp.c 的 sp_tbl_to_css / sp_exec 與 markov_le.cl 的 generate_pw) 重現列舉順序：
+
+1. 每個位置的字元順序來自 hcstat2 統計表：第一個字元依 root 統計排序，
+   之後每個字元依「前一個字元」的 markov 統計排序，再過濾為 mask 允許的字元。
+   使用 --markov-disable 時統計全為 0，順序即為 byte 值由小到大。
+2. mask 會拆成兩段：前 css_cnt_r 個位置是 kernel 內層迴圈 (modifier / bfs)，
+   其餘位置是外層的 base words。兩段各自從 root 表開始，內部都是「最左邊變化最快」。
+   候選位置 = base_index * bfs_cnt + bfs_index。
+
+注意：同分字元的順序依穩定排序 (byte 值小者在前) 處理，與 glibc 版 Hashcat 一致；
+GPU 一次處理一批 base words，實際時間與 (位置 / 速度) 的誤差不超過一個批次。
+"""
+
+import lzma
+import os
+import sys
+from array import array
+
+from engine.runner import select_charset
+
+CHARSIZ = 256
+SP_PW_MAX = 64  # hcstat2 統計的最大位置數
+
+# Hashcat 內建字符集
+BUILTIN_CHARSETS = {
+    "l": "abcdefghijklmnopqrstuvwxyz",
+    "u": "ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "d": "0123456789",
+    "h": "0123456789abcdef",
+    "H": "0123456789ABCDEF",
+    "s": " !\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~",
+}
+BUILTIN_CHARSETS["a"] = BUILTIN_CHARSETS["l"] + BUILTIN_CHARSETS["u"] + BUILTIN_CHARSETS["d"] + BUILTIN_CHARSETS["s"]
+
+
+def expand_charset(spec, custom=None, hex_charset=False):
+    """展開字符集定義 (可引用 ?l ?u ?1 等)，回傳 byte 值的 set"""
+    custom = custom or {}
+    raw = bytes.fromhex(spec) if hex_charset else spec.encode("latin-1")
+    chars = set()
+    i = 0
+    while i < len(raw):
+        if raw[i] == ord("?") and i + 1 < len(raw):
+            key = chr(raw[i + 1])
+            if key in custom:
+                chars |= custom[key]
+            elif key == "b":
+                chars |= set(range(256))
+            elif key in BUILTIN_CHARSETS:
+                chars |= set(BUILTIN_CHARSETS[key].encode("latin-1"))
+            else:
+                chars.add(raw[i + 1])
+            i += 2
+        else:
+            chars.add(raw[i])
+            i += 1
+    return chars
+
+
+def mask_charsets(mask, custom=None):
+    """回傳 mask 每個位置允許的 byte 值 set"""
+    custom = custom or {}
+    positions = []
+    i = 0
+    while i < len(mask):
+        if mask[i] == "?" and i + 1 < len(mask):
+            positions.append(expand_charset(mask[i:i + 2], custom))
+            i += 2
+        else:
+            positions.append({ord(mask[i])})
+            i += 1
+    return positions
+
+
+class MarkovTables:
+    """
+    每個位置的字元排序表
+    root[pos]          - 位置 pos 的字元順序 (256 個 byte 值)
+    markov[pos][prev]  - 位置 pos 為 prev 時，位置 pos+1 的字元順序；None 表示 byte 值由小到大
+    """
+
+    def __init__(self, root=None, markov=None):
+        ascending = list(range(CHARSIZ))
+        self.root = root or [ascending] * SP_PW_MAX
+        self.markov = markov
+
+    def next_order(self, pos, prev):
+        if self.markov is None or pos >= SP_PW_MAX:
+            return self.root[0]
+        return self.markov[pos][prev]
+
+
+def load_hcstat2(path):
+    """
+    讀取 Hashcat 的 hashcat.hcstat2 (LZMA2 raw 壓縮，big-endian u64)
+    Returns: MarkovTables
+    """
+    with open(path, "rb") as f:
+        compressed = f.read()
+    # Hashcat 以 7z 的 LZMA2 props 0x1c 壓縮 (字典大小 64MB)
+    data = lzma.decompress(
+        compressed, format=lzma.FORMAT_RAW,
+        filters=[{"id": lzma.FILTER_LZMA2, "dict_size": 1 << 26}]
+    )
+
+    stats = array("Q")
+    stats.frombytes(data[:len(data) - len(data) % 8])
+    if sys.byteorder == "little":
+        stats.byteswap()
+
+    root_cnt = SP_PW_MAX * CHARSIZ
+    offset = 2  # version + zero
+    root_stats = stats[offset:offset + root_cnt]
+    markov_stats = stats[offset + root_cnt:offset + root_cnt + root_cnt * CHARSIZ]
+
+    def order(values):
+        # 依統計值由大到小排序，同分時 byte 值小者在前
+        return sorted(range(CHARSIZ), key=lambda k: -values[k])
+
+    root = [order(root_stats[p * CHARSIZ:(p + 1) * CHARSIZ]) for p in range(SP_PW_MAX)]
+    markov = []
+    for p in range(SP_PW_MAX):
+        base = p * CHARSIZ * CHARSIZ
+        markov.append([
+            order(markov_stats[base + c * CHARSIZ:base + (c + 1) * CHARSIZ])
+            for c in range(CHARSIZ)
+        ])
+    return MarkovTables(root, markov)
+
+
+def default_hcstat2_path(hashcat_exe_path):
+    """Hashcat 預設使用執行檔目錄下的 hashcat.hcstat2"""
+    return os.path.join(os.path.dirname(hashcat_exe_path), "hashcat.hcstat2")
+
+
+def bfs_length(charsets, split=True):
+    """
+    內層迴圈 (modifier) 的位置數 css_cnt_r，對應 mpsp.c 的規則
+    (SHA-1 等快速 hash 的 mask attack 都在 kernel 內迴圈)
+    split=False 表示整個 mask 為同一段 (hybrid attack 的 mask 部分)
+    """
+    n = len(charsets)
+    if not split or n == 0:
+        return 0
+    if n < 6:
+        return 1
+    if n == 6:
+        return 2
+    if len(charsets[0]) * len(charsets[1]) * len(charsets[2]) > 256:
+        return 3
+    return 4
+
+
+class MaskEnumerator:
+    """重現 Hashcat 對一個 mask 的列舉順序"""
+
+    def __init__(self, charsets, tables=None, markov_threshold=0, split=True):
+        self.charsets = charsets
+        self.tables = tables or MarkovTables()
+        self.threshold = markov_threshold
+        self.bfs_len = bfs_length(charsets, split)
+        self._cache = {}
+
+    def _filter(self, order, pos):
+        allowed = self.charsets[pos]
+        chars = [k for k in order if k in allowed]
+        if self.threshold:
+            chars = chars[:self.threshold]
+        return chars
+
+    def css(self, pos, prev=None):
+        """位置 pos 的字元順序；prev 為 None 表示該段的第一個位置 (使用 root 表)"""
+        key = (pos, prev)
+        if key not in self._cache:
+            if prev is None:
+                order = self.tables.root[pos] if pos < SP_PW_MAX else self.tables.root[0]
+            else:
+                order = self.tables.next_order(pos - 1, prev)
+            self._cache[key] = self._filter(order, pos)
+        return self._cache[key]
+
+    def _segment_count(self, start, stop):
+        total = 1
+        for pos in range(start, stop):
+            # 過濾後的字元數與前一個字元無關
+            total *= len(self.css(pos, None))
+        return total
+
+    def _segment_index(self, data, start, stop):
+        index, radix, prev = 0, 1, None
+        for pos in range(start, stop):
+            cs = self.css(pos, prev)
+            try:
+                r = cs.index(data[pos])
+            except ValueError:
+                return None
+            index += r * radix
+            radix *= len(cs)
+            prev = data[pos]
+        return index
+
+    def bfs_count(self):
+        return self._segment_count(0, self.bfs_len)
+
+    def base_keyspace(self):
+        """base words 的數量 (即 hashcat --keyspace 的值，-s/-l 的單位)"""
+        return self._segment_count(self.bfs_len, len(self.charsets))
+
+    def keyspace(self):
+        return self.bfs_count() * self.base_keyspace()
+
+    def index_of(self, password):
+        """密碼的候選位置 (0 起算)；不在 mask 範圍內時回傳 None"""
+        data = password.encode("utf-8") if isinstance(password, str) else password
+        if len(data) != len(self.charsets):
+            return None
+        bfs = self._segment_index(data, 0, self.bfs_len)
+        base = self._segment_index(data, self.bfs_len, len(self.charsets))
+        if bfs is None or base is None:
+            return None
+        return base * self.bfs_count() + bfs
+
+    def candidate_at(self, index):
+        """第 index 個候選密碼 (用於驗證)"""
+        base, bfs = divmod(index, self.bfs_count())
+        out = bytearray(len(self.charsets))
+        for start, stop, value in [(0, self.bfs_len, bfs), (self.bfs_len, len(self.charsets), base)]:
+            prev = None
+            for pos in range(start, stop):
+                cs = self.css(pos, prev)
+                value, r = divmod(value, len(cs))
+                out[pos] = cs[r]
+                prev = cs[r]
+        return out.decode("latin-1")
+
+
+def enumerator_for_mask(mask, test_folder=None, tables=None, markov_threshold=0):
+    """依 run_hashcat_task 的規則 (?s → ?1 自定義字符集) 建立列舉器"""
+    custom = {}
+    if "?s" in mask:
+        charset_hex, _ = select_charset(test_folder)
+        custom["1"] = expand_charset(charset_hex, hex_charset=True)
+        mask = mask.replace("?s", "?1")
+    return MaskEnumerator(mask_charsets(mask, custom), tables, markov_threshold)
+
+
+def predict_csv(csv_path, speed, test_folder=None, tables=None):
+    """
+    預測 convert_basic*.csv 每一列的破解時間
+    speed: H/s
+    Returns: DataFrame (原欄位 + candidate_index, keyspace, predicted_ms, exhaust_ms)
+    """
+    import pandas as pd  # 模擬器也會載入本模組，pandas 只在這裡需要
+
+    df = pd.read_csv(csv_path, encoding="utf-8-sig")
+    enumerators = {}
+    indexes, keyspaces = [], []
+    for _, row in df.iterrows():
+        mask = row["mask"]
+        if mask not in enumerators:
+            enumerators[mask] = enumerator_for_mask(mask, test_folder, tables)
+        enum = enumerators[mask]
+        indexes.append(enum.index_of(row["password"]))
+        keyspaces.append(enum.keyspace())
+
+    df["candidate_index"] = indexes
+    df["keyspace"] = keyspaces
+    df["predicted_ms"] = [
+        round((i + 1) / speed * 1000, 3) if i is not None else None for i in indexes
+    ]
+    df["exhaust_ms"] = [round(k / speed * 1000, 3) for k in keyspaces]
+    return df
+
+
+# ===============================
+# 主程式：預測 round1 所有 CSV 的破解時間
+# ===============================
+if __name__ == "__main__":
+    # 預設速度：RTX 5070 的 SHA-1 (-m 100) 約 18.8 GH/s
+    SPEED = 18.8e9
+
+    exam_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    hashcat_exe_path = os.path.join(os.path.dirname(exam_dir), "hashcat.exe")
+    hcstat2_path = default_hcstat2_path(hashcat_exe_path)
+
+    if os.path.exists(hcstat2_path):
+        print(f"[INFO] 使用 markov 統計表: {hcstat2_path}")
+        tables = load_hcstat2(hcstat2_path)
+    else:
+        print("[WARN] 找不到 hashcat.hcstat2，改用 --markov-disable 的順序")
+        tables = None
+
+    for test_folder in ["firsttest", "secondtest"]:
+        csv_dir = os.path.join(exam_dir, "round1", test_folder, "result", "mask_data")
+        if not os.path.isdir(csv_dir):
+            continue
+        for csv_name in sorted(os.listdir(csv_dir)):
+            if not csv_name.endswith(".csv"):
+                continue
+            result = predict_csv(os.path.join(csv_dir, csv_name), SPEED, test_folder, tables)
+            print(f"\n[{test_folder}] {csv_name}")
+            for _, row in result.iterrows():
+                print(f"  {row['password']:<14} {row['mask']:<26} 預測 {row['predicted_ms']:>14} ms"
+                      f"  (位置 {row['candidate_index']}/{row['keyspace']})")
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+ledger.py - SQLite 任務帳本 (取代逐一讀取結果 JSON 的略過 / 續跑判斷)
+
+每個 (round, test_folder, csv, row, attack_mode) 一列，記錄狀態、嘗試次數、時間、
+返回碼、停止原因與破解結果。啟動時每個 CSV 只需一次查詢就能知道哪些列已破解、
+哪些列上次被中斷，不必開啟數萬個結果 JSON。
+
+    state: pending (尚未執行) / running (執行中或被中斷) / cracked / exhausted /
+           timeout / stall / cancelled / failed
+
+帳本位於 exam/ledger.sqlite3；第一次建立時自動匯入既有的 result_json 目錄
+(也可以手動執行 python -m engine.ledger migrate <exam 目錄>)。
+結果 JSON 仍照常寫出，分析腳本不受影響。
+"""
+
+import contextlib
+import datetime
+import glob
+import os
+import re
+import sqlite3
+import sys
+
+from engine.statuslog import STATUS_LOG_SUFFIX, read_latest_state
+
+LEDGER_NAME = "ledger.sqlite3"
+
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_CRACKED = "cracked"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    round            TEXT    NOT NULL,
+    test_folder      TEXT    NOT NULL,
+    csv              TEXT    NOT NULL,
+    row              INTEGER NOT NULL,
+    attack_mode      INTEGER NOT NULL,
+    hashvalue        TEXT,
+    mask             TEXT,
+    output_json      TEXT,
+    state            TEXT    NOT NULL DEFAULT 'pending',
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    created_at       TEXT,
+    started_at       TEXT,
+    finished_at      TEXT,
+    exit_code        INTEGER,
+    stop_reason      TEXT,
+    cracked_password TEXT,
+    runtime_seconds  REAL,
+    PRIMARY KEY (round, test_folder, csv, row, attack_mode)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (round, test_folder, attack_mode, state);
+"""
+
+# 結果 JSON 的 Attack_Mode，例如 "Mask Attack (3)"
+ATTACK_MODE_RE = re.compile(r"\((\d+)\)\s*$")
+# <csv>-<row>.json
+ROW_JSON_RE = re.compile(r"^(.+)-(\d+)\.json$")
+
+
+def default_ledger_path(exam_dir):
+    return os.path.join(exam_dir, LEDGER_NAME)
+
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+@contextlib.contextmanager
+def connect(ledger_path):
+    """每次操作各自連線並在結束時 commit (多個 worker 執行緒同時寫入時由 SQLite 的鎖處理)"""
+    conn = sqlite3.connect(ledger_path, timeout=60)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def result_state(result):
+    """由結果 dict 判斷帳本狀態"""
+    if result.get("Cracked_Password", "Na") not in ("Na", None, ""):
+        return STATE_CRACKED
+    stop_reason = result.get("Stop_Reason")
+    if stop_reason in ("timeout", "stall", "cancelled"):
+        return stop_reason
+    if result.get("Status") == "Exhausted" or result.get("Process_Exit_Code") == 1:
+        return "exhausted"
+    if result.get("Session_State") == "running":
+        return STATE_RUNNING
+    return "failed"
+
+
+def sync_rows(ledger_path, rows):
+    """
+    登記 CSV 的列 (已存在的列只更新 hash / mask / 結果路徑，不影響狀態)
+    rows: [(round, test_folder, csv, row, attack_mode, hashvalue, mask, output_json), ...]
+    """
+    now = _now()
+    with connect(ledger_path) as conn:
+        conn.executemany(
+            """
+            INSERT INTO jobs (round, test_folder, csv, row, attack_mode, hashvalue, mask, output_json, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (round, test_folder, csv, row, attack_mode) DO UPDATE SET
+                hashvalue = excluded.hashvalue, mask = excluded.mask, output_json = excluded.output_json
+            """,
+            [tuple(r) + (now,) for r in rows],
+        )
+
+
+def load_states(ledger_path, round_name, test_folder, csv, attack_mode):
+    """
+    一次查詢取得一個 CSV 所有列的狀態
+    Returns: dict {row: {"state", "cracked_password", "attempts"}}
+    """
+    with connect(ledger_path) as conn:
+        cur = conn.execute(
+            "SELECT row, state, cracked_password, attempts FROM jobs "
+            "WHERE round = ? AND test_folder = ? AND csv = ? AND attack_mode = ?",
+            (round_name, test_folder, csv, attack_mode),
+        )
+        return {row: {"state": state, "cracked_password": pwd, "attempts": attempts}
+                for row, state, pwd, attempts in cur}
+
+
+def pending_rows(ledger_path, round_name=None, test_folder=None, attack_mode=None):
+    """尚未破解的列 (「還剩哪些」查詢，使用 jobs_state 索引)"""
+    where, args = ["state != ?"], [STATE_CRACKED]
+    for column, value in (("round", round_name), ("test_folder", test_folder), ("attack_mode", attack_mode)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            args.append(value)
+    with connect(ledger_path) as conn:
+        cur = conn.execute(
+            f"SELECT round, test_folder, csv, row, attack_mode, state, attempts FROM jobs "
+            f"WHERE {' AND '.join(where)} ORDER BY round, test_folder, csv, row", args,
+        )
+        return cur.fetchall()
+
+
+def summarize(ledger_path):
+    """Returns: dict {(round, test_folder, state): 列數}"""
+    with connect(ledger_path) as conn:
+        cur = conn.execute("SELECT round, test_folder, state, COUNT(*) FROM jobs GROUP BY round, test_folder, state")
+        return {(r, f, s): n for r, f, s, n in cur}
+
+
+def mark_started(ledger_path, keys):
+    """任務開始：state=running，attempts + 1"""
+    with connect(ledger_path) as conn:
+        conn.executemany(
+            "UPDATE jobs SET state = ?, attempts = attempts + 1, started_at = ?, finished_at = NULL "
+            "WHERE round = ? AND test_folder = ? AND csv = ? AND row = ? AND attack_mode = ?",
+            [(STATE_RUNNING, _now()) + tuple(key) for key in keys],
+        )
+
+
+def mark_finished(ledger_path, key, result):
+    """任務結束：依結果 dict 記錄狀態、返回碼、停止原因與破解結果"""
+    password = result.get("Cracked_Password", "Na")
+    with connect(ledger_path) as conn:
+        conn.execute(
+            "UPDATE jobs SET state = ?, finished_at = ?, exit_code = ?, stop_reason = ?, "
+            "cracked_password = ?, runtime_seconds = ? "
+            "WHERE round = ? AND test_folder = ? AND csv = ? AND row = ? AND attack_mode = ?",
+            (result_state(result), result.get("Finished") or _now(), result.get("Process_Exit_Code"),
+             result.get("Stop_Reason"), None if password == "Na" else password,
+             result.get("Actual_Runtime_Seconds")) + tuple(key),
+        )
+
+
+def ledger_targets(job):
+    """任務中有登記在帳本的目標：[(output_json_path, key), ...]"""
+    ledger = job.get("ledger")
+    if not ledger:
+        return []
+    return [(path, ledger["keys"][path]) for _, path in job["targets"] if path in ledger["keys"]]
+
+
+def record_job_start(job):
+    """scheduler / aio 在執行任務前呼叫 (切片任務只在第一段登記)"""
+    shard = job.get("shard")
+    if shard and shard["index"] != 0:
+        return
+    targets = ledger_targets(job)
+    if targets:
+        mark_started(job["ledger"]["path"], [key for _, key in targets])
+
+
+def record_job_results(job, results):
+    """
+    scheduler / aio 在任務結束後呼叫
+    results: {output_json_path: 結果 dict}；切片任務只有最後一段會回傳合併結果
+    """
+    for path, key in ledger_targets(job):
+        if results and path in results:
+            mark_finished(job["ledger"]["path"], key, results[path])
+
+
+def migrate_json_tree(ledger_path, round_name, test_folder, json_root):
+    """
+    匯入既有的 result_json/<n>/<csv>/<csv>-<row>.json
+    只有狀態記錄 (<csv>-<row>.status.jsonl) 的列是被中斷的任務，以最新的快照匯入 (state=running)
+    攻擊模式取自結果 JSON 的 Attack_Mode；已在帳本中的列以 JSON 的結果覆寫
+    Returns: 匯入的列數
+    """
+    paths = set(glob.glob(os.path.join(json_root, "*", "*", "*.json")))
+    for log_path in glob.glob(os.path.join(json_root, "*", "*", "*" + STATUS_LOG_SUFFIX)):
+        paths.add(log_path[:-len(STATUS_LOG_SUFFIX)] + ".json")
+
+    rows = []
+    for path in sorted(paths):
+        match = ROW_JSON_RE.match(os.path.basename(path))
+        if not match:
+            continue
+        try:
+            data = read_latest_state(path)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] 略過無法讀取的結果: {path} ({e})")
+            continue
+        if data is None:
+            continue
+        mode = ATTACK_MODE_RE.search(data.get("Attack_Mode") or "")
+        password = data.get("Cracked_Password", "Na")
+        rows.append((
+            round_name, test_folder, match.group(1), int(match.group(2)), int(mode.group(1)) if mode else 3,
+            data.get("Attack_Payload"), path, result_state(data),
+            1, data.get("Started"), data.get("Finished"), data.get("Process_Exit_Code"), data.get("Stop_Reason"),
+            None if password == "Na" else password, data.get("Actual_Runtime_Seconds"), _now(),
+        ))
+
+    with connect(ledger_path) as conn:
+        conn.executemany(
+            """
+            INSERT INTO jobs (round, test_folder, csv, row, attack_mode, mask, output_json, state, attempts,
+                              started_at, finished_at, exit_code, stop_reason, cracked_password, runtime_seconds,
+                              created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (round, test_folder, csv, row, attack_mode) DO UPDATE SET
+                mask = excluded.mask, output_json = excluded.output_json, state = excluded.state,
+                started_at = excluded.started_at, finished_at = excluded.finished_at,
+                exit_code = excluded.exit_code, stop_reason = excluded.stop_reason,
+                cracked_password = excluded.cracked_password, runtime_seconds = excluded.runtime_seconds,
+                attempts = MAX(attempts, 1)
+            """,
+            rows,
+        )
+    return len(rows)
+
+
+def migrate_exam_dir(ledger_path, exam_dir):
+    """匯入 exam/round*/<test_folder>/result_json 下所有的結果 JSON"""
+    total = 0
+    for json_root in sorted(glob.glob(os.path.join(exam_dir, "round*", "*", "result_json"))):
+        test_folder_dir = os.path.dirname(json_root)
+        round_name = os.path.basename(os.path.dirname(test_folder_dir))
+        count = migrate_json_tree(ledger_path, round_name, os.path.basename(test_folder_dir), json_root)
+        print(f"[LEDGER] 匯入 {round_name}/{os.path.basename(test_folder_dir)}: {count} 個結果 JSON")
+        total += count
+    return total
+
+
+def ensure_ledger(exam_dir):
+    """取得帳本路徑；帳本不存在時建立並匯入既有的結果 JSON"""
+    ledger_path = default_ledger_path(exam_dir)
+    if not os.path.exists(ledger_path):
+        print(f"[LEDGER] 建立任務帳本: {ledger_path}")
+        migrate_exam_dir(ledger_path, exam_dir)
+    return ledger_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("migrate", "summary"):
+        print("用法: python -m engine.ledger migrate|summary <exam 目錄>")
+        sys.exit(1)
+    path = default_ledger_path(sys.argv[2])
+    if sys.argv[1] == "migrate":
+        print(f"[LEDGER] 共匯入 {migrate_exam_dir(path, sys.argv[2])} 列")
+    for (r, f, s), n in sorted(summarize(path).items()):
+        print(f"  {r}/{f}: {s:<10} {n}")
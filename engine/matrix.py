@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+matrix.py - 宣告式的實驗矩陣：展開為 CSV / 任務，並在啟動前估計每格的裝置時數
+
+profile["matrix"] 為一串 block，每個 block 展開為 lengths × special_counts 個 cell：
+    test_folder    - firsttest / secondtest (決定 ?s 使用的 -1 字符集，見 runner.select_charset)
+    lengths        - 密碼長度
+    special_counts - 特殊字元數；[None] 表示不分 (data/basic{L}.txt)，
+                     否則為 data/len{L}/basic{L}+{k}.txt
+    samples        - 每個 cell 抽樣的密碼數：None (全部)、整數，或 {長度: 數量}
+    attack_modes   - 攻擊模式：Mask Attack (3，jobs.py)、Hybrid Attack (6 / 7，hybrid.py；
+                     依每列密碼的結構決定，同一個 CSV 可能同時有 -a 6 與 -a 7 的任務)
+    hash_modes     - Hashcat hash 模式 (目前 gen_mask / jobs.py 只產生並執行 SHA-1: "100")
+cell 的順序即 gen_mask 的抽樣順序與 run_m 的載入順序。
+Hybrid 任務與同一個 CSV 的 Mask 任務分開統計 (cell 名稱加上 "/a6"、"/a7")。
+
+啟動前 (jobs.plan_jobs 之後) 以 keyspace / 校正速度估計每個任務的裝置秒數
+(窮舉時間，不超過時間上限；未校正的任務以時間上限計)，依 cell 彙總後印出；
+超過 cell 預算時依 budget_action 處理：
+    trim  - 保留預期時間短的任務，刪去超出預算的部分
+    skip  - 整個 cell 不執行
+    abort - 不啟動任何任務 (丟出 BudgetExceeded)
+"""
+
+SUPPORTED_ATTACK_MODES = (3, 6, 7)
+SUPPORTED_HASH_MODES = ("100",)
+
+BUDGET_ACTIONS = ("trim", "skip", "abort")
+
+
+class BudgetExceeded(RuntimeError):
+    """budget_action="abort" 時，有 cell 超過預算"""
+
+
+def cell_names(length, special_count):
+    """Returns: (txt 相對路徑, CSV 檔名)"""
+    if special_count is None:
+        return f"basic{length}.txt", f"convert_basic{length}.csv"
+    return f"len{length}/basic{length}+{special_count}.txt", f"convert_basic{length}+{special_count}.csv"
+
+
+def cell_sample(samples, length):
+    if isinstance(samples, dict):
+        return samples.get(length)
+    return samples
+
+
+def expand_matrix(profile, attack_modes=None):
+    """
+    將 profile["matrix"] 展開為 cell 列表
+    attack_modes: 覆寫所有 block 的攻擊模式 (例如 [6, 7] 只執行 Hybrid 階段)，None 表示依 profile
+    Returns: [{"test_folder", "length", "special_count", "txt", "csv", "sample", "attack_modes", "hash_modes"}, ...]
+    """
+    cells = []
+    for block in profile["matrix"]:
+        block_modes = attack_modes or block.get("attack_modes", [3])
+        hash_modes = [str(m) for m in block.get("hash_modes", ["100"])]
+        unsupported = ([m for m in block_modes if m not in SUPPORTED_ATTACK_MODES]
+                       + [m for m in hash_modes if m not in SUPPORTED_HASH_MODES])
+        if unsupported:
+            raise ValueError(f"{block['test_folder']}: 尚未支援的攻擊 / hash 模式 {unsupported}")
+
+        for length in block["lengths"]:
+            for special_count in block.get("special_counts", [None]):
+                txt, csv = cell_names(length, special_count)
+                cells.append({
+                    "test_folder": block["test_folder"],
+                    "length": length,
+                    "special_count": special_count,
+                    "txt": txt,
+                    "csv": csv,
+                    "sample": cell_sample(block.get("samples"), length),
+                    "attack_modes": block_modes,
+                    "hash_modes": hash_modes,
+                })
+    return cells
+
+
+def mask_csvs(profile):
+    """Returns: {test_folder: [CSV 檔名, ...]} (run_m 依序載入)"""
+    out = {}
+    for cell in expand_matrix(profile):
+        out.setdefault(cell["test_folder"], []).append(cell["csv"])
+    return out
+
+
+def mask_sources(profile):
+    """Returns: {test_folder: [(txt, CSV 檔名, 長度, 特殊字元數, 抽樣數), ...]} (gen_mask 依序產生)"""
+    out = {}
+    for cell in expand_matrix(profile):
+        out.setdefault(cell["test_folder"], []).append(
+            (cell["txt"], cell["csv"], cell["length"], cell["special_count"], cell["sample"])
+        )
+    return out
+
+
+def cell_label(test_folder, csv_basename, attack_mode=3):
+    cell = f"{test_folder}/{csv_basename}"
+    return cell if attack_mode == 3 else f"{cell}/a{attack_mode}"
+
+
+def job_cell(job):
+    return cell_label(job["test_folder"], job["csv_basename"], job.get("attack_mode", 3))
+
+
+def job_cost_seconds(job):
+    """任務最多佔用的裝置秒數：預期窮舉時間 (不超過時間上限)，未校正時為時間上限"""
+    if job.get("expected_seconds") is None:
+        return job["max_seconds"]
+    return min(job["expected_seconds"], job["max_seconds"])
+
+
+def profile_cells(profile, attack_modes=None):
+    """實驗矩陣中所有 cell 的名稱 (與 job_cell 相同)，依矩陣順序"""
+    return [cell_label(cell["test_folder"], cell["csv"][:-len(".csv")], mode)
+            for cell in expand_matrix(profile, attack_modes) for mode in cell["attack_modes"]]
+
+
+def estimate_cells(jobs, order=None):
+    """
+    依 cell 彙總任務的裝置秒數
+    order: cell 的顯示順序 (profile_cells)，未指定時依任務出現的順序
+    Returns: dict {cell: {"jobs", "seconds", "uncalibrated"}}
+    """
+    present = {job_cell(job) for job in jobs}
+    cells = {cell: {"jobs": 0, "seconds": 0.0, "uncalibrated": 0} for cell in order or [] if cell in present}
+    for job in jobs:
+        entry = cells.setdefault(job_cell(job), {"jobs": 0, "seconds": 0.0, "uncalibrated": 0})
+        entry["jobs"] += 1
+        entry["seconds"] += job_cost_seconds(job)
+        if job.get("expected_seconds") is None:
+            entry["uncalibrated"] += 1
+    return cells
+
+
+def print_cost_report(estimates, devices_count, budget_hours=None):
+    """印出每個 cell 的任務數與預估裝置時數"""
+    print(f"\n[MATRIX] {'cell':<36} {'任務':>5} {'裝置時數':>10}")
+    total = 0.0
+    for cell, entry in estimates.items():
+        hours = entry["seconds"] / 3600
+        total += hours
+        flags = []
+        if entry["uncalibrated"]:
+            flags.append(f"{entry['uncalibrated']} 個未校正，以時間上限計")
+        if budget_hours is not None and hours > budget_hours:
+            flags.append(f"超過預算 {budget_hours:g}h")
+        print(f"[MATRIX] {cell:<36} {entry['jobs']:>5} {hours:>10.2f}" + (f"  ({'; '.join(flags)})" if flags else ""))
+    wall = total / devices_count if devices_count else total
+    print(f"[MATRIX] 合計 {total:,.2f} 裝置小時 ({max(devices_count, 1)} 個裝置約 {wall:,.2f} 小時)\n")
+    return total
+
+
+def apply_budget(jobs, budget_hours, action="trim"):
+    """
+    依 cell 預算刪去任務 (任務順序不變)
+    Returns: 保留的 jobs
+    """
+    if budget_hours is None:
+        return jobs
+    if action not in BUDGET_ACTIONS:
+        raise ValueError(f"budget_action 必須是 {', '.join(BUDGET_ACTIONS)} 之一: {action}")
+
+    budget = budget_hours * 3600
+    over = {cell for cell, entry in estimate_cells(jobs).items() if entry["seconds"] > budget}
+    if not over:
+        return jobs
+    if action == "abort":
+        raise BudgetExceeded(f"{len(over)} 個 cell 超過 {budget_hours:g} 裝置小時的預算: {', '.join(sorted(over))}")
+
+    dropped = set()
+    if action == "skip":
+        dropped = {id(job) for job in jobs if job_cell(job) in over}
+    else:
+        # 預期時間短的任務優先保留
+        used = {}
+        for job in sorted(jobs, key=job_cost_seconds):
+            cell = job_cell(job)
+            if cell not in over:
+                continue
+            cost = job_cost_seconds(job)
+            if used.get(cell, 0.0) + cost > budget:
+                dropped.add(id(job))
+            else:
+                used[cell] = used.get(cell, 0.0) + cost
+
+    kept = [job for job in jobs if id(job) not in dropped]
+    for cell in sorted(over):
+        removed = [job["job_id"] for job in jobs if id(job) in dropped and job_cell(job) == cell]
+        print(f"[BUDGET] {cell}: {'略過整個 cell' if action == 'skip' else '刪去'} {len(removed)} 個任務"
+              + (f" ({', '.join(removed[:5])}{' ...' if len(removed) > 5 else ''})" if removed else ""))
+    return kept
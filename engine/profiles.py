@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+profiles.py - 各 round 的實驗設定 (取代 round1 / round2 之間複製貼上的腳本)
+
+每個 round 只描述與其他 round 不同的部分：
+    timeouts      - 依密碼長度的時間上限 [(最大長度, mask_timeout, dict_timeout), ...]，
+                    最後一項的最大長度為 None (其餘長度)
+    special_chars - gen_mask.py 判斷 ?s 的特殊字元 (產生的 mask 仍為 ?s，
+                    Hashcat 的 -1 字符集依 test_folder 由 runner.select_charset 決定)
+    seed          - 抽樣的隨機種子
+    matrix        - 宣告式的實驗矩陣 (長度 × 特殊字元數、抽樣數、攻擊 / hash 模式)，
+                    由 matrix.py 展開為 gen_mask 的來源檔與 run_m 的 CSV 列表
+                    (cell 的順序影響隨機抽樣的結果，不可任意調整)
+    wordlist      - (選用) Hybrid Attack 的來源字典，相對於 exam 目錄 (預設 dictionary/dictionary.txt，
+                    依詞長過濾後快取在 dictionary/by_length/)
+
+任務帳本、速度快取與結果快取都放在 exam/ 下，所有 round 共用。
+新增 round 時在 PROFILES 加一項 (可用 derive_profile 沿用既有 round 的設定)，
+並在 exam/<round>/ 放一份呼叫 engine.experiment 的 run_m.py / gen_mask.py。
+"""
+
+import copy
+
+# firsttest: data/basic{8-12}.txt，長度 11 和 12 隨機抽取 5 個
+FIRSTTEST_MATRIX = {
+    "test_folder": "firsttest",
+    "lengths": [8, 9, 10, 11, 12],
+    "special_counts": [None],
+    "samples": {11: 5, 12: 5},
+    "attack_modes": [3],
+    "hash_modes": ["100"],
+}
+
+# secondtest: data/len{8-10}/basic{n}+{1-4}.txt
+SECONDTEST_MATRIX = {
+    "test_folder": "secondtest",
+    "lengths": [8, 9, 10],
+    "special_counts": [1, 2, 3, 4],
+    "samples": None,
+    "attack_modes": [3],
+    "hash_modes": ["100"],
+}
+
+
+PROFILES = {
+    "round1": {
+        "timeouts": [(10, 43200, 54000), (11, 72000, 72000), (None, 86400, 86400)],
+        "special_chars": "#@!^%$^&",
+        "seed": 42,
+        "matrix": [FIRSTTEST_MATRIX, SECONDTEST_MATRIX],
+    },
+    "round2": {
+        "timeouts": [(10, 54000, 54000), (11, 72000, 72000), (None, 86400, 86400)],
+        # 修正：移除重複的 ^
+        "special_chars": "#@!^%$&",
+        "seed": 42,
+        # secondtest 每個 cell 隨機抽取 10 個
+        "matrix": [FIRSTTEST_MATRIX, dict(SECONDTEST_MATRIX, samples=10)],
+    },
+}
+
+
+def derive_profile(base, **changes):
+    """以既有 round 的設定為基礎，覆寫部分欄位"""
+    profile = copy.deepcopy(PROFILES[base])
+    profile.update(changes)
+    return profile
+
+
+def get_profile(round_name):
+    if round_name not in PROFILES:
+        raise KeyError(f"未定義的 round: {round_name} (可用: {', '.join(sorted(PROFILES))})")
+    return PROFILES[round_name]
+
+
+def timeouts_for(profile):
+    """
+    依 profile 的時間上限表產生 get_timeouts 函式 (password_length → (mask_timeout, dict_timeout))
+    有校正速度時 jobs.plan_jobs 會再依預期窮舉時間縮短
+    """
+    def get_timeouts(password_length):
+        for max_length, mask_timeout, dict_timeout in profile["timeouts"]:
+            if max_length is None or password_length <= max_length:
+                return mask_timeout, dict_timeout
+        raise ValueError(f"時間上限表沒有涵蓋長度 {password_length}")
+    return get_timeouts
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+pump.py - 以 bytes 大區塊讀取 Hashcat 輸出，只取出狀態 JSON 行
+
+原本以 text=True, bufsize=1 逐行讀取：每個位元組都要解碼、每行都要 strip 並加上
+[Hashcat] 前綴印出，但真正需要的只有 "{" 開頭且含 "status" 的狀態行。
+這裡改為讀取 bytes (read1 一次取得目前可讀的全部資料)，以 b"\\n" 切行：
+    - 只有狀態行會被解碼並交給呼叫端 (runner.parse_status_line)
+    - 其他行只放進固定長度的 ring buffer，Hashcat 異常結束或 verbose 模式時才印出
+
+verbose 預設由環境變數 HASHCAT_VERBOSE=1 開啟 (即時印出所有非狀態行)。
+"""
+
+import collections
+import os
+import subprocess
+
+CHUNK_SIZE = 64 * 1024
+
+# ring buffer 保留的非狀態行數
+OUTPUT_TAIL_LINES = 200
+
+STATUS_MARK = b'"status"'
+
+# Hashcat 的正常返回碼：0 已破解、1 已跑完
+OK_EXIT_CODES = (0, 1)
+
+
+def default_verbose():
+    return os.environ.get("HASHCAT_VERBOSE", "") not in ("", "0")
+
+
+def open_hashcat(cmd, cwd):
+    """
+    以 binary pipe 啟動 Hashcat (stderr 合併到 stdout)
+    Hashcat 在自己的 process group 中執行，watchdog.py 可一次終止整個 group
+    """
+    if os.name == "posix":
+        group = {"start_new_session": True}
+    else:
+        group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=cwd, **group)
+
+
+class OutputPump:
+    """
+    迭代 Hashcat 輸出中含 "status" 的行 (已解碼的 str，是否為狀態 JSON 由 parse_status_line 判斷)
+    其他行保留在 self.tail (最後 OUTPUT_TAIL_LINES 行)
+    """
+
+    def __init__(self, stream, verbose=None, tail_lines=OUTPUT_TAIL_LINES, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.verbose = default_verbose() if verbose is None else verbose
+        self.tail = collections.deque(maxlen=tail_lines)
+        self.chunk_size = chunk_size
+        self.lines = 0
+        self._pending = b""
+
+    def _other(self, lines):
+        if self.verbose:
+            for line in lines:
+                if line.strip():
+                    print(f"[Hashcat] {line.strip().decode('utf-8', 'replace')}")
+        else:
+            # 只有最後 maxlen 行會留在 ring buffer
+            lines = lines[-self.tail.maxlen:]
+        self.tail.extend(lines)
+
+    def _split(self, data, lines):
+        """將一批完整的行分為狀態行與其他行，回傳狀態行列表"""
+        self.lines += len(lines)
+        # 大部分區塊不含狀態行：不逐行檢查，整批放進 ring buffer
+        if STATUS_MARK not in data:
+            self._other(lines)
+            return []
+
+        self._other([line for line in lines if STATUS_MARK not in line])
+        return [line.strip().decode("utf-8", "replace") for line in lines if STATUS_MARK in line]
+
+    def feed(self, chunk):
+        """
+        加入一段讀到的輸出，回傳其中完整的狀態行
+        (aio.py 以 asyncio 的 StreamReader 讀取時直接呼叫)
+        """
+        data = self._pending + chunk
+        cut = data.rfind(b"\n") + 1
+        if cut == 0:
+            self._pending = data
+            return []
+        data, self._pending = data[:cut], data[cut:]
+        return self._split(data, data.split(b"\n")[:-1])
+
+    def flush(self):
+        """輸出結束時處理最後一段沒有換行的內容"""
+        pending, self._pending = self._pending, b""
+        return self._split(pending, [pending]) if pending else []
+
+    def __iter__(self):
+        read = getattr(self.stream, "read1", self.stream.read)
+        while True:
+            chunk = read(self.chunk_size)
+            if not chunk:
+                break
+            yield from self.feed(chunk)
+        yield from self.flush()
+
+    def dump_tail(self, reason=""):
+        """印出 ring buffer 中的最後幾行輸出"""
+        if not self.tail:
+            return
+        print(f"[Hashcat] ---- 最後 {len(self.tail)} 行輸出{f' ({reason})' if reason else ''} ----")
+        for line in self.tail:
+            if line.strip():
+                print(f"[Hashcat] {line.strip().decode('utf-8', 'replace')}")
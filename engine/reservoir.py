@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+reservoir.py - 從外洩密碼清單一次循序讀取，分層抽樣產生各 round 的 data/basic*.txt
+
+firsttest/data/basic{L}.txt 與 secondtest/data/len{L}/basic{L}+{k}.txt 原本為人工挑選，
+gen_mask 再以 random.sample 從記憶體中的列表抽樣。本模組以 structure.analyze_corpus 逐塊讀取
+數 GB 的清單 (例如 hashmob.net.user.found.txt) 一次，為每個 stratum 保留固定大小的 reservoir：
+    長度 × 特殊字元數 × 非字母位置 × 字元類別數
+    非字母位置 (POSITIONS)：letters (只有字母)、prefix (數字 / 特殊字元只在開頭)、
+                            suffix (只在結尾)、mixed (其他，包含沒有字母的密碼)
+    字元類別數：?l ?u ?d ?s 出現幾種 (1-4)
+特殊字元依 profile 的 special_chars (與 genmask 相同)；含其他字元 (?a，例如空白) 或非 ASCII 字元的密碼
+不在 Mask Attack 的字符集中，不列入抽樣。只保留實驗矩陣用到的長度。
+
+抽樣方式 (bottom-k)：檔案中的每一列依序取得一個 seed 決定的隨機優先值，每個 stratum 保留
+優先值最小的 k 列，即該 stratum 的均勻抽樣 (不放回)；結果只取決於檔案內容與 seed，與分塊大小無關。
+輸出時每個 txt 由符合的 stratum (長度，以及 secondtest 的特殊字元數) 依 stratum 順序輪流取出
+優先值最小的列，直到 per_file 列，讓各種結構平均出現。
+
+既有的 mask_data CSV 若仍符合長度 / 特殊字元數的條件不會重新產生 (genmask 的智慧跳過)，
+重新抽樣後需刪除 CSV 才會以新的 txt 產生。
+"""
+
+import os
+
+import numpy as np
+
+from engine.matrix import expand_matrix
+from engine.structure import CLASS_CODES, analyze_corpus
+
+POSITIONS = ("letters", "prefix", "suffix", "mixed")
+
+# 每個 txt 的密碼數 (profile 的 samples 較小時，gen_mask 再從中抽樣)
+PER_FILE = 100
+
+LETTER_CLASSES = (CLASS_CODES["l"], CLASS_CODES["u"])
+DIVERSITY_CLASSES = [CLASS_CODES[name] - 1 for name in ("l", "u", "d", "s")]
+
+
+def stratum_key(length, special_count, position, diversity):
+    return (int(length), int(special_count), POSITIONS[position], int(diversity))
+
+
+def chunk_strata(chunk):
+    """
+    每列的 stratum (長度、特殊字元數、非字母位置、字元類別數) 與是否可抽樣 (沒有 ?a)
+    Returns: (lengths, special_counts, positions, diversity, usable)
+    """
+    lengths = chunk["lengths"]
+    counts = chunk["counts"]
+    offsets = chunk["run_offsets"]
+    n = len(lengths)
+
+    letters = counts[:, CLASS_CODES["l"] - 1] + counts[:, CLASS_CODES["u"] - 1]
+    others = lengths - letters
+    # 連續的非字母 run (例如 ?d 後接 ?s) 合為一段：前一段 run 為字母或是列的第一段時才算新的一段
+    # (空行已略過，每列至少有一段 run)
+    firsts = offsets[:-1]
+    is_letter = np.isin(chunk["run_classes"], LETTER_CLASSES)
+    block_start = ~is_letter
+    block_start[1:] &= is_letter[:-1]
+    block_start[firsts] = ~is_letter[firsts]
+    blocks = np.zeros(len(block_start) + 1, dtype=np.int64)
+    np.cumsum(block_start, out=blocks[1:])
+    blocks = blocks[offsets[1:]] - blocks[firsts]
+    first_is_letter = is_letter[firsts]
+
+    positions = np.full(n, POSITIONS.index("mixed"), dtype=np.int64)
+    single = (blocks == 1) & (letters > 0)
+    positions[single & ~first_is_letter] = POSITIONS.index("prefix")
+    positions[single & first_is_letter] = POSITIONS.index("suffix")
+    positions[others == 0] = POSITIONS.index("letters")
+
+    diversity = (counts[:, DIVERSITY_CLASSES] > 0).sum(axis=1)
+    usable = counts[:, CLASS_CODES["a"] - 1] == 0
+    return lengths, counts[:, CLASS_CODES["s"] - 1], positions, diversity, usable
+
+
+def _row_text(codes, start, length):
+    if codes.dtype == np.uint8:
+        return codes[start:start + length].tobytes().decode("ascii")
+    return codes[start:start + length].tobytes().decode("utf-32-le")
+
+
+def sample_strata(wordlist_path, special_chars, lengths, k=PER_FILE, seed=42, chunk_bytes=None):
+    """
+    一次讀取 wordlist_path，為每個 stratum 保留優先值最小的 k 列
+    lengths: 保留的密碼長度
+    Returns: dict {stratum_key: [(優先值, 密碼), ...] (依優先值排序)}, 讀取的列數
+    """
+    rng = np.random.default_rng(seed)
+    wanted = np.array(sorted(set(lengths)), dtype=np.int64)
+    kwargs = {"chunk_bytes": chunk_bytes} if chunk_bytes else {}
+
+    # 目前的 reservoir (所有 stratum 合併)：stratum 編號、優先值、密碼
+    keys = np.zeros(0, dtype=np.int64)
+    priorities = np.zeros(0)
+    passwords = np.zeros(0, dtype=object)
+    rows = 0
+    for chunk in analyze_corpus(wordlist_path, special_chars, fields=("counts", "runs"), **kwargs):
+        n = len(chunk["lengths"])
+        chunk_priorities = rng.random(n)
+        rows += n
+        row_lengths, specials, positions, diversity, usable = chunk_strata(chunk)
+        if chunk["codes"].dtype != np.uint8:
+            # 非 ASCII 的字母 (例如 é) 在 genmask 的規則中為 ?l，但不在 Hashcat 的 ?l 中
+            non_ascii = np.zeros(len(chunk["codes"]) + 1, dtype=np.int64)
+            np.cumsum(chunk["codes"] >= 128, out=non_ascii[1:])
+            usable &= non_ascii[chunk["starts"] + row_lengths] == non_ascii[chunk["starts"]]
+        selected = np.flatnonzero(usable & np.isin(row_lengths, wanted))
+        chunk_keys = ((row_lengths[selected] * 64 + np.minimum(specials[selected], 63)) * len(POSITIONS)
+                      + positions[selected]) * 8 + diversity[selected]
+
+        # 先在這一塊中取每個 stratum 的前 k 名，只解碼這些列，再與目前的 reservoir 合併
+        order = np.lexsort((chunk_priorities[selected], chunk_keys))
+        keep = order[_group_rank(chunk_keys[order]) < k]
+        texts = np.empty(len(keep), dtype=object)
+        texts[:] = [_row_text(chunk["codes"], chunk["starts"][selected[i]], row_lengths[selected[i]]) for i in keep]
+        keys = np.concatenate([keys, chunk_keys[keep]])
+        priorities = np.concatenate([priorities, chunk_priorities[selected[keep]]])
+        passwords = np.concatenate([passwords, texts])
+
+        order = np.lexsort((priorities, keys))
+        keep = order[_group_rank(keys[order]) < k]
+        keys, priorities, passwords = keys[keep], priorities[keep], passwords[keep]
+
+    strata = {}
+    for key, priority, password in zip(keys.tolist(), priorities.tolist(), passwords.tolist()):
+        diversity, rest = key % 8, key // 8
+        position, rest = rest % len(POSITIONS), rest // len(POSITIONS)
+        strata.setdefault(stratum_key(rest // 64, rest % 64, position, diversity), []).append((priority, password))
+    return strata, rows
+
+
+def _group_rank(sorted_keys):
+    """已排序的 key 中每個元素在同 key 群組內的名次 (0 起算)"""
+    if not len(sorted_keys):
+        return np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]]))
+    index = np.arange(len(sorted_keys))
+    return index - np.repeat(starts, np.diff(np.append(starts, len(sorted_keys))))
+
+
+def pick_stratified(strata, length, special_count=None, count=PER_FILE):
+    """由符合長度 (與特殊字元數) 的 stratum 依序輪流取出優先值最小的列，共 count 列"""
+    groups = [items for key, items in sorted(strata.items())
+              if key[0] == length and (special_count is None or key[1] == special_count)]
+    picked = []
+    depth = 0
+    while len(picked) < count and any(depth < len(items) for items in groups):
+        for items in groups:
+            if depth < len(items) and len(picked) < count:
+                picked.append(items[depth][1])
+        depth += 1
+    return picked
+
+
+def write_round_inputs(profile, round_dir, wordlist_path, per_file=PER_FILE, chunk_bytes=None):
+    """
+    依 profile 的實驗矩陣，從 wordlist_path 抽樣寫出 <round>/<test_folder>/data/ 的 txt
+    Returns: dict {txt 路徑: 列數}
+    """
+    cells = expand_matrix(profile)
+    strata, rows = sample_strata(wordlist_path, profile["special_chars"], {cell["length"] for cell in cells},
+                                 k=per_file, seed=profile["seed"], chunk_bytes=chunk_bytes)
+    print(f"[SAMPLE] {wordlist_path}: 讀取 {rows:,} 列，{len(strata)} 個 stratum")
+
+    written = {}
+    for cell in cells:
+        txt_path = os.path.join(round_dir, cell["test_folder"], "data", cell["txt"])
+        if txt_path in written:
+            continue
+        picked = pick_stratified(strata, cell["length"], cell["special_count"], per_file)
+        if not picked:
+            print(f"[WARN] {cell['test_folder']}/{cell['txt']}: 沒有符合的密碼，不寫出")
+            continue
+        os.makedirs(os.path.dirname(txt_path), exist_ok=True)
+        with open(txt_path + ".tmp", "w", encoding="utf-8", newline="\n") as f:
+            f.write("\n".join(picked) + "\n")
+        os.replace(txt_path + ".tmp", txt_path)
+        written[txt_path] = len(picked)
+        print(f"[SAMPLE]   {cell['test_folder']}/{cell['txt']}: {len(picked)} 個密碼"
+              + (f" (不足 {per_file})" if len(picked) < per_file else ""))
+    return written
+
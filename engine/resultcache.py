@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+resultcache.py - 跨 round 的結果快取 (以內容定址)
+
+round1 與 round2 由相同的 gen_mask.py、相同的 seed 產生，CSV 名稱也相同，
+同一個 hash 常在完全相同的設定下被重複破解。快取以下列內容的 SHA-256 為鍵：
+    hash 值、hash 模式、攻擊模式、?s → ?1 轉換後的 mask、-1 字符集 (hex)、
+    Hashcat 版本 (hashcat --version，與是否校正無關)、裝置指紋 (型號 + 驅動，與 calibration.py 的速度快取相同)
+mask 不含 ?s 時字符集不影響結果，鍵中的字符集為空字串 (firsttest / secondtest 共用)。
+Hybrid 任務 (hybrid.py) 的 mask 為字典詞之外的部分，鍵另外加上依長度過濾後字典的 SHA-256。
+
+快取位於 exam/result_cache/<鍵的前 2 碼>/<鍵>.json，只存放有結論的結果：
+    已破解 (破解時間不超過這次的時間上限才沿用)
+    已跑完整個 mask (執行時間不超過這次的時間上限才沿用)
+逾時、停滯、取消與錯誤的結果不寫入。
+命中時直接寫出結果 JSON (Result_Cache_Hit=True)，不啟動 Hashcat；
+需要重複量測時 (run_m.py 的 REPEAT_MEASUREMENTS) 仍會執行並以新的結果更新快取。
+keyspace 切片任務分散在多個裝置上執行，不使用快取。
+"""
+
+import hashlib
+import json
+import os
+
+from engine.calibration import device_fingerprint
+from engine.runner import select_charset
+from engine.statuslog import write_json_atomic
+
+RESULT_CACHE_DIR = "result_cache"
+
+# jobs.py 目前只執行 SHA-1 (-m 100)；沒有 attack_mode 欄位的任務為 Mask Attack
+HASH_MODE = "100"
+ATTACK_MODE = 3
+
+
+def default_cache_dir(exam_dir):
+    return os.path.join(exam_dir, RESULT_CACHE_DIR)
+
+
+def effective_mask(mask, test_folder):
+    """與 build_hashcat_command 相同的 ?s → ?1 轉換；Returns: (mask, 字符集 hex 或 "")"""
+    if "?s" not in mask:
+        return mask, ""
+    return mask.replace("?s", "?1"), select_charset(test_folder)[0]
+
+
+def device_key(device, hashcat_version):
+    """Hashcat 版本 + 裝置指紋 (未指定裝置時為 "default")"""
+    return f"{hashcat_version}|{device_fingerprint(device) if device is not None else 'default'}"
+
+
+def cache_key(hashvalue, mask, test_folder, device, hashcat_version, hash_mode=HASH_MODE, attack_mode=ATTACK_MODE,
+              wordlist_sha256=None):
+    mask, charset_hex = effective_mask(mask, test_folder)
+    parts = [hashvalue.strip().lower(), str(hash_mode), str(attack_mode), mask, charset_hex,
+             device_key(device, hashcat_version)]
+    if wordlist_sha256:
+        parts.append(wordlist_sha256)
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def job_cache_key(job, hashvalue, device):
+    return cache_key(hashvalue, job["mask"], job["test_folder"], device, job["result_cache"]["hashcat_version"],
+                     attack_mode=job.get("attack_mode", ATTACK_MODE), wordlist_sha256=job.get("wordlist_sha256"))
+
+
+def cache_entry_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], f"{key}.json")
+
+
+def is_cracked(result):
+    return result.get("Cracked_Password", "Na") not in ("Na", None, "")
+
+
+def is_cacheable(result):
+    """已破解或正常跑完整個 mask 的結果才寫入快取"""
+    if not result:
+        return False
+    if is_cracked(result):
+        return True
+    return result.get("Process_Exit_Code") == 1 and result.get("Stop_Reason", "exit") == "exit"
+
+
+def is_reusable(result, max_seconds):
+    """快取的結果在這次的時間上限內是否會得到相同結論"""
+    if is_cracked(result):
+        seconds = result.get("Crack_Seconds_From_Start", result.get("Actual_Runtime_Seconds"))
+    else:
+        seconds = result.get("Actual_Runtime_Seconds")
+    return seconds is not None and seconds <= max_seconds
+
+
+def load_entry(cache_dir, key):
+    path = cache_entry_path(cache_dir, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] 讀取結果快取失敗: {path} ({e})")
+        return None
+
+
+def cached_job_results(job, device):
+    """
+    任務的所有目標都能沿用快取時，寫出結果 JSON 並回傳結果 (與 execute_job 的回傳值相同)
+    只有部分命中的批次任務仍整批執行 (批次的時間由 mask 決定，少跑幾個 hash 不會更快)
+    Returns: dict {output_json_path: 結果 dict} 或 None
+    """
+    cache = job.get("result_cache")
+    if not cache or not cache["reuse"] or job.get("shard"):
+        return None
+
+    hits = {}
+    for hashvalue, output_json_path in job["targets"]:
+        key = job_cache_key(job, hashvalue, device)
+        entry = load_entry(cache["dir"], key)
+        if entry is None or not is_reusable(entry["result"], job["max_seconds"]):
+            return None
+        hits[output_json_path] = (key, entry)
+
+    results = {}
+    for output_json_path, (key, entry) in hits.items():
+        result = dict(entry["result"])
+        result.update({
+            "Max_Time_Limit_Seconds": job["max_seconds"],
+            "Result_Cache_Hit": True,
+            "Result_Cache_Key": key,
+            "Result_Cache_Source": entry["source"],
+        })
+        write_json_atomic(output_json_path, result)
+        results[output_json_path] = result
+    print(f"[CACHE] {job['job_id']} 沿用快取結果 ({len(results)} 個 hash，來源: "
+          f"{', '.join(sorted({entry['source'] for _, entry in hits.values()}))})")
+    return results
+
+
+def store_job_results(job, device, results):
+    """將任務中有結論的結果寫入快取 (快取命中的結果不再寫回)"""
+    cache = job.get("result_cache")
+    if not cache or not results or job.get("shard"):
+        return
+    for hashvalue, output_json_path in job["targets"]:
+        result = results.get(output_json_path)
+        if not is_cacheable(result) or result.get("Result_Cache_Hit"):
+            continue
+        key = job_cache_key(job, hashvalue, device)
+        mask, charset_hex = effective_mask(job["mask"], job["test_folder"])
+        path = cache_entry_path(cache["dir"], key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_json_atomic(path, {
+            "hashvalue": hashvalue.strip().lower(),
+            "hash_mode": HASH_MODE,
+            "attack_mode": job.get("attack_mode", ATTACK_MODE),
+            "mask": mask,
+            "wordlist_sha256": job.get("wordlist_sha256"),
+            "charset_hex": charset_hex,
+            "device": device_key(device, cache["hashcat_version"]),
+            "source": output_json_path,
+            "result": result,
+        })
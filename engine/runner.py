@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+"""
+runner.py - 單一 Hashcat 任務的執行與結果記錄
+(原本位於 round1/run_m.py 與 round2/run_m.py 的重複程式碼)
+"""
+
+import json
+import datetime
+import os
+
+from engine.crackwatch import CrackWatcher, outfile_args
+from engine.pump import OK_EXIT_CODES, OutputPump, open_hashcat
+from engine.session import SESSION_FINISHED, SESSION_RUNNING, restore_command, session_fields
+from engine.statuslog import append_status, open_status_log, write_json_atomic
+from engine.watchdog import STALL_SECONDS, STOP_CANCELLED, STOP_EXIT, Watchdog
+
+# 自定義特殊字符集（與 gen_mask.py 和 eval.py 保持一致）
+SPECIAL_CHARS = "#@!^%$^&"
+SPECIAL_CHARS_HEX = "2340215e25245e26"
+
+# secondtest 使用的完整特殊字符集（去除可能引發錯誤的字符）
+# 原始 ?s 包含：空格!"#$%&'()*+,-./:;<=>?@[\]^_`{|}~
+# 去除可能引發錯誤的字符：\ ` [ ] (這些字符在命令行可能有特殊意義)
+SPECIAL_CHARS_FULL = " !\"#$%&'()*+,-./:;<=>?@^_{}|~"
+SPECIAL_CHARS_FULL_HEX = "202122232425262728292a2b2c2d2e2f3a3b3c3d3e3f405e5f7b7d7c7e"
+
+MODE_NAMES = {
+    3: "Mask Attack (3)",
+    0: "Dictionary Attack (0)",
+    6: "Hybrid Attack: Dict+Mask (6)",
+    7: "Hybrid Attack: Mask+Dict (7)"
+}
+
+# 定義狀態代碼對照表 (參考 Hashcat 文件)
+STATUS_MAP = {
+    1: "Initializing",
+    2: "Autotuning",
+    3: "Running",
+    4: "Paused",
+    5: "Exhausted",
+    6: "Cracked",
+    7: "Aborted",
+    8: "Quit",
+    9: "Bypass",
+    10: "Checkpoint",
+    11: "Error"
+}
+
+
+def select_charset(test_folder):
+    """根據 test_folder 選擇特殊字符集，回傳 (hex, 顯示用字串)"""
+    if test_folder == "secondtest":
+        # secondtest: 使用完整的特殊字符集（去除可能引發錯誤的字符）
+        return SPECIAL_CHARS_FULL_HEX, SPECIAL_CHARS_FULL
+    # firsttest: 使用原本的自定義字符集
+    return SPECIAL_CHARS_HEX, SPECIAL_CHARS
+
+
+def build_hashcat_command(
+    hashcat_base_cmd,
+    mode,
+    attack_payload,
+    hybrid_mask=None,
+    test_folder=None,
+    status_timer=60
+):
+    """
+    組出完整的 Hashcat 指令
+    Returns: (cmd, attack_payload, hybrid_mask) - 後兩者為 ?s → ?1 轉換後的值
+    """
+    cmd = list(hashcat_base_cmd)
+
+    # 將 -w 3 改為 -w 4 (Nightmare mode)
+    cmd = [c for c in cmd if not c.startswith("-w")]
+    cmd.extend(["-w", "4"])  # Nightmare mode: 最高性能
+
+    special_chars_hex, special_chars_display = select_charset(test_folder)
+
+    # 如果 mask 中包含 ?s，則替換為自定義字符集 -1 (使用 hex 格式避免 [] 等特殊字符問題)
+    if mode == 3 and "?s" in attack_payload:
+        # 將 ?s 替換為 ?1
+        custom_mask = attack_payload.replace("?s", "?1")
+        # 添加 hex 格式的自定義字符集
+        cmd.extend(["--hex-charset", "-1", special_chars_hex])
+        print(f"[INFO] 測試類型: {test_folder}")
+        print(f"[INFO] 使用自定義特殊字符集 (hex): {special_chars_hex}")
+        print(f"[INFO] 字符集內容: {special_chars_display}")
+        print(f"[INFO] Mask 轉換: {attack_payload} → {custom_mask}")
+        attack_payload = custom_mask
+    elif mode in [6, 7] and hybrid_mask and "?s" in hybrid_mask:
+        # Hybrid 模式的 mask 也需要處理
+        custom_mask = hybrid_mask.replace("?s", "?1")
+        cmd.extend(["--hex-charset", "-1", special_chars_hex])
+        print(f"[INFO] 測試類型: {test_folder}")
+        print(f"[INFO] 使用自定義特殊字符集 (hex): {special_chars_hex}")
+        print(f"[INFO] 字符集內容: {special_chars_display}")
+        print(f"[INFO] Hybrid Mask 轉換: {hybrid_mask} → {custom_mask}")
+        hybrid_mask = custom_mask
+
+    # 攻擊模式
+    if mode == 3:
+        cmd.extend(["-a", "3", attack_payload])
+    elif mode == 0:
+        cmd.extend(["-a", "0", attack_payload])
+    elif mode == 6:
+        # Hybrid mode: dictionary + mask
+        cmd.extend(["-a", "6", attack_payload, hybrid_mask])
+    elif mode == 7:
+        # Hybrid mode: mask + dictionary
+        cmd.extend(["-a", "7", hybrid_mask, attack_payload])
+
+    # 狀態監控參數
+    cmd = [c for c in cmd if not c.startswith("--status-timer")]
+    if "--status" not in cmd:
+        cmd.append("--status")
+    if "--status-json" not in cmd:
+        cmd.append("--status-json")
+    cmd.append(f"--status-timer={status_timer}")  # 預設每 60 秒更新一次，減少 I/O 開銷
+
+    # GPU 性能優化參數
+    cmd.append("-O")               # 啟用優化核心
+
+    # 強制執行
+    if "--force" not in cmd:
+        cmd.append("--force")
+
+    return cmd, attack_payload, hybrid_mask
+
+
+def parse_status_line(line):
+    """
+    解析一行 Hashcat --status-json 輸出
+    Returns: dict 或 None (非狀態行)
+    """
+    if not (line.startswith("{") and '"status"' in line):
+        return None
+
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+
+    # 1. Status: 嘗試讀取 status_string，若無則讀取 status 代碼並轉換
+    status_code = data.get("status", -1)
+    status_str = data.get("status_string")
+    if not status_str:
+        status_str = STATUS_MAP.get(status_code, "Unknown")
+
+    # 2. Guess Mask: 嘗試讀取 guess_mask，若無則讀取 guess_base
+    guess_data = data.get("guess", {})
+    guess_mask = guess_data.get("guess_mask")
+    if not guess_mask:
+        guess_mask = guess_data.get("guess_base", "Unknown")
+
+    return {
+        "status_code": status_code,
+        "status": status_str,
+        "guess_mask": guess_mask,
+        "progress": data.get("progress", []),
+        "recovered": data.get("recovered_hashes", []),
+        "time_elapsed": data.get("time_elapsed", 0),
+        "time_estimated": data.get("time_estimated", 0),
+        "speed": sum(d.get("speed", 0) for d in data.get("devices", [])),
+    }
+
+
+def read_potfile(potfile_path, hashes):
+    """
+    從 potfile 讀取指定 hash 的破解結果
+    Returns: dict {hash: password}
+    """
+    wanted = {h.lower() for h in hashes if h}
+    found = {}
+    if not wanted or not os.path.exists(potfile_path):
+        return found
+
+    try:
+        with open(potfile_path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                # potfile 格式通常是 hash:password
+                parts = line.split(":", 1)
+                if len(parts) == 2 and parts[0].lower() in wanted:
+                    found[parts[0].lower()] = parts[1]
+    except Exception as e:
+        print(f"[WARN] 讀取 potfile 失敗: {e}")
+
+    return found
+
+
+def clear_potfile(potfile_path):
+    """清空 potfile"""
+    if os.path.exists(potfile_path):
+        try:
+            with open(potfile_path, 'w', encoding='utf-8') as f:
+                f.write("")  # 清空內容
+            print(f"[CLEAN] 已清空 potfile: {potfile_path}")
+        except Exception as e:
+            print(f"[WARN] 清空 potfile 失敗: {e}")
+
+
+def default_potfile_path(hashcat_exe_path):
+    """hashcat 預設會將結果寫入執行檔目錄下的 hashcat.potfile"""
+    return os.path.join(os.path.dirname(hashcat_exe_path), "hashcat.potfile")
+
+
+def default_outfile_path(hash_file_path):
+    """破解事件 outfile 放在 hash 檔旁邊"""
+    return os.path.splitext(hash_file_path)[0] + "_outfile.txt"
+
+
+def apply_job_files(cmd, hash_file_path, potfile_path=None, outfile_path=None, session=None,
+                    restore_file_path=None):
+    """
+    在指令中加入 outfile / potfile / session / restore 檔參數
+    potfile_path 為 None 時沿用 hashcat 目錄下共用的 hashcat.potfile (執行後需清空)，
+    否則以 --potfile-path 指定任務專屬的 potfile
+    Returns: (potfile_path, outfile_path, shared_potfile)
+    """
+    shared_potfile = potfile_path is None
+    if shared_potfile:
+        potfile_path = default_potfile_path(cmd[0])
+    else:
+        cmd.extend(["--potfile-path", potfile_path])
+    if outfile_path is None:
+        outfile_path = default_outfile_path(hash_file_path)
+    cmd.extend(outfile_args(outfile_path))
+    if session:
+        cmd.extend(["--session", session])
+    if restore_file_path:
+        cmd.extend(["--restore-file-path", restore_file_path])
+    return potfile_path, outfile_path, shared_potfile
+
+
+def crack_event_fields(event):
+    """將 CrackWatcher 的破解事件轉為結果 JSON 欄位"""
+    return {
+        "Crack_Seconds_From_Start": event["seconds_from_start"],
+        "Crack_Seconds_After_Autotune": event["seconds_after_autotune"],
+        "Crack_Time_Reference": event["reference"],
+        "Crack_Position": event["crack_pos"],
+        "Crack_Timestamp": event["hashcat_timestamp"],
+    }
+
+
+def prepare_task(
+    hashcat_base_cmd,
+    mode,
+    attack_payload,
+    max_seconds,
+    output_json_path,
+    hybrid_mask=None,
+    test_folder=None,
+    hash_file_path=None,
+    potfile_path=None,
+    outfile_path=None,
+    session=None,
+    extra_fields=None,
+    restore_file_path=None,
+    resume=None
+):
+    """
+    組出指令與初始的結果 dict (run_hashcat_task 與 aio.py 共用)
+    Returns: task dict，交給 start_task / update_task_status / finish_task
+    """
+    cmd, attack_payload, hybrid_mask = build_hashcat_command(
+        hashcat_base_cmd, mode, attack_payload, hybrid_mask, test_folder
+    )
+
+    if hash_file_path is None:
+        hash_file_path = hashcat_base_cmd[-1]
+    potfile_path, outfile_path, shared_potfile = apply_job_files(
+        cmd, hash_file_path, potfile_path, outfile_path, session, restore_file_path
+    )
+
+    # 續跑：沿用 restore 檔中的原始參數，時間從先前累計的秒數繼續計算
+    elapsed_before = resume["elapsed"] if resume else 0.0
+    if resume:
+        cmd = restore_command(cmd[0], session, restore_file_path)
+        print(f"[RESUME] {session} 第 {resume['resume_count']} 次續跑，先前已執行 {elapsed_before:.1f}s")
+
+    print("\n[RUN] Hashcat Command:", " ".join(cmd))
+
+    final_status = {
+        "Attack_Mode": MODE_NAMES.get(mode, f"Unknown Mode ({mode})"),
+        "Attack_Payload": attack_payload,
+        "Hybrid_Mask": hybrid_mask if mode in [6, 7] else None,
+        "Status": "Initializing",
+        "Max_Time_Limit_Seconds": max_seconds,
+    }
+    final_status.update(extra_fields or {})
+    if session and restore_file_path:
+        final_status.update(session_fields(
+            session, restore_file_path, SESSION_RUNNING, elapsed_before, resume["resume_count"] if resume else 0
+        ))
+
+    # 取得 hashcat 所在目錄
+    hashcat_dir = os.path.dirname(cmd[0])
+    print(f"[INFO] Hashcat 工作目錄: {hashcat_dir}")
+
+    return {
+        "cmd": cmd,
+        "hashcat_dir": hashcat_dir,
+        "mode": mode,
+        "attack_payload": attack_payload,
+        "hybrid_mask": hybrid_mask,
+        "max_seconds": max_seconds,
+        "output_json_path": output_json_path,
+        "hash_file_path": hash_file_path,
+        "potfile_path": potfile_path,
+        "outfile_path": outfile_path,
+        "shared_potfile": shared_potfile,
+        "elapsed_before": elapsed_before,
+        "resume": resume,
+        "final_status": final_status,
+        # 有校正速度時 (calibration.py)，將 progress 換算為預期經過時間
+        "calibrated_speed": final_status.get("Calibrated_Speed"),
+    }
+
+
+def start_task(task):
+    """Hashcat 啟動後呼叫：記錄開始時間並開啟狀態記錄"""
+    task["run_start_time"] = datetime.datetime.now()
+    # 執行期間的狀態只追加到 JSONL 記錄，結果 JSON 在結束時一次寫出
+    task["status_log"] = open_status_log(task["output_json_path"], resume=task["resume"] is not None)
+
+
+def update_task_status(task, status):
+    """以一個狀態行 (parse_status_line 的回傳值) 更新目前狀態並追加到狀態記錄"""
+    final_status = task["final_status"]
+    calibrated_speed = task["calibrated_speed"]
+    progress = status["progress"]
+    time_elapsed = status["time_elapsed"]
+
+    # 計算實際執行時間
+    current_time = datetime.datetime.now()
+    actual_elapsed = task["elapsed_before"] + (current_time - task["run_start_time"]).total_seconds()
+
+    # 更新目前狀態
+    final_status.update({
+        "Status": status["status"],
+        "Guess.Mask": status["guess_mask"],
+        "Progress": progress,
+        "Hashcat_Reported_Time_Seconds": time_elapsed,
+        "Actual_Runtime_Seconds": round(actual_elapsed, 2),
+        "Estimated_Left_Seconds": status["time_estimated"],
+        "Last_Update": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    if calibrated_speed and progress:
+        final_status["Expected_Seconds_From_Progress"] = round(progress[0] / calibrated_speed, 2)
+    append_status(task["status_log"], final_status)
+
+    # 顯示目前狀態（減少顯示頻率）
+    if time_elapsed % 60 < 5:  # 每分鐘只顯示一次
+        progress_str = f"{progress[0]}/{progress[1]}" if len(progress) >= 2 else "N/A"
+        print(f"\n >> [Status] {status['status']} | Time: {time_elapsed}s | Progress: {progress_str}")
+
+
+def finish_task(task, returncode, crack_events, stop_fields, cancelled=None):
+    """
+    Hashcat 結束後呼叫：整理破解結果、寫出結果 JSON
+    crack_events: CrackWatcher.results()
+    stop_fields: Watchdog.result_fields() (Stop_Reason / Killed)
+    cancelled: 有 cancel_event 時為是否因取消而終止，否則為 None
+    Returns: 結果 dict
+    """
+    final_status = task["final_status"]
+    mode = task["mode"]
+    print()  # 換行，結束狀態列
+    print(f"[INFO] Hashcat 程序已結束，返回碼: {returncode}")
+
+    # ======= 結束時間：真正程式結束的時間 =======
+    run_start_time = task["run_start_time"]
+    run_end_time = datetime.datetime.now()
+    actual_runtime = task["elapsed_before"] + (run_end_time - run_start_time).total_seconds()
+
+    final_status["Started"] = run_start_time.strftime("%Y-%m-%d %H:%M:%S")
+    final_status["Finished"] = run_end_time.strftime("%Y-%m-%d %H:%M:%S")
+    final_status["Actual_Runtime_Seconds"] = round(actual_runtime, 2)
+    final_status["Attack_Mode"] = MODE_NAMES.get(mode, f"Unknown Mode ({mode})")
+    final_status["Attack_Payload"] = task["attack_payload"]
+    if mode in [6, 7]:
+        final_status["Hybrid_Mask"] = task["hybrid_mask"]
+    final_status["Command"] = " ".join(task["cmd"])
+    final_status["Process_Exit_Code"] = returncode
+    final_status["Max_Time_Limit_Seconds"] = task["max_seconds"]
+    final_status.update(stop_fields)
+    if cancelled is not None:
+        final_status["Cancelled"] = cancelled
+    if "Session_State" in final_status:
+        final_status["Session_State"] = SESSION_FINISHED
+
+    # 讀取目前的 hash 值
+    current_hash = ""
+    if os.path.exists(task["hash_file_path"]):
+        with open(task["hash_file_path"], "r", encoding="utf-8") as f:
+            current_hash = f.read().strip().lower()
+
+    # ======= 破解結果：優先採用 outfile 的破解事件，否則讀取 potfile =======
+    event = crack_events.get(current_hash)
+    if event:
+        final_status["Cracked_Password"] = event["password"]
+        final_status.update(crack_event_fields(event))
+        if task["calibrated_speed"]:
+            final_status["Expected_Seconds_From_Progress"] = round(event["crack_pos"] / task["calibrated_speed"], 2)
+    else:
+        cracked = read_potfile(task["potfile_path"], [current_hash])
+        final_status["Cracked_Password"] = cracked.get(current_hash, "Na")
+
+    # 顯示最終清楚的結果
+    print("\n" + "="*50)
+    print(f" RESULT SUMMARY")
+    print(f" Mode          : {final_status.get('Attack_Mode', 'Unknown')}")
+    print(f" Payload       : {task['attack_payload']}")
+    print(f" Status        : {final_status.get('Status', 'Unknown')}")
+    print(f" Password      : {final_status.get('Cracked_Password', 'Na')}")
+    print(f" Actual Time   : {final_status.get('Actual_Runtime_Seconds', 0)}s")
+    print(f" Hashcat Time  : {final_status.get('Hashcat_Reported_Time_Seconds', 0)}s")
+    print(f" Exit Code     : {returncode}")
+    print("="*50 + "\n")
+
+    # 寫入 final JSON (狀態記錄的最後一行與結果 JSON 相同)
+    append_status(task["status_log"], final_status)
+    task["status_log"].close()
+    write_json_atomic(task["output_json_path"], final_status)
+
+    # ======= 清空共用 potfile (任務專屬 potfile 隨工作目錄刪除) =======
+    if task["shared_potfile"]:
+        clear_potfile(task["potfile_path"])
+
+    return final_status
+
+
+def run_hashcat_task(
+    hashcat_base_cmd,
+    mode,
+    attack_payload,
+    max_seconds,
+    output_json_path,
+    hybrid_mask=None,  # 新增：混合模式的 mask
+    test_folder=None,  # 新增：用於判斷是 firsttest 還是 secondtest
+    hash_file_path=None,  # hash 檔路徑，預設為 hashcat_base_cmd 的最後一個參數
+    potfile_path=None,    # 任務專屬 potfile，預設為 hashcat 目錄下共用的 hashcat.potfile
+    outfile_path=None,    # 破解事件 outfile，預設為 hash 檔旁的 *_outfile.txt
+    session=None,         # Hashcat session 名稱，同時執行多個任務時必須不同
+    extra_fields=None,    # 額外寫入結果 JSON 的欄位 (例如使用的裝置)
+    restore_file_path=None,  # session 的 restore 檔，中斷後可用 --restore 續跑
+    resume=None,          # session.read_resume_state 的回傳值，不為 None 時以 --restore 續跑
+    cancel_event=None,    # threading.Event，被設定時立即終止 Hashcat (例如同組切片已破解)
+    stall_seconds=STALL_SECONDS,  # 超過此秒數沒有新的狀態時視為停滯並終止
+    verbose=None          # True 時即時印出 Hashcat 的非狀態輸出，預設依環境變數 HASHCAT_VERBOSE
+):
+    task = prepare_task(
+        hashcat_base_cmd, mode, attack_payload, max_seconds, output_json_path, hybrid_mask, test_folder,
+        hash_file_path, potfile_path, outfile_path, session, extra_fields, restore_file_path, resume
+    )
+
+    watcher = CrackWatcher(task["outfile_path"], elapsed_offset=task["elapsed_before"])
+    process = open_hashcat(task["cmd"], task["hashcat_dir"])  # 在 hashcat 目錄下執行
+
+    # ======= Start time 記錄 =======
+    start_task(task)
+    watcher.start()
+    # 時間上限、停滯與取消由 watchdog 執行緒處理，不依賴狀態行的頻率
+    watchdog = Watchdog(process, max_seconds - task["elapsed_before"], stall_seconds, cancel_event)
+    watchdog.start()
+
+    # 只解析狀態行，其他輸出保留在 pump.tail (異常結束時才印出)
+    pump = OutputPump(process.stdout, verbose)
+    for line in pump:
+        status = parse_status_line(line)
+        if status is None:
+            continue
+        watcher.note_status(status)
+        watchdog.note_status()
+        update_task_status(task, status)
+
+    process.wait()
+    watchdog.stop()
+    watcher.stop()
+    if process.returncode not in OK_EXIT_CODES and watchdog.stop_reason == STOP_EXIT:
+        pump.dump_tail(f"返回碼 {process.returncode}")
+
+    return finish_task(
+        task, process.returncode, watcher.results(), watchdog.result_fields(),
+        watchdog.stop_reason == STOP_CANCELLED if cancel_event is not None else None
+    )
+
+
+def is_cracked_result(output_json_path):
+    """檢查結果 JSON 是否已存在且已成功破解，回傳已破解的密碼或 None"""
+    if not os.path.exists(output_json_path):
+        return None
+    try:
+        with open(output_json_path, 'r', encoding='utf-8') as f:
+            existing_data = json.load(f)
+        if existing_data.get("Status") == "Cracked" and existing_data.get("Cracked_Password") and existing_data.get("Cracked_Password") != "Na":
+            return existing_data.get("Cracked_Password")
+    except Exception as e:
+        print(f"[WARN] 讀取現有 JSON 失敗: {e}，將重新執行")
+    return None
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+scheduler.py - 多裝置平行排程
+
+每個 backend 裝置固定一個 worker 執行緒 (裝置親和性)，worker 從共用佇列取出任務，
+以 -d <裝置編號> 執行 Hashcat；同時執行的 Hashcat 程序數量 = 裝置數量。
+每個任務仍各自套用自己的 max_seconds 時間上限。
+keyspace 切片任務 (sharding.py) 固定由 execute_shard 執行，同一組的切片會分到不同的空閒裝置。
+指定 sampler (adaptive.AdaptiveSampler) 時改由 sampler 決定下一個任務，並可提前停止收斂的 cell。
+"""
+
+import queue
+import threading
+import traceback
+
+from engine.jobs import execute_job
+from engine.ledger import record_job_results, record_job_start
+from engine.resultcache import cached_job_results, store_job_results
+from engine.sharding import execute_shard
+
+
+def run_jobs_on_devices(jobs, devices, hashcat_exe_path, jobs_root, job_runner=execute_job, sampler=None):
+    """
+    將 jobs 分派到各裝置執行，全部完成後回傳
+    sampler: adaptive.AdaptiveSampler (以 jobs 建立)，None 表示依序執行所有任務
+    Returns: dict {job_id: 結果 dict (output_json_path → result) 或 None (失敗)}
+    """
+    job_queue = queue.Queue()
+    for job in jobs:
+        job_queue.put(job)
+
+    def next_job():
+        if sampler is not None:
+            return sampler.next_job()
+        try:
+            return job_queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    results = {}
+    results_lock = threading.Lock()
+
+    def worker(device):
+        while True:
+            job = next_job()
+            if job is None:
+                return
+
+            try:
+                runner = execute_shard if job.get("shard") else job_runner
+                record_job_start(job)
+                result = cached_job_results(job, device)
+                if result is None:
+                    result = runner(job, hashcat_exe_path, jobs_root, device)
+                    store_job_results(job, device, result)
+                record_job_results(job, result)
+            except Exception:
+                print(f"[ERROR] 裝置 #{device['id']} 執行 {job['job_id']} 失敗")
+                traceback.print_exc()
+                result = None
+            if sampler is not None:
+                sampler.record(job, result)
+
+            with results_lock:
+                results[job["job_id"]] = result
+
+    print(f"[SCHEDULER] {len(jobs)} 個任務，{len(devices)} 個裝置: "
+          f"{', '.join('#' + str(d['id']) for d in devices)}")
+
+    workers = [
+        threading.Thread(target=worker, args=(device,), name=f"device-{device['id']}", daemon=True)
+        for device in devices
+    ]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    done = sum(1 for r in results.values() if r is not None)
+    print(f"[SCHEDULER] 完成 {done}/{len(jobs)} 個任務")
+    if sampler is not None:
+        sampler.report()
+    return results
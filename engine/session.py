@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+session.py - Hashcat session 中斷續跑 (--session / --restore)
+
+每個任務以自己的 --session 名稱執行，restore 檔 (--restore-file-path) 放在任務工作目錄。
+結果 JSON 與執行中的狀態記錄 (statuslog.py) 中記錄 session 狀態：
+    Session / Restore_File         - session 名稱與 restore 檔路徑
+    Session_State                  - running (執行中或被中斷) / finished (已結束，含超時)
+    Resume_Count                   - 續跑次數
+    Elapsed_Before_Resume_Seconds  - 先前各次執行累計的秒數
+
+程式重新啟動時，Session_State 仍為 running 且 restore 檔存在的任務以
+hashcat --session <name> --restore 續跑，Actual_Runtime_Seconds 會加上先前累計的時間。
+"""
+
+import os
+
+from engine.statuslog import read_latest_state
+
+SESSION_RUNNING = "running"
+SESSION_FINISHED = "finished"
+
+
+def restore_command(hashcat_exe_path, session, restore_file_path):
+    """續跑指令：其餘參數 (mask、outfile、potfile ...) 由 restore 檔還原"""
+    return [hashcat_exe_path, "--session", session, "--restore", "--restore-file-path", restore_file_path]
+
+
+def session_fields(session, restore_file_path, state, elapsed_before=0, resume_count=0):
+    return {
+        "Session": session,
+        "Restore_File": restore_file_path,
+        "Session_State": state,
+        "Resume_Count": resume_count,
+        "Elapsed_Before_Resume_Seconds": round(elapsed_before, 2),
+    }
+
+
+def read_resume_state(output_json_path):
+    """
+    檢查任務最新的狀態 (結果 JSON 或狀態記錄尾端) 是否為被中斷的 session
+    Returns: {"session", "restore_file", "elapsed", "resume_count"} 或 None
+    """
+    data = read_latest_state(output_json_path)
+    if not data or data.get("Session_State") != SESSION_RUNNING:
+        return None
+    restore_file = data.get("Restore_File")
+    if not restore_file or not os.path.exists(restore_file):
+        return None
+
+    return {
+        "session": data.get("Session"),
+        "restore_file": restore_file,
+        "elapsed": float(data.get("Actual_Runtime_Seconds", 0) or 0),
+        "resume_count": int(data.get("Resume_Count", 0) or 0) + 1,
+    }
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+sharding.py - 將單一 mask 的 keyspace 以 -s/--skip、-l/--limit 切成多段平行執行
+
+切片以 base words 為單位 (hashcat --keyspace 的值)，第 i 段執行
+[skip_i, skip_i + limit_i) 的 base words。各段是一般的任務，交給 scheduler 分派到不同裝置；
+任一段破解後，同一組的其他段立即取消。
+時間上限以「單一裝置從頭依序執行」計算：第 i 段開始前已相當於執行了 skip_i / 速度 秒，
+因此該段的時間上限為 max_seconds - skip_i / 速度，開始位置已超過上限的段不執行。
+只切片有預期時間 (已校正速度) 的任務。
+
+全部段結束後合併為該列的結果 JSON：
+    Actual_Runtime_Seconds               - 換算為「單一裝置從頭依序執行」的時間 (與未切片的結果可比較，
+                                           超過 max_seconds 時為 Timeout，時間為 max_seconds)
+    Crack_Seconds_Sequential_Equivalent  - 同上 (僅破解時)
+    Parallel_Wall_Seconds                - 實際的平行牆鐘時間 (第一段開始到最後一段結束)
+    Shards                               - 各段的範圍、裝置與狀態
+執行失敗的段登記為 Failed (視為未搜尋)，其他段的結果照常合併；此時沒有破解的列為 Failed。
+"""
+
+import datetime
+import os
+import threading
+import time
+import traceback
+
+from engine.calibration import device_speed
+from engine.jobdir import prepare_job_dir, cleanup_job_dir
+from engine.jobs import job_extra_fields
+from engine.keyspace import enumerator_for_mask
+from engine.runner import MODE_NAMES, run_hashcat_task
+from engine.statuslog import write_json_atomic
+from engine.watchdog import STOP_TIMEOUT
+
+
+def shard_jobs(jobs, shards, min_expected_seconds=0):
+    """
+    將預期時間超過 min_expected_seconds 的單列任務切成 shards 段
+    (批次任務、續跑中的任務、Hybrid 任務與沒有預期時間的任務不切片)
+    Returns: 新的任務列表 (切片依序放在原任務的位置)
+    """
+    if not shards or shards < 2:
+        return jobs
+
+    out = []
+    for job in jobs:
+        expected = job.get("expected_seconds")
+        if (job["batch"] or job.get("resume") or len(job["targets"]) != 1 or job.get("attack_mode", 3) != 3
+                or expected is None or expected < min_expected_seconds):
+            out.append(job)
+            continue
+
+        enum = enumerator_for_mask(job["mask"], job["test_folder"])
+        base = enum.base_keyspace()
+        count = min(shards, base)
+        if count < 2:
+            out.append(job)
+            continue
+
+        chunk = -(-base // count)
+        group = {
+            "job": job,
+            "bfs_count": enum.bfs_count(),
+            # 裝置沒有校正速度時，以預期時間換算的速度計算各段的開始時間
+            "speed": job["keyspace"] / expected if expected else None,
+            "cancel": threading.Event(),
+            "lock": threading.Lock(),
+            "pending": count,
+            "results": {},
+            "started": None,
+        }
+        for i in range(count):
+            skip = i * chunk
+            out.append(dict(
+                job,
+                job_id=f"{job['job_id']}_s{i + 1}",
+                expected_seconds=expected / count,
+                shard={"index": i, "count": count, "skip": skip, "limit": min(chunk, base - skip), "group": group},
+            ))
+        print(f"[SHARD] {job['job_id']} 切成 {count} 段 (base keyspace {base:,}，每段 {chunk:,})")
+    return out
+
+
+def run_shard(job, hashcat_exe_path, jobs_root, device=None):
+    """執行一個切片的 Hashcat (同組已破解或開始位置超過時間上限時略過)；Returns: 該段的結果 dict"""
+    shard = job["shard"]
+    group = shard["group"]
+    hashvalue = job["targets"][0][0]
+
+    # 依序執行時這一段開始前已經過的秒數
+    speed = device_speed(device, "100", job["mask"], job["test_folder"]) or group["speed"]
+    offset = shard["skip"] * group["bfs_count"] / speed if speed else 0
+    if group["cancel"].is_set():
+        print(f"[SHARD] {job['job_id']} 略過 (同組已破解)")
+        return {"Status": "Skipped", "Cracked_Password": "Na"}
+    if offset >= job["max_seconds"]:
+        print(f"[SHARD] {job['job_id']} 略過 (開始位置約在第 {offset:,.0f}s，超過時間上限 {job['max_seconds']}s)")
+        return {"Status": "Skipped", "Cracked_Password": "Na", "Stop_Reason": STOP_TIMEOUT}
+
+    base_cmd = [hashcat_exe_path, "-m", "100", "-s", str(shard["skip"]), "-l", str(shard["limit"])]
+    if device is not None:
+        base_cmd.extend(["-d", str(device["id"])])
+    extra_fields = job_extra_fields(job, device)
+    extra_fields.update({"Shard_Index": shard["index"], "Shard_Count": shard["count"],
+                         "Shard_Offset_Seconds": round(offset, 3)})
+
+    job_dir = prepare_job_dir(jobs_root, job["job_id"], [hashvalue])
+    max_seconds = job["max_seconds"] - offset
+    print(f"[SHARD] {job['job_id']} ({shard['index'] + 1}/{shard['count']}, -s {shard['skip']} -l {shard['limit']}, "
+          f"上限 {max_seconds:,.0f}s, 裝置: {device['id'] if device else '預設'})")
+    result = run_hashcat_task(
+        base_cmd + [job_dir["hash_file"]],
+        mode=3,
+        attack_payload=job["mask"],
+        max_seconds=max_seconds,
+        output_json_path=os.path.join(job_dir["dir"], "result.json"),
+        test_folder=job["test_folder"],
+        potfile_path=job_dir["potfile"],
+        outfile_path=job_dir["outfile"],
+        session=job_dir["session"],
+        extra_fields=extra_fields,
+        restore_file_path=job_dir["restore_file"],
+        cancel_event=group["cancel"]
+    )
+    cleanup_job_dir(job_dir)
+    if result.get("Cracked_Password", "Na") != "Na":
+        group["cancel"].set()
+    return result
+
+
+def execute_shard(job, hashcat_exe_path, jobs_root, device=None):
+    """
+    執行一個切片；同組最後一個結束的切片負責寫出合併結果
+    切片失敗 (例如找不到 Hashcat、工作目錄無法建立) 時登記為 Failed，其他切片的結果仍會合併
+    """
+    shard = job["shard"]
+    group = shard["group"]
+    row_json_path = job["targets"][0][1]
+
+    with group["lock"]:
+        if group["started"] is None:
+            group["started"] = time.monotonic()
+
+    result = None
+    try:
+        result = run_shard(job, hashcat_exe_path, jobs_root, device)
+    except Exception:
+        print(f"[ERROR] 切片 {job['job_id']} 執行失敗")
+        traceback.print_exc()
+    finally:
+        if result is None:
+            result = {"Status": "Failed", "Cracked_Password": "Na"}
+        result["Shard_Skip"] = shard["skip"]
+        result["Shard_Limit"] = shard["limit"]
+
+        with group["lock"]:
+            group["results"][shard["index"]] = result
+            group["pending"] -= 1
+            last = group["pending"] == 0
+        merged = None
+        if last:
+            merged = merge_shard_results(group, time.monotonic() - group["started"])
+            write_json_atomic(row_json_path, merged)
+    return {row_json_path: merged} if merged is not None else {}
+
+
+def sequential_equivalent_seconds(result, slice_start):
+    """
+    換算從 keyspace 開頭依序執行到破解位置所需的時間：
+    該段實際的破解時間 + 前面各段的候選密碼數 / 速度
+    速度優先使用校正速度，否則以該段 autotune 後的實際速度估計
+    slice_start: 該段第一個候選密碼的位置
+    (Hashcat 的 crack position 含 --skip 的偏移，為整個 mask 中的位置)
+    """
+    crack_pos = result.get("Crack_Position")
+    from_start = result.get("Crack_Seconds_From_Start")
+    if crack_pos is None or from_start is None:
+        return result.get("Actual_Runtime_Seconds")
+
+    speed = result.get("Calibrated_Speed")
+    if not speed:
+        # 沒有狀態行時時間基準為程序啟動，速度會被啟動時間拉低
+        after_autotune = result.get("Crack_Seconds_After_Autotune") or from_start
+        local = crack_pos - slice_start
+        speed = local / after_autotune if local > 0 and after_autotune > 0 else None
+    if not speed:
+        return from_start
+    return round(from_start + slice_start / speed, 3)
+
+
+def merge_shard_results(group, wall_seconds):
+    """
+    合併各切片的結果為該列的結果 JSON
+    依序等效時間超過 max_seconds 時視為 Timeout (未破解)，時間以 max_seconds 計
+    失敗 (Failed) 的段視為未搜尋：沒有其他段破解時，該列為 Failed (不是 Exhausted / Timeout)
+    """
+    job = group["job"]
+    max_seconds = job["max_seconds"]
+    results = [group["results"][i] for i in sorted(group["results"])]
+    cracked = [(i, r) for i, r in enumerate(results) if r.get("Cracked_Password", "Na") != "Na"]
+
+    merged = {
+        "Attack_Mode": MODE_NAMES[3],
+        "Attack_Payload": results[0].get("Attack_Payload", job["mask"]),
+        "Hybrid_Mask": None,
+        "Max_Time_Limit_Seconds": max_seconds,
+        "Shard_Count": len(results),
+        "Parallel_Wall_Seconds": round(wall_seconds, 2),
+        "Finished": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    sequential = None
+    if cracked:
+        i, r = cracked[0]
+        sequential = sequential_equivalent_seconds(r, r["Shard_Skip"] * group["bfs_count"])
+    if cracked and (sequential is None or sequential <= max_seconds):
+        merged.update({
+            "Status": "Cracked",
+            "Cracked_Password": r["Cracked_Password"],
+            "Actual_Runtime_Seconds": sequential,
+            "Crack_Seconds_Sequential_Equivalent": sequential,
+            "Cracked_Shard": i,
+        })
+        for key in ("Crack_Position", "Crack_Timestamp", "Device_ID", "Device_Name", "Calibrated_Speed"):
+            if key in r:
+                merged[key] = r[key]
+    else:
+        statuses = {r.get("Status") for r in results}
+        # 未破解時以各段執行時間總和作為單一裝置依序執行的時間
+        total = round(sum(r.get("Actual_Runtime_Seconds", 0) for r in results), 2)
+        # 破解位置已確定超過時間上限時，失敗的段不影響結論
+        failed = "Failed" in statuses and not cracked
+        timed_out = not failed and (bool(cracked) or total > max_seconds
+                                    or any(r.get("Stop_Reason") == STOP_TIMEOUT for r in results))
+        if failed:
+            status = "Failed"
+        elif statuses == {"Exhausted"} and total <= max_seconds:
+            status = "Exhausted"
+        elif timed_out:
+            status = "Timeout"
+        else:
+            status = results[0].get("Status", "Unknown")
+        merged.update({
+            "Status": status,
+            "Cracked_Password": "Na",
+            "Actual_Runtime_Seconds": max_seconds if timed_out else min(total, max_seconds),
+        })
+        if timed_out:
+            merged["Stop_Reason"] = STOP_TIMEOUT
+        if cracked:
+            # 依序執行時在時間上限內不會破解
+            merged["Crack_Seconds_Sequential_Equivalent"] = sequential
+
+    merged["Shards"] = [
+        {
+            "Index": i,
+            "Skip": r["Shard_Skip"],
+            "Limit": r["Shard_Limit"],
+            "Device_ID": r.get("Device_ID"),
+            "Status": r.get("Status"),
+            "Actual_Runtime_Seconds": r.get("Actual_Runtime_Seconds"),
+            "Cancelled": r.get("Cancelled", False),
+        }
+        for i, r in enumerate(results)
+    ]
+    print(f"[SHARD] {job['job_id']} 完成：{merged['Status']}，依序等效 {merged['Actual_Runtime_Seconds']}s，"
+          f"平行 {merged['Parallel_Wall_Seconds']}s")
+    return merged
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+statuslog.py - 執行中的狀態記錄 (append-only JSONL) 與結果 JSON 的原子寫入
+
+執行期間每個狀態行只在 <結果名稱>.status.jsonl 追加一行完整的狀態快照 (line-buffered)，
+不再反覆覆寫結果 JSON；結果 JSON 只在結束時以「暫存檔 + rename」一次寫出，
+程式中途當機也不會留下寫到一半的 JSON (跳過已破解列的判斷依賴它)。
+
+讀取時只需要檔案尾端：最後一行完整的快照就是最新狀態 (寫到一半的最後一行會被略過)。
+"""
+
+import json
+import os
+
+STATUS_LOG_SUFFIX = ".status.jsonl"
+
+# 讀取最新狀態時只讀取檔案最後的位元組數 (一行快照約 1KB)
+TAIL_BYTES = 64 * 1024
+
+
+def status_log_path(output_json_path):
+    return os.path.splitext(output_json_path)[0] + STATUS_LOG_SUFFIX
+
+
+def open_status_log(output_json_path, resume=False):
+    """
+    開啟任務的狀態記錄 (line-buffered)
+    resume=True 時接在上一次的記錄後面，否則清空重新開始
+    """
+    return open(status_log_path(output_json_path), "a" if resume else "w", encoding="utf-8", buffering=1)
+
+
+def append_status(log_file, snapshot):
+    log_file.write(json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def write_json_atomic(path, data):
+    """寫入暫存檔後 rename，讀取端只會看到完整的舊檔或新檔"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_last_status(log_path, tail_bytes=TAIL_BYTES):
+    """
+    從狀態記錄的尾端取得最新的完整快照
+    Returns: dict 或 None
+    """
+    try:
+        with open(log_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - tail_bytes))
+            tail = f.read()
+    except OSError:
+        return None
+
+    for line in reversed(tail.split(b"\n")):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            return json.loads(line.decode("utf-8"))
+        except ValueError:
+            # 當機時寫到一半的行，或從行中間開始讀到的第一行
+            continue
+    return None
+
+
+def read_latest_state(output_json_path):
+    """
+    取得任務最新的狀態：結果 JSON 與狀態記錄中較新的一個
+    Returns: dict 或 None
+    """
+    log_path = status_log_path(output_json_path)
+    json_mtime = os.path.getmtime(output_json_path) if os.path.exists(output_json_path) else None
+    log_mtime = os.path.getmtime(log_path) if os.path.exists(log_path) else None
+
+    if log_mtime is not None and (json_mtime is None or log_mtime > json_mtime):
+        state = read_last_status(log_path)
+        if state is not None:
+            return state
+    if json_mtime is None:
+        return None
+    try:
+        with open(output_json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return None
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+structure.py - 大量密碼的 mask / 結構分析 (以 NumPy 陣列與查表取代逐字元的 Python 判斷)
+
+genmask.generate_mask_for_password 與 round2/convert.py 的 mask() 逐字元組字串，
+適合幾十個密碼；dictionary/ 的數百萬行字典改用本模組的批次 API：
+    analyze_passwords(passwords, special_chars) - 字串列表
+    analyze_corpus(path, special_chars)         - 直接讀取字典檔，每次處理一塊 (generator)
+    password_masks(passwords, special_chars)    - 只取 mask 字串 (genmask 使用)
+
+做法：
+    1. 整塊文字 (各列以換行分隔) 放進一個陣列：全為 ASCII 時直接使用位元組 (uint8)，
+       否則解碼為 code point (uint32，與逐字元處理一樣以字元而非位元組計)
+    2. 以查表 (class_table) 一次換成字元類別；非 ASCII 只對出現過的 code point 各判斷一次
+    3. mask：每個字元換成兩個 mask 字元 (uint16)，以滑動視窗一次取出每列，得到固定寬度的 bytes 陣列
+       數量：各類別佔一個位元組的累加和，列尾減列首
+       token run：類別改變的位置；特殊字元：類別為 ?s 的位置 (兩者都以每列的 offset 表示)
+超過 MAX_WIDTH 的列 (避免少數超長行讓 mask 陣列變寬) 另外逐列處理，此時 masks 為 object 陣列。
+
+special_chars：
+    字串 - genmask 的規則：大寫 ?u、小寫 ?l、數字 ?d、special_chars 中的字元 ?s、其他 ?a
+    None - round2/convert.py 的規則：大寫 ?u、數字 ?d、非英數字 ?s、其他 ?l
+
+回傳的 dict (fields 可只選部分)：
+    lengths       - 密碼長度 (字元數)
+    masks         - mask (numpy bytes 陣列，.astype(str) 轉為字串)
+    counts        - (n, 5) 各類別的數量，欄位順序同 CLASS_NAMES
+    run_offsets / run_starts / run_classes / run_lengths
+                  - 連續同類別的段 (token run)；第 i 列為 [run_offsets[i], run_offsets[i+1])，
+                    例: dragon86 → (0, 1=l, 6), (6, 3=d, 2)
+    special_offsets / special_positions - 特殊字元 (?s) 在列中的位置 (offset 同上)
+analyze_corpus 另有 row_offset (此塊第一列在整個檔案中的列號，只計去除前後空白後非空的行)。
+"""
+
+import numpy as np
+
+# 類別代碼 1-5 (0 為換行、各列前後去除的空白與補位)
+CLASS_NAMES = ("l", "u", "d", "s", "a")
+CLASS_CODES = {name: code for code, name in enumerate(CLASS_NAMES, 1)}
+SPECIAL = CLASS_CODES["s"]
+
+FIELDS = ("masks", "counts", "runs", "specials")
+
+# 超過此長度的列逐列產生 mask (各類別的數量以一個位元組累加，也不能超過 255)
+MAX_WIDTH = 64
+
+# analyze_corpus 每次讀取的位元組數
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# str.strip() 去除的空白字元 (Unicode 的空白都不超過 U+3000；WHITESPACE_TABLE 為 ASCII 的查表)
+WHITESPACE = np.array([c for c in range(0x3001) if chr(c).isspace()], dtype=np.uint32)
+WHITESPACE_TABLE = np.zeros(256, dtype=bool)
+WHITESPACE_TABLE[WHITESPACE[WHITESPACE < 128]] = True
+
+# 類別代碼 → mask 的類別字母 (bytes.translate 的查表)；MASK_TOKENS 為兩個 mask 字元 (little-endian uint16)
+MASK_LETTERS = (b"\0" + "".join(CLASS_NAMES).encode("ascii")).ljust(256, b"\0")
+MASK_TOKENS = np.array([0] + [ord("?") | (ord(name) << 8) for name in CLASS_NAMES], dtype="<u2")
+# 類別代碼 → 數量累加值 (每個類別佔一個位元組)
+COUNT_BITS = np.array([0] + [1 << (8 * i) for i in range(len(CLASS_NAMES))], dtype=np.uint64)
+COUNT_SHIFTS = np.array([8 * i for i in range(len(CLASS_NAMES))], dtype=np.uint64)
+
+
+def char_class(char, special_chars=None):
+    """單一字元的類別名稱 (規則見模組說明)"""
+    if char.isupper():
+        return "u"
+    if special_chars is None:
+        if char.isdigit():
+            return "d"
+        return "s" if not char.isalnum() else "l"
+    if char.islower():
+        return "l"
+    if char.isdigit():
+        return "d"
+    return "s" if char in special_chars else "a"
+
+
+def class_table(special_chars=None):
+    """ASCII → 類別代碼 的查表 (換行為 0)"""
+    table = np.zeros(128, dtype=np.uint8)
+    for code in range(128):
+        table[code] = CLASS_CODES[char_class(chr(code), special_chars)]
+    table[ord("\n")] = 0
+    return table
+
+
+def text_codes(text):
+    """字串 → 陣列：全為 ASCII 時為 uint8，否則為 code point (uint32)"""
+    if text.isascii():
+        return np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    return np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+
+
+def code_classes(codes, special_chars=None, table=None):
+    """字元陣列 → 類別代碼；ASCII 以 bytes.translate 查表，非 ASCII 的 code point 各判斷一次"""
+    table = class_table(special_chars) if table is None else table
+    if codes.dtype == np.uint8:
+        return np.frombuffer(codes.tobytes().translate(table.tobytes() + bytes(128)), dtype=np.uint8).copy()
+    ascii_mask = codes < 128
+    classes = table[np.where(ascii_mask, codes, 0)]
+    others = np.flatnonzero(~ascii_mask)
+    if len(others):
+        unique, inverse = np.unique(codes[others], return_inverse=True)
+        lookup = np.array([CLASS_CODES[char_class(chr(c), special_chars)] for c in unique], dtype=np.uint8)
+        classes[others] = lookup[inverse]
+    return classes
+
+
+def _offsets(flat_positions, starts):
+    """依列開頭切分已排序的位置；Returns: 每列的 offset (n + 1)"""
+    return np.append(np.searchsorted(flat_positions, starts), len(flat_positions))
+
+
+def analyze_classes(classes, starts, lengths, fields=FIELDS):
+    """
+    由整塊的類別代碼計算各列的結構 (各列之後必須是類別 0：換行、去除的空白或結尾)
+    Returns: 模組說明中的 dict
+    """
+    n = len(starts)
+    total = len(classes)
+    ends = starts + lengths
+    long_rows = np.flatnonzero(lengths > MAX_WIDTH)
+    width = int(min(lengths.max(), MAX_WIDTH)) if n else 0
+    result = {"lengths": lengths.astype(np.int64)}
+
+    if "masks" in fields:
+        # 每個字元兩個位元組："?" 與類別字母 (以 bytes.translate 查表)，以 uint16 看待即為一個 token
+        tokens = np.full(2 * (total + width), ord("?"), dtype=np.uint8)
+        tokens[1:2 * total:2] = np.frombuffer(classes.tobytes().translate(MASK_LETTERS), dtype=np.uint8)
+        tokens = tokens.view("<u2")
+        if width:
+            windows = np.lib.stride_tricks.sliding_window_view(tokens, width)[starts]
+            keep = np.arange(width, dtype=np.uint8) < np.minimum(lengths, width).astype(np.uint8)[:, None]
+            np.multiply(windows, keep, out=windows)
+            masks = windows.view(f"S{2 * width}").ravel()
+        else:
+            masks = np.zeros(n, dtype="S1")
+        if len(long_rows):
+            masks = masks.astype(object)
+            for row in long_rows:
+                masks[row] = MASK_TOKENS[classes[starts[row]:ends[row]]].tobytes()
+        result["masks"] = masks
+
+    if "counts" in fields:
+        packed = np.zeros(total + 1, dtype=np.uint64)
+        np.cumsum(COUNT_BITS[classes], out=packed[1:])
+        counts = ((packed[ends] - packed[starts])[:, None] >> COUNT_SHIFTS) & 0xFF
+        counts = counts.astype(np.int64)
+        for row in long_rows:
+            counts[row] = np.bincount(classes[starts[row]:ends[row]], minlength=len(CLASS_NAMES) + 1)[1:]
+        result["counts"] = counts
+
+    if "runs" in fields:
+        boundary = np.empty(total, dtype=bool)
+        boundary[:1] = True
+        np.not_equal(classes[1:], classes[:-1], out=boundary[1:])
+        seg_starts = np.flatnonzero(boundary)
+        seg_classes = classes[seg_starts]
+        real = seg_classes > 0
+        run_flat = seg_starts[real]
+        run_ends = np.append(seg_starts[1:], total)[real]
+        offsets = _offsets(run_flat, starts)
+        result.update({
+            "run_offsets": offsets,
+            "run_starts": run_flat - np.repeat(starts, np.diff(offsets)),
+            "run_classes": seg_classes[real],
+            "run_lengths": run_ends - run_flat,
+        })
+
+    if "specials" in fields:
+        special_flat = np.flatnonzero(classes == SPECIAL)
+        offsets = _offsets(special_flat, starts)
+        result.update({
+            "special_offsets": offsets,
+            "special_positions": special_flat - np.repeat(starts, np.diff(offsets)),
+        })
+    return result
+
+
+def analyze_passwords(passwords, special_chars=None, fields=FIELDS):
+    """分析字串列表 (密碼不可含換行)"""
+    codes = text_codes("\n".join(passwords))
+    breaks = np.flatnonzero(codes == ord("\n"))
+    starts = np.concatenate([[0], breaks + 1]).astype(np.int64)[:len(passwords)]
+    ends = np.append(breaks, len(codes)).astype(np.int64)[:len(passwords)]
+    return analyze_classes(code_classes(codes, special_chars), starts, ends - starts, fields)
+
+
+def password_masks(passwords, special_chars=None):
+    """Returns: mask 字串列表 (與逐一呼叫 generate_mask_for_password 相同)"""
+    return [m.decode("ascii") for m in analyze_passwords(passwords, special_chars, ("masks",))["masks"]]
+
+
+def strip_rows(codes, classes, starts, ends):
+    """
+    去除各列前後的空白 (與 str.strip() 相同)，去除的字元類別設為 0；starts / ends 直接修改
+    每次迴圈只處理仍以空白開頭 / 結尾的列，一般字典只需幾次
+    """
+    if codes.dtype == np.uint8:
+        is_space = lambda positions: WHITESPACE_TABLE[codes[positions]]
+    else:
+        is_space = lambda positions: np.isin(codes[positions], WHITESPACE)
+    active = np.flatnonzero(ends > starts)
+    while len(active):
+        active = active[is_space(ends[active] - 1)]
+        ends[active] -= 1
+        classes[ends[active]] = 0
+        active = active[ends[active] > starts[active]]
+    active = np.flatnonzero(ends > starts)
+    while len(active):
+        active = active[is_space(starts[active])]
+        classes[starts[active]] = 0
+        starts[active] += 1
+        active = active[ends[active] > starts[active]]
+
+
+def analyze_corpus(path, special_chars=None, fields=FIELDS, chunk_bytes=CHUNK_BYTES):
+    """
+    逐塊分析字典檔 (UTF-8，無法解碼的位元組略過；每行一個密碼，與 line.strip() 相同去除前後的空白，略過空行)
+    Yields: analyze_classes 的結果，另加 row_offset 與 codes / starts (取回原始密碼用)
+    """
+    table = class_table(special_chars)
+    row_offset = 0
+    carry = b""
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(chunk_bytes)
+            eof = not data
+            data = carry + data
+            if not eof:
+                cut = data.rfind(b"\n") + 1
+                if cut == 0:
+                    carry = data
+                    continue
+                data, carry = data[:cut], data[cut:]
+            elif not data:
+                break
+
+            if data.isascii():
+                codes = np.frombuffer(data, dtype=np.uint8)
+            else:
+                codes = text_codes(data.decode("utf-8", errors="ignore"))
+            breaks = np.flatnonzero(codes == ord("\n"))
+            starts = np.concatenate([[0], breaks + 1]).astype(np.int64)
+            ends = np.append(breaks, len(codes)).astype(np.int64)
+            classes = code_classes(codes, special_chars, table)
+            # 前後的空白 (含行尾的 \r) 不屬於密碼，並略過去除空白後的空行
+            strip_rows(codes, classes, starts, ends)
+            keep = ends > starts
+            starts, ends = starts[keep], ends[keep]
+
+            result = analyze_classes(classes, starts, ends - starts, fields)
+            result.update(row_offset=row_offset, codes=codes, starts=starts)
+            row_offset += len(starts)
+            yield result
+            if eof:
+                break
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+watchdog.py - 與狀態行頻率無關的時間上限、停滯偵測與取消
+
+原本只在收到狀態行時檢查時間上限，而 --status-timer=60，
+每個超時的任務最多會多跑一分鐘；Hashcat 卡住不再輸出狀態時則永遠不會被中斷。
+Watchdog 以背景執行緒每 POLL_INTERVAL 秒檢查一次：
+    timeout   - 超過時間上限
+    stall     - 收到第一個狀態後，超過 stall_seconds 沒有新的狀態
+    cancelled - cancel_event 被設定 (例如同組切片已破解)
+觸發時先對整個 process group 送出 terminate (Hashcat 會寫出 restore 檔後結束)，
+grace_seconds 內未結束再 kill。結果 JSON 的 Stop_Reason 記錄停止原因，正常結束為 exit。
+"""
+
+import asyncio
+import os
+import signal
+import subprocess
+import threading
+import time
+
+POLL_INTERVAL = 0.2
+
+# terminate 後等待 Hashcat 自行結束的秒數，逾時則 kill
+KILL_GRACE_SECONDS = 10
+
+# 預設的停滯判定：5 個 status-timer (60s) 週期沒有新的狀態
+STALL_SECONDS = 300
+
+STOP_EXIT = "exit"
+STOP_TIMEOUT = "timeout"
+STOP_STALL = "stall"
+STOP_CANCELLED = "cancelled"
+
+
+def signal_process_group(process, kill=False):
+    """
+    對 Hashcat 的 process group 送出 terminate / kill (Windows 只能對程序本身)
+    process: subprocess.Popen 或 asyncio 的 Process (呼叫端需確認程序仍在執行)
+    """
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        elif kill:
+            process.kill()
+        else:
+            process.terminate()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class Watchdog:
+    """
+    背景執行緒：監視 Hashcat 程序的時間上限、停滯與取消
+    max_seconds: 本次程序可執行的秒數 (續跑時已扣除先前累計的時間)
+    """
+
+    def __init__(self, process, max_seconds=None, stall_seconds=STALL_SECONDS, cancel_event=None,
+                 grace_seconds=KILL_GRACE_SECONDS, poll_interval=POLL_INTERVAL):
+        self.process = process
+        self.max_seconds = max_seconds
+        self.stall_seconds = stall_seconds
+        self.cancel_event = cancel_event
+        self.grace_seconds = grace_seconds
+        self.poll_interval = poll_interval
+        self.reason = None
+        self.killed = False
+        self._start = None
+        self._last_status = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._start = time.monotonic()
+        self._thread.start()
+
+    def note_status(self):
+        """收到狀態行時呼叫，重設停滯計時"""
+        self._last_status = time.monotonic()
+
+    def _check(self):
+        now = time.monotonic()
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            return STOP_CANCELLED
+        if self.max_seconds is not None and now - self._start >= self.max_seconds:
+            return STOP_TIMEOUT
+        if self.stall_seconds and self._last_status is not None and now - self._last_status >= self.stall_seconds:
+            return STOP_STALL
+        return None
+
+    def _run(self):
+        while self.process.poll() is None:
+            if self.cancel_event is not None:
+                self.cancel_event.wait(self.poll_interval)
+            else:
+                time.sleep(self.poll_interval)
+            reason = self._check()
+            if reason and self.process.poll() is None:
+                self._stop(reason)
+                return
+
+    def _announce(self, reason):
+        self.reason = reason
+        elapsed = time.monotonic() - self._start
+        if reason == STOP_TIMEOUT:
+            print(f"\n[STOP] 超過上限時間 ({self.max_seconds:.0f}s)，已執行: {elapsed:.1f}s，立即終止 Hashcat")
+        elif reason == STOP_STALL:
+            print(f"\n[STOP] {self.stall_seconds}s 沒有新的狀態，判定 Hashcat 停滯，終止程序")
+        else:
+            print("\n[CANCEL] 收到取消通知，終止 Hashcat")
+
+    def _stop(self, reason):
+        self._announce(reason)
+        signal_process_group(self.process)
+        try:
+            self.process.wait(self.grace_seconds)
+        except subprocess.TimeoutExpired:
+            print(f"[KILL] Hashcat 在 {self.grace_seconds}s 內未結束，強制終止 process group")
+            self.killed = True
+            signal_process_group(self.process, kill=True)
+
+    def stop(self):
+        """程序結束後呼叫，等待背景執行緒結束 (包含 kill 的升級)"""
+        self._thread.join()
+
+    @property
+    def stop_reason(self):
+        return self.reason or STOP_EXIT
+
+    def result_fields(self):
+        return {"Stop_Reason": self.stop_reason, "Killed": self.killed}
+
+
+class AsyncWatchdog(Watchdog):
+    """
+    asyncio 版本 (aio.py)：process 為 asyncio.create_subprocess_exec 的 Process，
+    以事件迴圈中的 coroutine 取代背景執行緒；cancel_event 可為 threading.Event 或 asyncio.Event
+    """
+
+    def start(self):
+        self._start = time.monotonic()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while self.process.returncode is None:
+            await asyncio.sleep(self.poll_interval)
+            reason = self._check()
+            if reason and self.process.returncode is None:
+                await self.terminate(reason)
+                return
+
+    async def terminate(self, reason):
+        """terminate → 等待 grace_seconds → kill (事件迴圈中的任務被取消時也由此終止 Hashcat)"""
+        self._announce(reason)
+        signal_process_group(self.process)
+        try:
+            await asyncio.wait_for(self.process.wait(), self.grace_seconds)
+        except asyncio.TimeoutError:
+            print(f"[KILL] Hashcat 在 {self.grace_seconds}s 內未結束，強制終止 process group")
+            self.killed = True
+            signal_process_group(self.process, kill=True)
+
+    async def abort(self):
+        """事件迴圈中的任務被取消時呼叫：停止監視並終止 Hashcat"""
+        self._task.cancel()
+        if self.process.returncode is None:
+            await self.terminate(STOP_CANCELLED)
+
+    async def stop(self):
+        """程序結束後呼叫，等待監視的 coroutine 結束 (包含 kill 的升級)"""
+        await self._task
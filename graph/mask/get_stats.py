@@ -1,12 +1,21 @@
 """
 讀取 round1, round2, total 的破解時間數據，
 計算完整的箱型圖統計數據 (min, Q1, median, Q3, max, mean)
+另以校正速度換算的預期破解時間 (progress / 速度，與裝置負載無關) 計算相同的統計：
+結果 JSON 有 Expected_Seconds_From_Progress 時直接使用，否則以 Crack_Position
+與速度快取 (exam/speed_cache.json，engine/calibration.py) 中該裝置的速度換算
 """
 
 import os
 import json
 import sys
 
+EXAM_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, EXAM_DIR)
+
+from engine.calibration import default_cache_path, load_speed_cache, lookup_speed  # noqa: E402
+from engine.runner import select_charset  # noqa: E402
+
 def get_percentile(data, percentile):
     """計算百分位數"""
     if not data:
@@ -21,16 +30,40 @@ def get_percentile(data, percentile):
     else:
         return sorted_data[f]
 
-def load_crack_times(result_dir):
+def expected_crack_seconds(data, speed_cache, test_folder="firsttest"):
+    """
+    以校正速度換算的預期破解時間 (秒)；沒有 progress 或找不到速度時回傳 None
+    速度快取中只有一個裝置時直接使用，否則依 Device_Name 對應
+    """
+    if data.get("Expected_Seconds_From_Progress") is not None:
+        return data["Expected_Seconds_From_Progress"]
+    position = data.get("Crack_Position")
+    if position is None:
+        return None
+    speed = data.get("Calibrated_Speed")
+    if not speed:
+        entries = list(speed_cache.values())
+        if len(entries) > 1:
+            entries = [e for e in entries if e.get("device", {}).get("name") == data.get("Device_Name")]
+        if len(entries) != 1:
+            return None
+        charset_hex = select_charset(test_folder)[0] if "?s" in data.get("Attack_Payload", "") else None
+        speed = lookup_speed(entries[0], "100", charset_hex)
+    return position / speed if speed else None
+
+
+def load_crack_times(result_dir, speed_cache=None):
     """
     讀取指定目錄下的 JSON 檔案，按密碼長度分類
-    Returns: dict {長度: [破解時間列表]}
+    Returns: (dict {長度: [破解時間列表]}, dict {長度: [預期破解時間列表]})
     """
     crack_times = {8: [], 9: [], 10: [], 11: [], 12: []}
+    expected_times = {length: [] for length in crack_times}
+    speed_cache = speed_cache or {}
     
     if not os.path.exists(result_dir):
         print(f"目錄不存在: {result_dir}")
-        return crack_times
+        return crack_times, expected_times
     
     # 遍歷各長度資料夾
     for folder_name in os.listdir(result_dir):
@@ -60,10 +93,13 @@ def load_crack_times(result_dir):
                 if data.get("Status") == "Cracked":
                     runtime = data.get("Actual_Runtime_Seconds", 0)
                     crack_times[length].append(runtime)
+                    expected = expected_crack_seconds(data, speed_cache)
+                    if expected is not None:
+                        expected_times[length].append(expected)
             except Exception as e:
                 print(f"讀取失敗 {json_path}: {e}")
     
-    return crack_times
+    return crack_times, expected_times
 
 def calculate_stats(times):
     """計算完整統計數據"""
@@ -83,6 +119,19 @@ def calculate_stats(times):
         'mean': sum(times) / n
     }
 
+def print_stats(times_by_length, expected_by_length):
+    for length in sorted(times_by_length.keys()):
+        stats = calculate_stats(times_by_length[length])
+        if stats:
+            print(f"{length}bit: n={stats['n']:<3} "
+                  f"min={stats['min']:.2f}s, Q1={stats['q1']:.2f}s, "
+                  f"med={stats['median']:.2f}s, Q3={stats['q3']:.2f}s, "
+                  f"max={stats['max']:.2f}s, avg={stats['mean']:.2f}s")
+        expected = calculate_stats(expected_by_length[length])
+        if expected:
+            print(f"       預期 (校正速度): n={expected['n']:<3} "
+                  f"med={expected['median']:.2f}s, avg={expected['mean']:.2f}s")
+
 def main():
     base_dir = os.path.dirname(os.path.abspath(__file__))
     exam_dir = os.path.abspath(os.path.join(base_dir, "..", "..", ".."))
@@ -90,6 +139,7 @@ def main():
     # 三個數據源
     round1_dir = os.path.join(exam_dir, "exam", "round1", "firsttest", "result_json", "1")
     round2_dir = os.path.join(exam_dir, "exam", "round2", "firsttest", "result_json", "1")
+    speed_cache = load_speed_cache(default_cache_path(EXAM_DIR))
     
     print("=" * 70)
     print("密碼長度破解時間完整統計數據")
@@ -97,39 +147,22 @@ def main():
     
     # Round 1
     print("\n[Round 1]")
-    round1_times = load_crack_times(round1_dir)
-    for length in sorted(round1_times.keys()):
-        stats = calculate_stats(round1_times[length])
-        if stats:
-            print(f"{length}bit: n={stats['n']:<3} "
-                  f"min={stats['min']:.2f}s, Q1={stats['q1']:.2f}s, "
-                  f"med={stats['median']:.2f}s, Q3={stats['q3']:.2f}s, "
-                  f"max={stats['max']:.2f}s, avg={stats['mean']:.2f}s")
+    round1_times, round1_expected = load_crack_times(round1_dir, speed_cache)
+    print_stats(round1_times, round1_expected)
     
     # Round 2
     print("\n[Round 2]")
-    round2_times = load_crack_times(round2_dir)
-    for length in sorted(round2_times.keys()):
-        stats = calculate_stats(round2_times[length])
-        if stats:
-            print(f"{length}bit: n={stats['n']:<3} "
-                  f"min={stats['min']:.2f}s, Q1={stats['q1']:.2f}s, "
-                  f"med={stats['median']:.2f}s, Q3={stats['q3']:.2f}s, "
-                  f"max={stats['max']:.2f}s, avg={stats['mean']:.2f}s")
+    round2_times, round2_expected = load_crack_times(round2_dir, speed_cache)
+    print_stats(round2_times, round2_expected)
     
     # Total (合併)
     print("\n[Total - Round 1 & 2 合併]")
     total_times = {8: [], 9: [], 10: [], 11: [], 12: []}
+    total_expected = {length: [] for length in total_times}
     for length in total_times.keys():
         total_times[length] = round1_times[length] + round2_times[length]
-    
-    for length in sorted(total_times.keys()):
-        stats = calculate_stats(total_times[length])
-        if stats:
-            print(f"{length}bit: n={stats['n']:<3} "
-                  f"min={stats['min']:.2f}s, Q1={stats['q1']:.2f}s, "
-                  f"med={stats['median']:.2f}s, Q3={stats['q3']:.2f}s, "
-                  f"max={stats['max']:.2f}s, avg={stats['mean']:.2f}s")
+        total_expected[length] = round1_expected[length] + round2_expected[length]
+    print_stats(total_times, total_expected)
     
     print("\n" + "=" * 70)
     print("完成！")